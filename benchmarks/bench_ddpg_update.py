@@ -0,0 +1,136 @@
+"""
+Microbenchmark: DDPG updates per second, before and after the fused update path.
+
+"legacy" replays the original DDPGAgent.train (per-tensor soft-update loops,
+full actor backward through the critic weights) on the same agent, so both
+variants share networks, optimizers and replay data.
+
+Each variant is timed over several repeats; the median rate is reported with
+the min-max spread, since single runs of a step this short are noisy.
+
+Usage:
+    python -m benchmarks.bench_ddpg_update --updates 2000 --batch-size 64 --repeats 7
+"""
+import argparse
+import json
+import timeit
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from modules.ddpg.ddpg_agent import DDPGAgent
+from modules.ddpg.replay_buffer import ReplayBuffer
+
+STATE_DIM = 5
+ACTION_DIM = 1
+
+
+def legacy_train(agent, replay_buffer, batch_size):
+    state, action, next_state, reward, done = replay_buffer.sample(batch_size)
+    reward = reward.unsqueeze(1)
+    done = done.unsqueeze(1)
+
+    with torch.no_grad():
+        target_Q = agent.critic_target(next_state, agent.actor_target(next_state))
+        target_Q = reward + (1 - done) * agent.gamma * target_Q
+
+    current_Q = agent.critic(state, action)
+    critic_loss = F.mse_loss(current_Q, target_Q)
+
+    agent.critic_optimizer.zero_grad()
+    critic_loss.backward()
+    agent.critic_optimizer.step()
+
+    actor_loss = -agent.critic(state, agent.actor(state)).mean()
+
+    agent.actor_optimizer.zero_grad()
+    actor_loss.backward()
+    agent.actor_optimizer.step()
+
+    for param, target_param in zip(agent.critic.parameters(), agent.critic_target.parameters()):
+        target_param.data.copy_(agent.tau * param.data + (1 - agent.tau) * target_param.data)
+
+    for param, target_param in zip(agent.actor.parameters(), agent.actor_target.parameters()):
+        target_param.data.copy_(agent.tau * param.data + (1 - agent.tau) * target_param.data)
+
+    return critic_loss.item()
+
+
+def make_buffer(size=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    buffer = ReplayBuffer(max_size=size, state_dim=STATE_DIM, action_dim=ACTION_DIM)
+    for _ in range(size):
+        buffer.add(rng.random(STATE_DIM), rng.random(ACTION_DIM), rng.random(STATE_DIM), -rng.random(), 0.0)
+    return buffer
+
+
+def time_updates(fn, n_updates, per_call=1, warmup=20, repeats=5):
+    """
+    Times `repeats` runs of n_updates updates (per_call per call of fn).
+
+    Returns:
+        dict: Median, min and max updates per second over the repeats.
+    """
+    for _ in range(warmup):
+        fn()
+    calls = max(1, n_updates // per_call)
+    rates = np.array([calls * per_call / seconds for seconds in timeit.repeat(fn, number=calls, repeat=repeats)])
+    return {"median": float(np.median(rates)), "min": float(rates.min()), "max": float(rates.max())}
+
+
+def run(n_updates=2000, batch_size=64, updates_per_call=4, compile_modes=("script", "compile"), repeats=5):
+    buffer = make_buffer()
+    results = {}
+
+    agent = DDPGAgent(STATE_DIM, ACTION_DIM)
+    # The original agent used the default (per-tensor) Adam implementation
+    agent.actor_optimizer = torch.optim.Adam(agent.actor.parameters(), lr=1e-4)
+    agent.critic_optimizer = torch.optim.Adam(agent.critic.parameters(), lr=1e-3)
+    results["legacy"] = time_updates(lambda: legacy_train(agent, buffer, batch_size), n_updates, repeats=repeats)
+
+    agent = DDPGAgent(STATE_DIM, ACTION_DIM)
+    results["fused"] = time_updates(lambda: agent.train(buffer, batch_size), n_updates, repeats=repeats)
+
+    agent = DDPGAgent(STATE_DIM, ACTION_DIM)
+    results[f"fused_x{updates_per_call}"] = time_updates(
+        lambda: agent.train(buffer, batch_size, updates=updates_per_call), n_updates, per_call=updates_per_call,
+        repeats=repeats)
+
+    for mode in compile_modes:
+        try:
+            agent = DDPGAgent(STATE_DIM, ACTION_DIM, compile_mode=mode)
+            results[f"fused_{mode}"] = time_updates(lambda: agent.train(buffer, batch_size), n_updates,
+                                                     repeats=repeats)
+        except Exception as e:
+            print(f"⚠️ Skipping compile_mode={mode}: {e}")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DDPG update-step microbenchmark.")
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--updates-per-call', type=int, default=4)
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per variant (median is reported)")
+    parser.add_argument('--threads', type=int, default=1, help="torch intra-op threads")
+    parser.add_argument('--no-compile', action='store_true', help="Skip the script/compile variants")
+    parser.add_argument('--json', type=str, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    results = run(args.updates, args.batch_size, args.updates_per_call,
+                  compile_modes=() if args.no_compile else ("script", "compile"), repeats=args.repeats)
+
+    baseline = results["legacy"]["median"]
+    print(f"\n⏱️ DDPG updates/s (batch={args.batch_size}, threads={args.threads}, "
+          f"median of {args.repeats}, min-max spread)")
+    for name, rate in results.items():
+        print(f"  {name:<16} {rate['median']:10.1f} updates/s  [{rate['min']:.1f}-{rate['max']:.1f}]  "
+              f"({rate['median'] / baseline:.2f}x)")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"updates_per_s": results, "batch_size": args.batch_size, "threads": args.threads,
+                       "repeats": args.repeats}, file, indent=2)
@@ -0,0 +1,101 @@
+"""
+Accuracy vs. latency vs. memory of the Digital Twin energy backends.
+
+Every backend is fitted on the same training split (surrogates are distilled
+from the forest) and evaluated on a held-out split:
+- error against the true energy target and against the forest's own
+  predictions (the accuracy the surrogate gives up)
+- batched latency per row and single-row latency (the per-step DT path)
+- pickled model size
+
+Runs on synthetic client data by default, or on a real client's data.csv.
+
+Usage:
+    python -m benchmarks.bench_dt_backends
+    python -m benchmarks.bench_dt_backends --client datasets/casas/federated_clients/client_0/data.csv --dataset casas
+"""
+import argparse
+import json
+import pickle
+import time
+
+import numpy as np
+
+from benchmarks import synthetic
+from modules.data_preprocessing.client_loader import load_client_data
+from modules.digital_twin.energy_backends import ENERGY_BACKENDS, ForestBackend
+from modules.digital_twin.state_predictor import FEATURE_COLUMNS
+
+
+def _latency(fn, min_time=0.2):
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while calls < 3 or time.perf_counter() - start < min_time:
+        fn()
+        calls += 1
+    return (time.perf_counter() - start) / calls
+
+
+def run(df, n_estimators=50, test_fraction=0.2, seed=0):
+    df = df.dropna()
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    y = df['energy'].to_numpy(dtype=np.float64)
+
+    order = np.random.default_rng(seed).permutation(len(X))
+    n_test = max(1, int(len(X) * test_fraction))
+    test, train = order[:n_test], order[n_test:]
+
+    start = time.perf_counter()
+    forest = ForestBackend(n_estimators=n_estimators, random_state=seed).fit(X[train], y[train])
+    forest_fit = time.perf_counter() - start
+    teacher = forest.predict(X[test])
+
+    results = {}
+    for name, backend_cls in ENERGY_BACKENDS.items():
+        start = time.perf_counter()
+        backend = forest if name == "forest" else backend_cls().distill(forest, X[train])
+        fit_time = forest_fit + (time.perf_counter() - start if name != "forest" else 0.0)
+
+        pred = backend.predict(X[test])
+        row = X[test][:1]
+        results[name] = {
+            "rmse": float(np.sqrt(np.mean((pred - y[test]) ** 2))),
+            "mae": float(np.mean(np.abs(pred - y[test]))),
+            "rmse_vs_forest": float(np.sqrt(np.mean((pred - teacher) ** 2))),
+            "fit_s": fit_time,
+            "batch_us_per_row": _latency(lambda: backend.predict(X[test])) / len(test) * 1e6,
+            "single_row_us": _latency(lambda: backend.predict(row)) * 1e6,
+            "model_bytes": len(pickle.dumps(backend))
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare DT energy backends (accuracy/latency/memory).")
+    parser.add_argument('--client', type=str, default=None, help="A client's data.csv (default: synthetic data)")
+    parser.add_argument('--dataset', type=str, default="env_sensors", help="Feature recipe for --client")
+    parser.add_argument('--rows', type=int, default=20000, help="Synthetic rows")
+    parser.add_argument('--trees', type=int, default=50)
+    parser.add_argument('--json', type=str, default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    if args.client:
+        df, _ = load_client_data(args.client, args.dataset)
+    else:
+        df = synthetic.client_frame(args.rows)
+
+    results = run(df, n_estimators=args.trees)
+    forest = results["forest"]
+    print(f"\n🧠 DT energy backends ({len(df)} rows, forest of {args.trees} trees)")
+    print(f"  {'backend':<8} {'RMSE':>9} {'vs forest':>10} {'batch µs/row':>13} {'1-row µs':>9} {'size KiB':>10} "
+          f"{'speedup':>8} {'smaller':>8}")
+    for name, r in results.items():
+        print(f"  {name:<8} {r['rmse']:9.5f} {r['rmse_vs_forest']:10.5f} {r['batch_us_per_row']:13.3f} "
+              f"{r['single_row_us']:9.1f} {r['model_bytes'] / 1024:10.1f} "
+              f"{forest['batch_us_per_row'] / r['batch_us_per_row']:7.1f}x "
+              f"{forest['model_bytes'] / r['model_bytes']:7.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"rows": len(df), "trees": args.trees, "backends": results}, file, indent=2)
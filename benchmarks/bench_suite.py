@@ -0,0 +1,434 @@
+"""
+Benchmark suite: throughput and peak memory of every hot path on synthetic data.
+
+Each benchmark builds its inputs from benchmarks.synthetic, then times
+repeated calls of one component (median over calls, at least --min-time
+seconds). Peak memory is reported two ways: the Python-heap peak of one
+call under tracemalloc (numpy/pandas buffers included, torch's allocator
+is not) and the process max RSS (ru_maxrss) after the benchmark.
+
+Results go to a JSON file; --compare checks them against an earlier file
+and exits non-zero when throughput drops or peak memory grows by more than
+--threshold.
+
+Usage:
+    python -m benchmarks.bench_suite --json bench.json
+    python -m benchmarks.bench_suite --only ddpg replay --compare bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import torch
+
+from benchmarks import synthetic
+from modules.ddpg.ddpg_agent import DDPGAgent
+from modules.ddpg.replay_buffer import ReplayBuffer
+from modules.digital_twin.state_predictor import DigitalTwinPredictor
+from modules.fdr.client_selector import ClientSelector, select_clients
+from modules.fdr.federated_aggregator import StreamingFedAvg, fed_avg, weighted_fed_avg
+from modules.fdr.local_trainer import LocalTrainer
+from modules.semantic_communication.semantic_fidelity import compute_semantic_fidelity, compute_semantic_fidelity_batch
+from modules.uav_scheduling.deployment_optimizer import optimize_uav_positions
+from modules.uav_scheduling.priority_greedy import priority_aware_greedy
+from utils.logger import RunLogger
+
+STATE_DIM = 5
+ACTION_DIM = 1
+
+# name -> setup(scale) returning (fn, items per call, unit)
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _n(base, scale):
+    return max(1, int(base * scale))
+
+
+@benchmark("dt_train")
+def bench_dt_train(scale):
+    df = synthetic.client_frame(_n(5000, scale))
+    return lambda: DigitalTwinPredictor().train(df), len(df), "rows"
+
+
+@benchmark("dt_predict")
+def bench_dt_predict(scale):
+    df = synthetic.client_frame(_n(5000, scale))
+    dt = DigitalTwinPredictor()
+    dt.train(df)
+    rows = df.head(100).to_dict("records")
+
+    def fn():
+        for row in rows:
+            dt.predict(row['rssi'], row['cpu_load'], row['task_size'], row['queue_length'])
+    return fn, len(rows), "predictions"
+
+
+@benchmark("dt_predict_batch")
+def bench_dt_predict_batch(scale):
+    df = synthetic.client_frame(_n(20000, scale))
+    dt = DigitalTwinPredictor()
+    dt.train(df)
+    return lambda: dt.predict_batch(df), len(df), "predictions"
+
+
+@benchmark("dt_partial_fit")
+def bench_dt_partial_fit(scale):
+    dt = DigitalTwinPredictor()
+    dt.train(synthetic.client_frame(_n(5000, scale)))
+    batch = synthetic.client_frame(100, seed=1)
+    return lambda: dt.partial_fit(batch), len(batch), "rows"
+
+
+@benchmark("replay_add")
+def bench_replay_add(scale):
+    n = _n(10000, scale)
+    states, actions, next_states, rewards, dones = synthetic.transitions(n)
+    buffer = ReplayBuffer(max_size=n, state_dim=STATE_DIM, action_dim=ACTION_DIM)
+
+    def fn():
+        for i in range(n):
+            buffer.add(states[i], actions[i], next_states[i], rewards[i], dones[i])
+    return fn, n, "transitions"
+
+
+def _filled_buffer(n):
+    buffer = ReplayBuffer(max_size=n, state_dim=STATE_DIM, action_dim=ACTION_DIM)
+    for transition in zip(*synthetic.transitions(n)):
+        buffer.add(*transition)
+    return buffer
+
+
+@benchmark("replay_sample")
+def bench_replay_sample(scale):
+    buffer = _filled_buffer(_n(10000, scale))
+    batches = _n(100, scale)
+
+    def fn():
+        for _ in range(batches):
+            buffer.sample(64)
+    return fn, batches, "batches"
+
+
+@benchmark("ddpg_select_action")
+def bench_ddpg_select_action(scale):
+    agent = DDPGAgent(STATE_DIM, ACTION_DIM)
+    states = synthetic.transitions(100)[0]
+
+    def fn():
+        for state in states:
+            agent.select_action(state)
+    return fn, len(states), "actions"
+
+
+@benchmark("ddpg_train")
+def bench_ddpg_train(scale):
+    agent = DDPGAgent(STATE_DIM, ACTION_DIM)
+    buffer = _filled_buffer(_n(10000, scale))
+    return lambda: agent.train(buffer, 64, updates=10), 10, "updates"
+
+
+@benchmark("fed_avg")
+def bench_fed_avg(scale):
+    states = synthetic.actor_states(_n(10, scale))
+    return lambda: fed_avg(states), len(states), "clients"
+
+
+@benchmark("weighted_fed_avg")
+def bench_weighted_fed_avg(scale):
+    states = synthetic.actor_states(_n(10, scale))
+    sizes = np.random.default_rng(0).integers(100, 10000, size=len(states)).tolist()
+    return lambda: weighted_fed_avg(states, sizes), len(states), "clients"
+
+
+@benchmark("select_clients")
+def bench_select_clients(scale):
+    clients = synthetic.client_frames(_n(20, scale), 1000)
+    predictors = []
+    for df in clients:
+        dt = DigitalTwinPredictor()
+        dt.train(df, precompute=True)
+        predictors.append(dt)
+    return lambda: select_clients(clients, predictors, max_clients=3), len(clients), "clients"
+
+
+@benchmark("client_selector")
+def bench_client_selector(scale):
+    clients = synthetic.client_frames(_n(20, scale), 1000)
+    predictors = []
+    for df in clients:
+        dt = DigitalTwinPredictor()
+        dt.train(df, precompute=True)
+        predictors.append(dt)
+    selector = ClientSelector(clients, predictors)
+    return lambda: selector.select(max_clients=3), len(clients), "clients"
+
+
+@benchmark("priority_aware_greedy")
+def bench_priority_aware_greedy(scale):
+    devices = synthetic.devices(_n(20000, scale))
+    uavs = synthetic.uavs(100)
+    capacity = len(devices) // len(uavs) + 1
+    return lambda: priority_aware_greedy(devices, uavs, max_capacity=capacity), len(devices), "devices"
+
+
+@benchmark("optimize_uav_positions")
+def bench_optimize_uav_positions(scale):
+    locations = [device['location'] for device in synthetic.devices(_n(10000, scale))]
+    return lambda: optimize_uav_positions(locations, 20), len(locations), "devices"
+
+
+@benchmark("semantic_fidelity")
+def bench_semantic_fidelity(scale):
+    features = np.random.default_rng(0).random((1000, 1280))
+
+    def fn():
+        for row in features:
+            compute_semantic_fidelity(row, 0.1, 0.2, "person")
+    return fn, len(features), "scores"
+
+
+@benchmark("semantic_fidelity_batch")
+def bench_semantic_fidelity_batch(scale):
+    rng = np.random.default_rng(0)
+    n = _n(10000, scale)
+    features = rng.random((n, 1280))
+    delay, energy = rng.random(n), rng.random(n)
+    return lambda: compute_semantic_fidelity_batch(features, delay, energy), n, "scores"
+
+
+def _bench_logger(scale, fmt, per_row=False):
+    rows = synthetic.log_rows("training_log", _n(50000, scale))
+    log_dir = tempfile.mkdtemp(prefix="bench-logs-")
+    runs = iter(range(1 << 30))
+
+    def fn():
+        with RunLogger(log_dir=log_dir, run_name=f"run-{next(runs)}", fmt=fmt) as logger:
+            if per_row:
+                # One log_step() call per row, as the training loop logs
+                for row in rows:
+                    logger.log_step(*row)
+            else:
+                logger.log_rows("training_log", rows)
+    return fn, len(rows), "rows", lambda: shutil.rmtree(log_dir, ignore_errors=True)
+
+
+@benchmark("logger_csv")
+def bench_logger_csv(scale):
+    return _bench_logger(scale, "csv")
+
+
+@benchmark("logger_csv_per_row")
+def bench_logger_csv_per_row(scale):
+    return _bench_logger(scale, "csv", per_row=True)
+
+
+@benchmark("logger_parquet")
+def bench_logger_parquet(scale):
+    import pyarrow  # noqa: F401  (skipped when missing)
+    return _bench_logger(scale, "parquet")
+
+
+@benchmark("federated_round")
+def bench_federated_round(scale):
+    """
+    One main.py round: semantic selection, local DDPG training of 3 clients
+    (100 steps each, so the agents do train) and streaming FedAvg.
+    """
+    local_steps = 100
+    clients = synthetic.client_frames(_n(5, scale), 2000)
+    predictors = []
+    for df in clients:
+        dt = DigitalTwinPredictor()
+        dt.train(df, precompute=True)
+        predictors.append(dt)
+    trainer = LocalTrainer(clients, predictors, settings={"local_steps": local_steps})
+    global_agent = DDPGAgent(STATE_DIM, ACTION_DIM)
+
+    def fn():
+        aggregator = StreamingFedAvg(global_agent.actor.state_dict())
+        selected = select_clients(clients, predictors, max_clients=3)
+        for _, weights, _ in trainer.train_round(selected, global_agent.actor.state_dict(), 1):
+            aggregator.add(weights)
+        global_agent.actor.load_state_dict(aggregator.result())
+    return fn, 3 * local_steps, "env steps", trainer.close
+
+
+def measure(fn, items, min_time=0.5, max_calls=10000):
+    """
+    Times fn over repeated calls and records its peak memory.
+
+    Returns:
+        dict: Median seconds per call, throughput (items/s) and memory peaks.
+    """
+    fn()  # warmup
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_calls and (len(times) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    seconds = float(np.median(times))
+    return {
+        "seconds_per_call": seconds,
+        "calls": len(times),
+        "items_per_call": items,
+        "throughput": items / seconds,
+        "tracemalloc_peak_bytes": peak,
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    }
+
+
+def run_suite(names=None, scale=1.0, min_time=0.5):
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if names and not any(pattern in name for pattern in names):
+            continue
+        # Keep the components' own progress prints out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                fn, items, unit, *cleanup = setup(scale)
+            except ImportError as e:
+                skipped = e
+            else:
+                skipped = None
+                try:
+                    results[name] = dict(measure(fn, items, min_time), unit=unit)
+                finally:
+                    for close in cleanup:
+                        close()
+        if skipped is not None:
+            print(f"⚠️ Skipping {name}: {skipped}")
+            continue
+        r = results[name]
+        print(f"  {name:<24} {r['throughput']:14.1f} {unit}/s  "
+              f"{r['seconds_per_call'] * 1e3:9.3f} ms/call  peak {r['tracemalloc_peak_bytes'] / 2**20:8.2f} MiB")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Settings that change what a benchmark measures; results are only comparable when they match
+COMPARABLE_META = ("scale", "threads")
+
+
+def compare(results, baseline, threshold=0.15, meta=None):
+    """
+    Flags benchmarks whose throughput fell, or whose tracemalloc peak grew
+    (by more than 1 MiB), by more than `threshold` relative to `baseline`.
+
+    Args:
+        meta (dict): The current run's meta; when given, a baseline recorded
+            with a different scale or thread count is refused.
+
+    Returns:
+        list of str: Regression descriptions; empty when none.
+
+    Raises:
+        ValueError: If the baseline was recorded with different settings.
+    """
+    if meta is not None:
+        mismatched = [f"{key}={baseline['meta'].get(key)} (now {meta.get(key)})"
+                      for key in COMPARABLE_META if baseline["meta"].get(key) != meta.get(key)]
+        if mismatched:
+            raise ValueError("Baseline was recorded with different settings: " + ", ".join(mismatched))
+        for key in ("python", "numpy", "torch", "cpu_count"):
+            if baseline["meta"].get(key) != meta.get(key):
+                print(f"⚠️ Baseline {key} {baseline['meta'].get(key)} differs from {meta.get(key)}")
+
+    regressions = []
+    print(f"\n📊 Compared with {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%})")
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        speedup = current["throughput"] / previous["throughput"]
+        memory = current["tracemalloc_peak_bytes"] / max(previous["tracemalloc_peak_bytes"], 1)
+        print(f"  {name:<24} throughput {speedup:6.2f}x   peak memory {memory:6.2f}x")
+
+        if speedup < 1 - threshold:
+            regressions.append(f"{name}: throughput {speedup:.2f}x of baseline")
+        grown = current["tracemalloc_peak_bytes"] - previous["tracemalloc_peak_bytes"]
+        if memory > 1 + threshold and grown > 2**20:
+            regressions.append(f"{name}: peak memory {memory:.2f}x of baseline")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Synthetic-data benchmark suite.")
+    parser.add_argument('--only', nargs='+', default=None, help="Run benchmarks whose name contains any of these")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier for synthetic input sizes")
+    parser.add_argument('--min-time', type=float, default=0.5, help="Minimum timed seconds per benchmark")
+    parser.add_argument('--threads', type=int, default=1, help="torch intra-op threads")
+    parser.add_argument('--json', type=str, default=None, help="Write results to this JSON file")
+    parser.add_argument('--compare', type=str, default=None, help="Baseline JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.15, help="Relative change counted as a regression")
+    parser.add_argument('--list', action='store_true', help="List benchmark names and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        raise SystemExit(0)
+
+    torch.set_num_threads(args.threads)
+    print(f"⏱️ Running benchmarks (scale={args.scale}, threads={args.threads})")
+    results = run_suite(args.only, args.scale, args.min_time)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "torch": torch.__version__,
+            "cpu_count": os.cpu_count(),
+            "threads": args.threads,
+            "scale": args.scale
+        },
+        "results": results
+    }
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        try:
+            regressions = compare(results, baseline, args.threshold, meta=report["meta"])
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            raise SystemExit(2)
+        if regressions:
+            print("\n❌ Regressions:\n  " + "\n  ".join(regressions))
+            raise SystemExit(1)
+        print("\n✅ No regressions.")
@@ -0,0 +1,77 @@
+"""
+Synthetic inputs for the benchmarks, so they run without the datasets.
+
+Shapes and value ranges follow what main.py feeds each component: client
+frames carry CLIENT_COLUMNS derived like engineer_features() does for the
+env_sensors data, devices/UAVs use priority_aware_greedy()'s dict format.
+"""
+import numpy as np
+import pandas as pd
+import torch
+
+from modules.data_preprocessing.client_loader import CLIENT_COLUMNS
+from modules.ddpg.ddpg_agent import Actor
+from utils.logger import LOG_SCHEMAS
+
+
+def client_frame(n_rows, seed=0):
+    """
+    One client's engineered data as a DataFrame with CLIENT_COLUMNS.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n_rows, 4)), columns=CLIENT_COLUMNS[:4])
+    df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1
+    df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1
+    return df
+
+
+def client_frames(n_clients, n_rows, seed=0):
+    return [client_frame(n_rows, seed=seed + i) for i in range(n_clients)]
+
+
+def transitions(n, state_dim=5, action_dim=1, seed=0):
+    """
+    Returns:
+        tuple: (states, actions, next_states, rewards, dones) arrays of length n.
+    """
+    rng = np.random.default_rng(seed)
+    return (rng.random((n, state_dim)), rng.random((n, action_dim)), rng.random((n, state_dim)),
+            -rng.random(n), (rng.random(n) < 0.1).astype(np.float64))
+
+
+def actor_states(n_clients, state_dim=5, action_dim=1, noise=1e-2, seed=0):
+    """
+    n_clients actor state_dicts perturbed around one shared model, like the
+    local updates returned in a federated round.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    base = Actor(state_dim, action_dim).state_dict()
+    return [{k: v + noise * torch.randn(v.shape, generator=generator) for k, v in base.items()}
+            for _ in range(n_clients)]
+
+
+def devices(n, area=10_000.0, seed=0):
+    rng = np.random.default_rng(seed)
+    locations = rng.random((n, 2)) * area
+    priorities = rng.random(n)
+    return [{'id': i, 'priority': float(priorities[i]), 'location': tuple(locations[i])} for i in range(n)]
+
+
+def uavs(n, area=10_000.0, seed=1):
+    rng = np.random.default_rng(seed)
+    locations = rng.random((n, 2)) * area
+    return [{'id': f"UAV{i}", 'location': tuple(locations[i]), 'assigned': []} for i in range(n)]
+
+
+def log_rows(table, n, seed=0):
+    """
+    n rows for a LOG_SCHEMAS table, as the tuples the trainer produces.
+    """
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name, dtype in LOG_SCHEMAS[table]:
+        if np.issubdtype(dtype, np.integer):
+            columns.append(rng.integers(0, 100, size=n).tolist())
+        else:
+            columns.append(rng.random(n).tolist())
+    return list(zip(*columns))
@@ -1,187 +1,285 @@
-import pandas as pd
 import numpy as np
 import os
+import json
+import time
 import argparse
 import random
-import shutil
-import importlib.util
+import runpy
 
-from modules.digital_twin.state_predictor import DigitalTwinPredictor
+import torch
+
+from modules.data_preprocessing.client_loader import client_data_path, load_client_data, open_client_store
+from modules.digital_twin.twin_store import train_twins
 from modules.ddpg.ddpg_agent import DDPGAgent
-from modules.ddpg.replay_buffer import ReplayBuffer
-from modules.fdr.federated_aggregator import fed_avg
-from modules.fdr.client_selector import select_clients
-from utils.logger import init_logger, log_step, log_semcom, log_divergence
-from modules.semantic_communication.semantic_fidelity import compute_semantic_fidelity
-from modules.service_migration.migration_decision import should_migrate
-from modules.service_migration.mobility_predictor import predict_next_location
-from scipy.spatial.distance import cosine
-
-# Parse arguments
-parser = argparse.ArgumentParser(description="Run FedUAV-TwinBench with selected dataset.")
-parser.add_argument('--dataset', type=str, choices=['env_sensors', 'casas', 'visdrone'], default='env_sensors')
-parser.add_argument('--ablation', type=str, choices=['baseline', 'no_dt', 'no_semcom', 'default'], default='default')
-args = parser.parse_args()
-
-dataset_name = args.dataset
-print(f"\n📂 Running testbed using dataset: {dataset_name}\n")
-
-# Handle ablation config switch
-ablation_map = {
-    'baseline': 'baseline.py',
-    'no_dt': 'no_dt.py',
-    'no_semcom': 'no_semcom.py',
-    'default': None
-}
-selected_file = ablation_map[args.ablation]
-if selected_file:
-    shutil.copyfile(f"simulations/ablation/{selected_file}", "simulations/ablation/config.py")
-    print(f"🔁 Using ablation config: {selected_file}")
-
-# Load active ablation config
-spec = importlib.util.spec_from_file_location("config", "simulations/ablation/config.py")
-ablation_config = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(ablation_config)
-USE_DIGITAL_TWIN = ablation_config.USE_DIGITAL_TWIN
-USE_SEMANTIC_SELECTION = ablation_config.USE_SEMANTIC_SELECTION
-print(f"🔧 DT Enabled: {USE_DIGITAL_TWIN}, Semantic Selection: {USE_SEMANTIC_SELECTION}\n")
+from modules.fdr.federated_aggregator import StreamingFedAvg
+from modules.fdr.client_selector import ClientSelector
+from modules.fdr.local_trainer import LocalTrainer
+from utils.logger import RunLogger
+from utils.profiling import PhaseTimer, RoundProfiler, peak_rss_mb
+
+ABLATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulations", "ablations")
+ABLATIONS = ['baseline', 'no_dt', 'no_semcom', 'default']
 
 # Parameters
 STATE_DIM = 5
 ACTION_DIM = 1
-ROUNDS = 5
-LOCAL_STEPS = 50
 BATCH_SIZE = 64
 MAX_PARTICIPANTS = 3
 
-# Load federated client data
-client_datasets = []
-dt_predictors = []
-
-client_path = f"datasets/{dataset_name}/federated_clients"
-client_files = sorted([f for f in os.listdir(client_path) if os.path.isdir(os.path.join(client_path, f))])
-CLIENTS = len(client_files)
 
-for i in range(CLIENTS):
-    path = os.path.join(client_path, f"client_{i}", "data.csv")
-    df = pd.read_csv(path)
-    print(f"🧾 Columns in {dataset_name} client {i}: {df.columns.tolist()}")
+def load_ablation_config(name="default"):
+    """
+    Reads simulations/ablations/<name>.py ('default' -> config.py) into a
+    plain dict of its upper-case settings, without touching any file.
+    """
+    file_name = "config.py" if name == "default" else f"{name}.py"
+    settings = runpy.run_path(os.path.join(ABLATION_DIR, file_name))
+    return {key: value for key, value in settings.items() if key.isupper()}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run FedUAV-TwinBench with selected dataset.")
+    parser.add_argument('--dataset', type=str, choices=['env_sensors', 'casas', 'visdrone'], default='env_sensors')
+    parser.add_argument('--ablation', type=str, choices=ABLATIONS, default='default')
+    parser.add_argument('--seed', type=int, default=None, help="Seed for python/numpy/torch RNGs")
+    parser.add_argument('--rounds', type=int, default=5, help="Federated rounds")
+    parser.add_argument('--workers', type=int, default=1, help="Processes for parallel local training (1 = sequential)")
+    parser.add_argument('--threads-per-worker', type=int, default=1, help="Torch intra-op threads per training worker")
+    parser.add_argument('--rescore-fraction', type=float, default=1.0,
+                        help="Fraction of clients rescored per round by semantic selection (rotating; 1 = all)")
+    parser.add_argument('--local-steps', type=int, default=50, help="Environment steps per selected client per round")
+    parser.add_argument('--replay', type=str, choices=['uniform', 'prioritized'], default='uniform',
+                        help="Replay sampling: uniform or sum-tree prioritized experience replay")
+    parser.add_argument('--updates-per-step', type=int, default=1, help="DDPG gradient updates per environment step")
+    parser.add_argument('--compile', type=str, choices=['script', 'compile'], default=None,
+                        help="Opt-in TorchScript or torch.compile for the local agents' networks")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Parse client CSVs and retrain DTs instead of using the binary/twin caches")
+    parser.add_argument('--cpus', type=int, default=None,
+                        help="CPU cores this run may use for DT fitting (default: all; set by sweeps)")
+    parser.add_argument('--dt-workers', type=int, default=None,
+                        help="Processes fitting Digital Twins at startup (default: --cpus)")
+    parser.add_argument('--dt-trees', type=int, default=50, help="Trees in each Digital Twin's energy forest")
+    parser.add_argument('--dt-backend', type=str, choices=['forest', 'grid', 'mlp'], default='forest',
+                        help="DT energy model: the forest, or a grid/MLP surrogate distilled from it")
+    parser.add_argument('--log-format', type=str, choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--log-dir', type=str, default="logs", help="Root of the logs/runs/ tree")
+    parser.add_argument('--run-name', type=str, default=None, help="Name of the run directory under logs/runs/")
+    parser.add_argument('--no-latest', action='store_true',
+                        help="Do not point <log-dir>/latest_run.txt at this run (used by concurrent sweep jobs)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-round phase timings (phase_log) alongside round_metrics")
+    parser.add_argument('--profiler', type=str, choices=['cprofile', 'torch'], default=None,
+                        help="Capture a cProfile or torch.profiler trace of the rounds given by --profile-rounds")
+    parser.add_argument('--profile-rounds', type=int, nargs='+', default=[1], help="Rounds (1-based) to profile")
+    return parser
+
+
+def run_experiment(args, ablation_config=None):
+    """
+    Runs one federated training experiment.
+
+    Args:
+        args (argparse.Namespace): Options from build_parser().
+        ablation_config (dict): Ablation settings; loaded from args.ablation
+            when omitted.
+
+    Returns:
+        dict: Run summary (also written to <run_dir>/summary.json), or None
+        when no client has usable data.
+    """
+    dataset_name = args.dataset
+    print(f"\n📂 Running testbed using dataset: {dataset_name}\n")
+
+    if ablation_config is None:
+        ablation_config = load_ablation_config(args.ablation)
+    USE_DIGITAL_TWIN = ablation_config["USE_DIGITAL_TWIN"]
+    USE_SEMANTIC_SELECTION = ablation_config["USE_SEMANTIC_SELECTION"]
+    print(f"🔧 DT Enabled: {USE_DIGITAL_TWIN}, Semantic Selection: {USE_SEMANTIC_SELECTION}\n")
+
+    ROUNDS = args.rounds
+    LOCAL_STEPS = args.local_steps
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+        torch.manual_seed(args.seed)
+
+    timer = PhaseTimer(enabled=args.profile)
+
+    # Load federated client data
+    client_datasets = []
+
+    client_path = f"datasets/{dataset_name}/federated_clients"
+    # One shared file + offsets index when the preprocessor wrote it, else a folder per client
+    client_store = open_client_store(client_path)
+    if client_store is not None:
+        CLIENTS = len(client_store)
+    else:
+        client_files = sorted([f for f in os.listdir(client_path) if os.path.isdir(os.path.join(client_path, f))])
+        CLIENTS = len(client_files)
 
-    if dataset_name == "casas":
-        df['SensorValue'] = df['SensorValue'].astype(str)
-        df['SensorCode'] = df['SensorValue'].astype('category').cat.codes / 100.0
+    for i in range(CLIENTS):
+        with timer.phase("load_data"):
+            if client_store is not None:
+                df, from_cache = client_store.load_client(i, dataset_name), False
+            else:
+                path = client_data_path(os.path.join(client_path, f"client_{i}"))
+                df, from_cache = load_client_data(path, dataset_name, use_cache=not args.no_cache)
+        if from_cache:
+            print(f"⚡ Loaded {dataset_name} client {i} from binary cache.")
 
-        print(f"📉 After cleaning, client {i} has {len(df)} rows.")
         if len(df) < 3:
             print(f"⚠️ Not enough valid data in client {i}, skipping.")
             continue
 
-        df['rssi'] = df['SensorCode']
-        df['cpu_load'] = df['SensorID'].astype('category').cat.codes / 10.0
-        df['task_size'] = df['SensorCode'].rolling(window=5, min_periods=1).mean()
-        df['queue_length'] = np.abs(df['SensorCode'].diff().fillna(0)) / 10.0
-        df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1
-        df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1
-
-    elif dataset_name in ["env_sensors", "visdrone"]:
-        df = df.rename(columns={'0': 'rssi', '1': 'cpu_load', '2': 'task_size', '3': 'queue_length'})
-        df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1
-        df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1
-
-    print(f"✅ Client {i} has {len(df)} usable rows after preprocessing.")
-    predictor = DigitalTwinPredictor()
-    predictor.train(df)
-
-    client_datasets.append(df)
-    dt_predictors.append(predictor)
-
-if len(client_datasets) == 0:
-    print(f"🚫 No valid clients available. Aborting training.")
-    exit(1)
-
-# Global model
-global_agent = DDPGAgent(state_dim=STATE_DIM, action_dim=ACTION_DIM)
-log_path = init_logger()
-
-# Federated rounds
-for round in range(ROUNDS):
-    print(f"\n🌐 Federated Round {round+1}")
-    local_weights = []
-    semantic_scores = []
-
-    # Select clients
-    if USE_SEMANTIC_SELECTION:
-        selected_idxs = select_clients(client_datasets, dt_predictors, max_clients=MAX_PARTICIPANTS, strategy="semantic")
-    else:
-        selected_idxs = random.sample(range(len(client_datasets)), MAX_PARTICIPANTS)
-
-    for i in selected_idxs:
-        df = client_datasets[i]
-        dt = dt_predictors[i]
-        print(f"\n📶 Client {i} Training")
-
-        agent = DDPGAgent(state_dim=STATE_DIM, action_dim=ACTION_DIM)
-        agent.actor.load_state_dict(global_agent.actor.state_dict())
-        buffer = ReplayBuffer(max_size=10000, state_dim=STATE_DIM, action_dim=ACTION_DIM)
-
-        for step in range(LOCAL_STEPS):
-            row = df.sample().iloc[0]
-
-            if USE_DIGITAL_TWIN:
-                pred = dt.predict(row['rssi'], row['cpu_load'], row['task_size'], row['queue_length'])
-            else:
-                pred = {
-                    'predicted_delay': row['delay'],
-                    'predicted_energy': row['energy'],
-                    'predicted_queue': row['queue_length']
-                }
-
-            semantic_score = compute_semantic_fidelity(
-                features=np.random.rand(1280),
-                predicted_delay=pred['predicted_delay'],
-                predicted_energy=pred['predicted_energy'],
-                object_type="person"
-            )
-            semantic_scores.append(semantic_score)
-
-            urgency = np.random.uniform(0.2, 1.0)
-            state = [pred['predicted_delay'], pred['predicted_energy'], pred['predicted_queue'], semantic_score, urgency]
-            action = agent.select_action(np.array(state))
-
-            reward = -(state[0] * 2 + state[1]) * action[0]
-            next_state = state
-            done = should_migrate(pred['predicted_queue'], pred['predicted_energy'])
-
-            buffer.add(state, action, next_state, reward, done)
-
-            log_step(
-                filepath=log_path,
-                round_id=round + 1,
-                client_id=i,
-                step=step,
-                reward=reward,
-                delay=state[0],
-                energy=state[1],
-                migration_flag=done
-            )
-
-            log_semcom(round + 1, i, step, semantic_score, energy=state[1])
-
-            if buffer.size > BATCH_SIZE:
-                agent.train(buffer, BATCH_SIZE, round_id=round + 1, client_id=i, global_step=step)
-
-        local_weights.append(agent.actor.state_dict())
-
-    for i, weights in enumerate(local_weights):
-        flat_global = np.concatenate([p.data.cpu().numpy().flatten() for p in global_agent.actor.parameters()])
-        flat_local = np.concatenate([weights[k].cpu().numpy().flatten() for k in weights])
-        divergence = cosine(flat_global, flat_local)
-        log_divergence(round + 1, i, divergence)
-
-    if not local_weights:
-        print(f"⚠️ No clients participated in round {round+1}, skipping aggregation.")
-        continue
-    aggregated_weights = fed_avg(local_weights)
-    global_agent.actor.load_state_dict(aggregated_weights)
-
-print("\n✅ Federated Training Complete.")
+        print(f"✅ Client {i} has {len(df)} usable rows after preprocessing.")
+        client_datasets.append(df)
+
+    if len(client_datasets) == 0:
+        print(f"🚫 No valid clients available. Aborting training.")
+        return None
+
+    # Fit (or reload persisted) Digital Twins for all clients at once
+    cpus = args.cpus or os.cpu_count() or 1
+    dt_workers = min(args.dt_workers or cpus, len(client_datasets))
+    dt_predictors, dt_cached = train_twins(
+        client_datasets,
+        params={"n_estimators": args.dt_trees, "random_state": args.seed, "energy_backend": args.dt_backend},
+        workers=dt_workers,
+        cpu_count=cpus,
+        cache_dir=None if args.no_cache else os.path.join("datasets", dataset_name, "cache", "twins"),
+        timer=timer
+    )
+    print(f"🧠 Digital Twins ready: {sum(dt_cached)} loaded, {len(dt_cached) - sum(dt_cached)} trained "
+          f"({dt_workers} worker(s))")
+
+    # Global model
+    global_agent = DDPGAgent(state_dim=STATE_DIM, action_dim=ACTION_DIM)
+    logger = RunLogger(log_dir=args.log_dir, run_name=args.run_name, fmt=args.log_format,
+                       update_latest=not args.no_latest)
+    print(f"🗂️ Logging run to {logger.run_dir}\n")
+    profiler = RoundProfiler(args.profiler, args.profile_rounds, logger.run_dir)
+
+    trainer = LocalTrainer(
+        client_datasets,
+        dt_predictors,
+        settings={
+            "state_dim": STATE_DIM,
+            "action_dim": ACTION_DIM,
+            "local_steps": LOCAL_STEPS,
+            "batch_size": BATCH_SIZE,
+            "use_digital_twin": USE_DIGITAL_TWIN,
+            "replay": args.replay,
+            "updates_per_step": args.updates_per_step,
+            "compile_mode": args.compile,
+            "profile": args.profile
+        },
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker
+    )
+    selector = ClientSelector(client_datasets, dt_predictors, rescore_fraction=args.rescore_fraction, timer=timer)
+
+    # Setup phases (data loading, DT loading/fitting/prediction) are reported as round 0
+    logger.log_phases(0, timer.snapshot())
+    timer.reset()
+    if args.workers > 1:
+        print(f"⚙️ Training selected clients in parallel: {args.workers} workers × {args.threads_per_worker} thread(s)\n")
+
+    # Federated rounds
+    start_time = time.perf_counter()
+    round_summaries = []
+    for round in range(ROUNDS):
+        print(f"\n🌐 Federated Round {round+1}")
+        round_start = time.perf_counter()
+        aggregator = StreamingFedAvg(global_agent.actor.state_dict())
+        rewards, delays, energies, migrations, losses, divergences = [], [], [], [], [], []
+
+        with profiler.profile(round + 1):
+            # Select clients
+            with timer.phase("select_clients"):
+                if USE_SEMANTIC_SELECTION:
+                    selected_idxs = selector.select(max_clients=MAX_PARTICIPANTS, strategy="semantic")
+                else:
+                    selected_idxs = random.sample(range(len(client_datasets)), MAX_PARTICIPANTS)
+
+            for i, weights, metrics in trainer.train_round(selected_idxs, global_agent.actor.state_dict(), round + 1):
+                print(f"\n📶 Client {i} Training complete")
+                # Client-side phases, summed over this round's clients
+                timer.merge(metrics["phases"])
+
+                with timer.phase("logging"):
+                    logger.log_rows("training_log", metrics["steps"])
+                    logger.log_rows("semantic_log", metrics["semcom"])
+                    logger.log_rows("loss_log", metrics["loss"])
+
+                # Fold the update into the running FedAvg mean as it arrives
+                divergence = aggregator.add(weights, timer=timer)
+                logger.log_divergence(round + 1, i, divergence)
+
+                rewards.extend(row[3] for row in metrics["steps"])
+                delays.extend(row[4] for row in metrics["steps"])
+                energies.extend(row[5] for row in metrics["steps"])
+                migrations.extend(row[6] for row in metrics["steps"])
+                losses.extend(row[3] for row in metrics["loss"])
+                divergences.append(divergence)
+
+            logger.flush(timer=timer)
+
+            if aggregator.count > 0:
+                global_agent.actor.load_state_dict(aggregator.result(timer=timer))
+
+        round_time = time.perf_counter() - round_start
+        logger.log_round_metrics(round + 1, round_time, len(rewards), peak_rss_mb())
+        if timer.enabled:
+            timer.add("round_total", round_time)
+            logger.log_phases(round + 1, timer.snapshot())
+            breakdown = ", ".join(f"{name} {seconds:.3f}s" for name, (seconds, _) in timer.snapshot()["phases"].items())
+            print(f"⏱️ Round {round+1}: {len(rewards) / round_time:.1f} steps/s | {breakdown}")
+            timer.reset()
+
+        round_summaries.append({
+            "round": round + 1,
+            "clients": aggregator.count,
+            "avg_reward": float(np.mean(rewards)) if rewards else None,
+            "avg_delay": float(np.mean(delays)) if delays else None,
+            "avg_energy": float(np.mean(energies)) if energies else None,
+            "migration_rate": float(np.mean(migrations)) if migrations else None,
+            "avg_loss": float(np.mean(losses)) if losses else None,
+            "avg_divergence": float(np.mean(divergences)) if divergences else None,
+            "wall_time_s": round_time,
+            "steps_per_s": len(rewards) / round_time
+        })
+
+        if aggregator.count == 0:
+            print(f"⚠️ No clients participated in round {round+1}, skipping aggregation.")
+
+    trainer.close()
+    logger.close()
+
+    summary = {
+        "dataset": dataset_name,
+        "ablation": args.ablation,
+        "seed": args.seed,
+        "use_digital_twin": USE_DIGITAL_TWIN,
+        "use_semantic_selection": USE_SEMANTIC_SELECTION,
+        "clients": len(client_datasets),
+        "rounds": ROUNDS,
+        "local_steps": LOCAL_STEPS,
+        "wall_time_s": time.perf_counter() - start_time,
+        "peak_rss_mb": peak_rss_mb(),
+        "run_dir": logger.run_dir,
+        "final": round_summaries[-1] if round_summaries else None,
+        "per_round": round_summaries
+    }
+    with open(os.path.join(logger.run_dir, "summary.json"), "w") as file:
+        json.dump(summary, file, indent=2)
+
+    print("\n✅ Federated Training Complete.")
+    return summary
+
+
+if __name__ == "__main__":
+    summary = run_experiment(build_parser().parse_args())
+    if summary is None:
+        exit(1)
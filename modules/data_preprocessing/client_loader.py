@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Columns of the engineered client matrix consumed by the DT and the environment
+CLIENT_COLUMNS = ['rssi', 'cpu_load', 'task_size', 'queue_length', 'delay', 'energy']
+
+# Bump whenever engineer_features() changes so stale caches are rebuilt
+FEATURE_RECIPE_VERSION = 1
+
+# Index file marking a federated_clients folder as a SharedClientStore
+SHARED_INDEX = "index.json"
+
+
+def engineer_features(df, dataset_name):
+    """
+    Derives the DT input/target columns from a raw federated client CSV.
+
+    Args:
+        df (pd.DataFrame): Raw client data.
+        dataset_name (str): 'casas', 'env_sensors' or 'visdrone'.
+
+    Returns:
+        pd.DataFrame: Data with CLIENT_COLUMNS added.
+    """
+    if dataset_name == "casas":
+        df['SensorValue'] = df['SensorValue'].astype(str)
+        df['SensorCode'] = df['SensorValue'].astype('category').cat.codes / 100.0
+
+        df['rssi'] = df['SensorCode']
+        df['cpu_load'] = df['SensorID'].astype('category').cat.codes / 10.0
+        df['task_size'] = df['SensorCode'].rolling(window=5, min_periods=1).mean()
+        df['queue_length'] = np.abs(df['SensorCode'].diff().fillna(0)) / 10.0
+        df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1
+        df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1
+
+    elif dataset_name in ["env_sensors", "visdrone"]:
+        df = df.rename(columns={'0': 'rssi', '1': 'cpu_load', '2': 'task_size', '3': 'queue_length'})
+        df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1
+        df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1
+
+    return df
+
+
+def read_client_file(data_path):
+    """
+    Reads a raw federated client file: data.parquet or data.csv.
+    """
+    if data_path.endswith(".parquet"):
+        return pd.read_parquet(data_path)
+    return pd.read_csv(data_path)
+
+
+def client_data_path(client_dir):
+    """
+    The client's data file, preferring columnar data.parquet over data.csv.
+    """
+    parquet_path = os.path.join(client_dir, "data.parquet")
+    return parquet_path if os.path.exists(parquet_path) else os.path.join(client_dir, "data.csv")
+
+
+class SharedClientStore:
+    """
+    All clients of a dataset stored back to back in one shared file.
+
+    Layout (written by a preprocessor): <client_path>/index.json holds the
+    data file name, the column names and `offsets` (n_clients + 1 row
+    boundaries); the data file is a column-major (n_columns, n_rows) float64
+    .npy, memory-mapped so each client is a contiguous slice of every column
+    and loading one never touches the others.
+    """
+
+    def __init__(self, client_path):
+        with open(os.path.join(client_path, SHARED_INDEX)) as file:
+            self.index = json.load(file)
+        self.columns = self.index["columns"]
+        self.offsets = np.asarray(self.index["offsets"], dtype=np.int64)
+        self.data = np.load(os.path.join(client_path, self.index["data"]), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def client_frame(self, i):
+        """
+        Raw rows of client i, with the columns of the original client CSVs.
+        """
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return pd.DataFrame({column: self.data[j, start:end] for j, column in enumerate(self.columns)})
+
+    def load_client(self, i, dataset_name):
+        """
+        Engineered feature matrix of client i (CLIENT_COLUMNS).
+        """
+        return engineer_features(self.client_frame(i), dataset_name)[CLIENT_COLUMNS]
+
+
+def open_client_store(client_path):
+    """
+    The SharedClientStore in client_path, or None if clients are stored as
+    one client_<i>/ folder each.
+    """
+    if os.path.exists(os.path.join(client_path, SHARED_INDEX)):
+        return SharedClientStore(client_path)
+    return None
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_hash(data_path, meta):
+    """
+    Reuses the content hash recorded in meta while the source file's size and
+    mtime are unchanged, so warm starts never re-read the CSV.
+    """
+    stat = os.stat(data_path)
+    if meta and meta.get("source_size") == stat.st_size and meta.get("source_mtime_ns") == stat.st_mtime_ns:
+        return meta["source_hash"], stat
+    return file_digest(data_path), stat
+
+
+def load_client_data(data_path, dataset_name, cache_dir=None, use_cache=True):
+    """
+    Loads one client's engineered feature matrix, from a memory-mapped .npy
+    cache when possible.
+
+    The cache entry is keyed by a hash of the source file, the dataset name and
+    FEATURE_RECIPE_VERSION; any change to one of them triggers a rebuild.
+
+    Args:
+        data_path (str): Path to the client's data.csv or data.parquet.
+        dataset_name (str): Dataset name, selects the feature recipe.
+        cache_dir (str): Cache directory. Defaults to datasets/<name>/cache.
+        use_cache (bool): If False, always parse the source file and skip the cache.
+
+    Returns:
+        tuple: (pd.DataFrame with CLIENT_COLUMNS, bool loaded_from_cache)
+    """
+    if not use_cache:
+        df = engineer_features(read_client_file(data_path), dataset_name)
+        return df[CLIENT_COLUMNS], False
+
+    cache_dir = cache_dir or os.path.join("datasets", dataset_name, "cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    client_name = os.path.basename(os.path.dirname(os.path.abspath(data_path)))
+    meta_path = os.path.join(cache_dir, f"{client_name}.json")
+
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path) as file:
+            meta = json.load(file)
+
+    source_hash, stat = _source_hash(data_path, meta)
+    key = hashlib.blake2b(
+        f"{source_hash}:{dataset_name}:{FEATURE_RECIPE_VERSION}".encode(), digest_size=8
+    ).hexdigest()
+    matrix_path = os.path.join(cache_dir, f"{client_name}-{key}.npy")
+
+    if meta and meta.get("key") == key and os.path.exists(matrix_path):
+        matrix = np.load(matrix_path, mmap_mode="r")
+        return pd.DataFrame(matrix, columns=CLIENT_COLUMNS, copy=False), True
+
+    df = engineer_features(read_client_file(data_path), dataset_name)
+    matrix = np.ascontiguousarray(df[CLIENT_COLUMNS].to_numpy(dtype=np.float64))
+
+    # Write to temp files and rename so concurrent runs never see partial entries
+    tmp_path = f"{matrix_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        np.save(file, matrix)
+    os.replace(tmp_path, matrix_path)
+
+    if meta and meta.get("key") != key:
+        stale_path = os.path.join(cache_dir, f"{client_name}-{meta['key']}.npy")
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+
+    meta = {
+        "key": key,
+        "source": os.path.abspath(data_path),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_hash": source_hash,
+        "recipe": FEATURE_RECIPE_VERSION,
+        "columns": CLIENT_COLUMNS,
+        "rows": len(matrix)
+    }
+    with open(f"{meta_path}.{os.getpid()}.tmp", "w") as file:
+        json.dump(meta, file, indent=2)
+    os.replace(f"{meta_path}.{os.getpid()}.tmp", meta_path)
+
+    return pd.DataFrame(matrix, columns=CLIENT_COLUMNS, copy=False), False
@@ -1,60 +1,214 @@
+import argparse
+import multiprocessing
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
 RAW_DIR = "datasets/casas/raw"
 PROCESSED_DIR = "datasets/casas/processed"
 CLIENTS_DIR = "datasets/casas/federated_clients"
 
+COLUMNS = ["Timestamp", "SensorID", "SensorValue"]
+CHUNK_LINES = 1_000_000
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def iter_data_file(file_path, chunksize=CHUNK_LINES):
+    """
+    Streams a CASAS home log in chunks of `chunksize` lines.
+
+    Uses pandas' C parser on whitespace-separated fields and keeps the first
+    three. The trailing activity annotations some lines carry (ragged rows)
+    are ignored. Sensor columns are read as strings so every chunk, and every
+    home, has the same schema.
+    """
+    reader = pd.read_csv(
+        file_path,
+        sep=r'\s+',
+        engine='c',
+        usecols=[0, 1, 2],  # ⬅️ Force only 3 columns
+        header=None,
+        names=COLUMNS,
+        dtype={"SensorID": str, "SensorValue": str},
+        chunksize=chunksize
+    )
+    for chunk in reader:
+        chunk["Timestamp"] = pd.to_datetime(chunk["Timestamp"], errors="coerce")
+        yield chunk
+
+
 def parse_data_file(file_path):
     try:
-        df = pd.read_csv(
-            file_path,
-            sep=r'\s+',
-            engine='python',
-	    usecols=[0, 1, 2],  # ⬅️ Force only 3 columns
-            header=None,
-            names=["Timestamp", "SensorID", "SensorValue"],
-            parse_dates=["Timestamp"]
-        )
-        return df
+        return pd.concat(iter_data_file(file_path), ignore_index=True)
     except Exception as e:
         print(f"❌ Error parsing {file_path}: {e}")
         return pd.DataFrame()
 
-def process_all_homes():
-    clients = {}
+
+class _ChunkWriter:
+    """
+    Appends DataFrame chunks to one CSV or Parquet file (one row group per
+    chunk), so a home is never held in memory as a whole.
+    """
+
+    def __init__(self, path, fmt):
+        self.path = path
+        self.fmt = fmt
+        self.writer = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.fmt == "csv":
+            df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def process_home(home_name, data_file, out_dir, fmt="parquet", chunksize=CHUNK_LINES):
+    """
+    Parses one home's log chunk by chunk into <out_dir>/<home_name>.<fmt>.
+
+    Returns:
+        dict: home, output path (None if no rows), rows, seconds.
+    """
+    start = time.perf_counter()
+    path = os.path.join(out_dir, f"{home_name}.{fmt}")
+    writer = _ChunkWriter(path, fmt)
+    try:
+        for chunk in iter_data_file(data_file, chunksize):
+            chunk["Client"] = home_name
+            writer.write(chunk)
+    except Exception as e:
+        print(f"❌ Error parsing {data_file}: {e}")
+        writer.rows = 0
+    finally:
+        writer.close()
+
+    if writer.rows == 0 and os.path.exists(path):
+        os.remove(path)
+    return {"home": home_name, "path": path if writer.rows else None, "rows": writer.rows,
+            "seconds": time.perf_counter() - start}
+
+
+def process_all_homes(fmt="parquet", workers=None, chunksize=CHUNK_LINES):
+    """
+    Parses every home under RAW_DIR in a process pool.
+
+    Returns:
+        list of dict: process_home() results for homes with data, in the
+        order clients are numbered.
+    """
+    homes = []
     for home_name in os.listdir(RAW_DIR):
         home_path = os.path.join(RAW_DIR, home_name)
         data_file = os.path.join(home_path, "data")
         if os.path.isdir(home_path) and os.path.exists(data_file):
-            print(f"📦 Processing: {home_name}")
-            df = parse_data_file(data_file)
-            if not df.empty:
-                df["Client"] = home_name
-                clients[home_name] = df
-    return clients
-
-def save_processed_data(clients):
-    os.makedirs(PROCESSED_DIR, exist_ok=True)
-    all_data = pd.concat(clients.values(), ignore_index=True)
-    all_data.to_csv(os.path.join(PROCESSED_DIR, "combined_data.csv"), index=False)
-    print("✅ Combined processed data saved.")
+            homes.append((home_name, data_file))
+
+    out_dir = os.path.join(PROCESSED_DIR, "homes")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, max(1, len(homes)))
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        futures = [pool.submit(process_home, name, data_file, out_dir, fmt, chunksize) for name, data_file in homes]
+        for (home_name, _), future in zip(homes, futures):
+            result = future.result()
+            print(f"📦 {home_name}: {result['rows']:,} lines in {result['seconds']:.2f}s "
+                  f"({result['rows'] / max(result['seconds'], 1e-9):,.0f} lines/s)")
+            if result["rows"]:
+                results.append(result)
+    return results
 
+
+def _append_file(combined, path, fmt):
+    if fmt == "csv":
+        with open(path, "rb") as source:
+            if combined.tell() > 0:
+                source.readline()  # header already written
+            shutil.copyfileobj(source, combined)
+    else:
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            combined.write_batch(batch)
+
+
+def save_processed_data(homes, fmt="parquet"):
+    """
+    Moves each home's file into CLIENTS_DIR/client_<i>/data.<fmt> and streams
+    them one after another into PROCESSED_DIR/combined_data.<fmt>, without
+    loading the combined data.
+    """
     os.makedirs(CLIENTS_DIR, exist_ok=True)
-    for i, (name, df) in enumerate(clients.items()):
+    client_files = []
+    for i, home in enumerate(homes):
         client_path = os.path.join(CLIENTS_DIR, f"client_{i}")
         os.makedirs(client_path, exist_ok=True)
-        df.to_csv(os.path.join(client_path, "data.csv"), index=False)
-    print(f"✅ {len(clients)} client datasets saved.")
+        target = os.path.join(client_path, f"data.{fmt}")
+        os.replace(home["path"], target)
+        # A leftover file in the other format would shadow or confuse this one
+        for other in ("csv", "parquet"):
+            stale = os.path.join(client_path, f"data.{other}")
+            if other != fmt and os.path.exists(stale):
+                os.remove(stale)
+        client_files.append(target)
+    print(f"✅ {len(client_files)} client datasets saved.")
+
+    combined_path = os.path.join(PROCESSED_DIR, f"combined_data.{fmt}")
+    if fmt == "csv":
+        with open(combined_path, "wb") as combined:
+            for path in client_files:
+                _append_file(combined, path, fmt)
+    else:
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(client_files[0])
+        with pq.ParquetWriter(combined_path, schema) as combined:
+            for path in client_files:
+                _append_file(combined, path, fmt)
+    print("✅ Combined processed data saved.")
+
 
-def main():
-    print("🔍 Reading CASAS homes...")
-    clients = process_all_homes()
-    if not clients:
+def main(fmt=None, workers=None, chunksize=CHUNK_LINES):
+    fmt = fmt or ("parquet" if _has_pyarrow() else "csv")
+    print(f"🔍 Reading CASAS homes ({fmt} output)...")
+    start = time.perf_counter()
+    homes = process_all_homes(fmt, workers, chunksize)
+    if not homes:
         print("⚠ No valid data found.")
         return
-    save_processed_data(clients)
-    print("🏁 Preprocessing complete.")
+    save_processed_data(homes, fmt)
+
+    lines = sum(home["rows"] for home in homes)
+    elapsed = time.perf_counter() - start
+    print(f"🏁 Preprocessing complete: {lines:,} lines in {elapsed:.2f}s ({lines / elapsed:,.0f} lines/s).")
+
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Preprocess CASAS home logs into federated clients.")
+    parser.add_argument('--format', type=str, choices=['parquet', 'csv'], default=None,
+                        help="Output format (default: parquet if pyarrow is installed)")
+    parser.add_argument('--workers', type=int, default=None, help="Homes parsed in parallel (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_LINES, help="Lines per parsed chunk")
+    args = parser.parse_args()
+    main(args.format, args.workers, args.chunksize)
@@ -1,27 +1,45 @@
+import argparse
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 
+from modules.data_preprocessing.client_loader import SHARED_INDEX
+
 RAW_DIR = "datasets/env_sensors/raw"
 PROCESSED_DIR = "datasets/env_sensors/processed"
 CLIENTS_DIR = "datasets/env_sensors/federated_clients"
 N_CLIENTS = 5  # adjustable
+SHARED_DATA = "clients.npy"
+PARTITION_SCHEMES = ["iid", "quantity", "dirichlet"]
+
+
+def _read_sequence(path):
+    df = pd.read_csv(path, comment='#', header=None)
+    df["sequence_id"] = int(os.path.basename(path).split("_")[-1].replace(".csv", ""))
+    return df
 
 
-def load_rss_sequences():
+def load_rss_sequences(workers=8):
     print("📥 Loading RSS sequences...")
-    all_files = [f for f in os.listdir(RAW_DIR) if f.startswith("MovementAAL_RSS") and f.endswith(".csv")]
-    all_data = []
+    all_files = sorted(
+        (f for f in os.listdir(RAW_DIR) if f.startswith("MovementAAL_RSS") and f.endswith(".csv")),
+        key=lambda f: int(f.split("_")[-1].replace(".csv", ""))
+    )
 
-    for f in all_files:
-        path = os.path.join(RAW_DIR, f)
+    def read(f):
         try:
-            df = pd.read_csv(path, comment='#', header=None)
-            df["sequence_id"] = int(f.split("_")[-1].replace(".csv", ""))
-            all_data.append(df)
+            return _read_sequence(os.path.join(RAW_DIR, f))
         except Exception as e:
             print(f"❌ Failed to read {f}: {e}")
+            return None
+
+    # Sequence files are small and many; the C parser releases the GIL while tokenizing
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        all_data = [df for df in pool.map(read, all_files) if df is not None]
 
     full_df = pd.concat(all_data, ignore_index=True)
     return full_df
@@ -41,17 +59,115 @@ def normalize_data(df, feature_cols):
     df[feature_cols] = scaler.fit_transform(df[feature_cols])
     return df
 
-def split_into_clients(df, n_clients):
+
+def _assign_by_share(shares, n):
+    """
+    Client of each of n consecutive units when client c receives a
+    shares[c] fraction of them.
+    """
+    bounds = np.cumsum(shares) * n
+    return np.minimum(np.searchsorted(bounds, np.arange(n) + 0.5, side="right"), len(shares) - 1)
+
+
+def partition_clients(labels, n_clients, scheme="iid", alpha=0.5, groups=None, seed=None):
+    """
+    Vectorized non-IID partition of rows into clients.
+
+    Args:
+        labels (array-like): Label of every row.
+        n_clients (int): Number of clients.
+        scheme (str): 'iid' (equal sizes), 'quantity' (client sizes drawn from
+            Dirichlet(alpha)) or 'dirichlet' (label skew: each label's units are
+            spread over clients with Dirichlet(alpha) proportions).
+        alpha (float): Dirichlet concentration; smaller is more heterogeneous.
+        groups (array-like): Optional group id per row (e.g. sequence_id). Rows
+            of one group always go to the same client and stay in order.
+        seed (int): Random seed.
+
+    Returns:
+        tuple: (order, offsets) — order is a row permutation that lists clients
+        back to back, client i owning order[offsets[i]:offsets[i + 1]].
+    """
+    if scheme not in PARTITION_SCHEMES:
+        raise ValueError(f"Unknown partition scheme '{scheme}'. Choose from {PARTITION_SCHEMES}.")
+    rng = np.random.default_rng(seed)
+    labels = np.asarray(labels)
+    n_rows = len(labels)
+
+    # Units are what gets assigned: rows, or whole groups
+    if groups is None:
+        unit_of_row = np.arange(n_rows)
+        unit_labels = labels
+    else:
+        _, first, unit_of_row = np.unique(np.asarray(groups), return_index=True, return_inverse=True)
+        unit_labels = labels[first]
+    n_units = len(unit_labels)
+
+    client_of_unit = np.empty(n_units, dtype=np.int64)
+    if scheme == "iid":
+        client_of_unit[rng.permutation(n_units)] = np.arange(n_units) * n_clients // max(n_units, 1)
+    elif scheme == "quantity":
+        shares = rng.dirichlet(np.full(n_clients, alpha))
+        client_of_unit[rng.permutation(n_units)] = _assign_by_share(shares, n_units)
+    else:
+        _, unit_class = np.unique(unit_labels, return_inverse=True)
+        shares = rng.dirichlet(np.full(n_clients, alpha), size=unit_class.max() + 1)
+        for c in range(len(shares)):
+            members = rng.permutation(np.flatnonzero(unit_class == c))
+            client_of_unit[members] = _assign_by_share(shares[c], len(members))
+
+    # Clients back to back, units shuffled within a client, rows of a unit in order
+    client_of_row = client_of_unit[unit_of_row]
+    unit_rank = rng.permutation(n_units)[unit_of_row]
+    order = np.lexsort((np.arange(n_rows), unit_rank, client_of_row))
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(client_of_row, minlength=n_clients))])
+    return order, offsets
+
+
+def save_shared_clients(df, order, offsets, partition):
+    """
+    Writes every client into one column-major CLIENTS_DIR/clients.npy plus
+    an index.json of row offsets, read back by client_loader.SharedClientStore.
+    """
+    os.makedirs(CLIENTS_DIR, exist_ok=True)
+    data_path = os.path.join(CLIENTS_DIR, SHARED_DATA)
+    tmp_path = f"{data_path}.{os.getpid()}.tmp.npy"
+    data = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float64, shape=(df.shape[1], len(order)))
+    for j, column in enumerate(df.columns):
+        data[j] = df[column].to_numpy(dtype=np.float64)[order]
+    data.flush()
+    del data
+    os.replace(tmp_path, data_path)
+
+    index = {
+        "data": SHARED_DATA,
+        "columns": [str(column) for column in df.columns],
+        "offsets": offsets.tolist(),
+        "partition": partition
+    }
+    index_path = os.path.join(CLIENTS_DIR, SHARED_INDEX)
+    with open(f"{index_path}.{os.getpid()}.tmp", "w") as file:
+        json.dump(index, file)
+    os.replace(f"{index_path}.{os.getpid()}.tmp", index_path)
+
+def split_into_clients(df, order, offsets):
+    """
+    Legacy layout: one CLIENTS_DIR/client_<i>/data.csv per client.
+    """
     os.makedirs(CLIENTS_DIR, exist_ok=True)
-    splits = np.array_split(df.sample(frac=1), n_clients)
-    for i, client_df in enumerate(splits):
+    # A shared index would take precedence over the per-client folders
+    for stale in (SHARED_INDEX, SHARED_DATA):
+        if os.path.exists(os.path.join(CLIENTS_DIR, stale)):
+            os.remove(os.path.join(CLIENTS_DIR, stale))
+    for i in range(len(offsets) - 1):
         client_dir = os.path.join(CLIENTS_DIR, f"client_{i}")
         os.makedirs(client_dir, exist_ok=True)
-        client_df.to_csv(os.path.join(client_dir, "data.csv"), index=False)
+        df.iloc[order[offsets[i]:offsets[i + 1]]].to_csv(os.path.join(client_dir, "data.csv"), index=False)
 
-def main():
+def main(n_clients=N_CLIENTS, scheme="iid", alpha=0.5, group_sequences=False, layout="shared", workers=8,
+         seed=None):
     print("🔄 Merging RSS data...")
-    rss_df = load_rss_sequences()  # shape: (samples × time × RSS channels)
+    rss_df = load_rss_sequences(workers)  # shape: (samples × time × RSS channels)
     labels_df = load_labels()      # shape: (sequence_id, label)
 
     # Drop rows with any NaNs
@@ -74,8 +190,31 @@ def main():
     print("✅ Normalized data saved.")
 
     # Split into federated clients
-    split_into_clients(merged, N_CLIENTS)
-    print(f"✅ Data split into {N_CLIENTS} federated clients.")
+    groups = merged["sequence_id"].to_numpy() if group_sequences else None
+    order, offsets = partition_clients(merged["label"].to_numpy(), n_clients, scheme, alpha, groups, seed)
+    sizes = np.diff(offsets)
+    print(f"🧩 {scheme} partition: client rows min {sizes.min()}, median {int(np.median(sizes))}, "
+          f"max {sizes.max()} ({np.count_nonzero(sizes == 0)} empty)")
+
+    if layout == "shared":
+        partition = {"scheme": scheme, "alpha": alpha, "group_sequences": group_sequences, "seed": seed}
+        # Takes precedence over client_<i>/ folders left by an older run
+        save_shared_clients(merged, order, offsets, partition)
+    else:
+        split_into_clients(merged, order, offsets)
+    print(f"✅ Data split into {n_clients} federated clients ({layout} layout).")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Preprocess env-sensor RSS sequences into federated clients.")
+    parser.add_argument('--clients', type=int, default=N_CLIENTS, help="Number of federated clients")
+    parser.add_argument('--partition', type=str, choices=PARTITION_SCHEMES, default="iid",
+                        help="iid, quantity skew or Dirichlet label skew")
+    parser.add_argument('--alpha', type=float, default=0.5, help="Dirichlet concentration (smaller = more skew)")
+    parser.add_argument('--group-sequences', action='store_true',
+                        help="Keep every RSS sequence whole on a single client")
+    parser.add_argument('--layout', type=str, choices=['shared', 'csv'], default='shared',
+                        help="One shared file + offsets index, or one data.csv per client")
+    parser.add_argument('--workers', type=int, default=8, help="Threads loading sequence files")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+    main(args.clients, args.partition, args.alpha, args.group_sequences, args.layout, args.workers, args.seed)
@@ -1,27 +1,200 @@
+import argparse
+import json
 import os
-import pandas as pd
-from glob import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
+import pandas as pd
 
 RAW_DIR = "datasets/visdrone/raw"
 PROCESSED_DIR = "datasets/visdrone/processed"
 CLIENTS_DIR = "datasets/visdrone/federated_clients"
+INDEX_DIR = os.path.join(PROCESSED_DIR, "annotation_index")
 N_CLIENTS = 5
 
-def parse_annotations(ann_path):
-    files = sorted(glob(os.path.join(ann_path, "*.txt")))
-    data = []
+# VisDrone-DET annotation line: bbox_left,bbox_top,bbox_width,bbox_height,score,object_category,truncation,occlusion
+ANNOTATION_FIELDS = 8
+VISDRONE_CLASSES = ("ignored", "pedestrian", "people", "bicycle", "car", "van", "truck", "tricycle",
+                    "awning-tricycle", "bus", "motor", "others")
+# Bbox area histogram edges in pixels^2 (last bin is open-ended)
+AREA_BINS = np.array([0, 64, 256, 1024, 4096, 16384, 65536], dtype=np.int64)
+N_TRUNCATION = 2
+N_OCCLUSION = 3
+
+
+def _tokens_per_line(text):
+    """
+    Number of comma/whitespace separated fields on each non-empty line,
+    counted with byte-level array operations.
+    """
+    data = np.frombuffer(text.encode(), dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    separator = np.isin(data, np.frombuffer(b", \t\r\n", dtype=np.uint8))
+    starts = ~separator & np.concatenate([[True], separator[:-1]])
+    line_of = np.cumsum(data == ord("\n"))
+    counts = np.bincount(line_of[starts], minlength=line_of[-1] + 1)
+    return counts[counts > 0]
+
+
+def parse_annotation_file(path):
+    """
+    Parses one annotation .txt in a single pass.
+
+    Returns:
+        dict: object_count plus per-image class counts, bbox area histogram,
+        truncation and occlusion counts.
+    """
+    with open(path, "r") as file:
+        text = file.read()
+    if (_tokens_per_line(text) == ANNOTATION_FIELDS).all():
+        values = np.array(text.replace(",", " ").split(), dtype=np.int64)
+    else:
+        # Irregular rows: keep the first 8 fields of longer lines, refuse short ones
+        rows = [line.replace(",", " ").split() for line in text.splitlines() if line.strip()]
+        for i, row in enumerate(rows):
+            if len(row) < ANNOTATION_FIELDS:
+                raise ValueError(f"annotation {i} has {len(row)} fields, expected {ANNOTATION_FIELDS}")
+        values = np.array([row[:ANNOTATION_FIELDS] for row in rows], dtype=np.int64).reshape(-1)
+    ann = values.reshape(-1, ANNOTATION_FIELDS)
+
+    area = ann[:, 2] * ann[:, 3]
+    return {
+        "object_count": len(ann),
+        "class_counts": np.bincount(np.clip(ann[:, 5], 0, len(VISDRONE_CLASSES) - 1),
+                                    minlength=len(VISDRONE_CLASSES)),
+        "area_hist": np.bincount(np.searchsorted(AREA_BINS, area, side="right") - 1, minlength=len(AREA_BINS)),
+        "truncation": np.bincount(np.clip(ann[:, 6], 0, N_TRUNCATION - 1), minlength=N_TRUNCATION),
+        "occlusion": np.bincount(np.clip(ann[:, 7], 0, N_OCCLUSION - 1), minlength=N_OCCLUSION)
+    }
+
+
+class AnnotationIndex:
+    """
+    Columnar index of a VisDrone annotation folder.
+
+    Layout: <index_dir>/index.npz holds one row per image (image_id,
+    object_count, class_counts (N, 12), area_hist (N, 7), truncation (N, 2),
+    occlusion (N, 3)) and <index_dir>/manifest.json maps each annotation file
+    to [mtime_ns, size]. update() only parses files that are new or whose
+    mtime/size changed, and drops rows of deleted files.
+    """
+
+    ARRAYS = {
+        "object_count": (),
+        "class_counts": (len(VISDRONE_CLASSES),),
+        "area_hist": (len(AREA_BINS),),
+        "truncation": (N_TRUNCATION,),
+        "occlusion": (N_OCCLUSION,)
+    }
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.index_path = os.path.join(index_dir, "index.npz")
+        self.manifest_path = os.path.join(index_dir, "manifest.json")
+
+        self.image_ids = np.array([], dtype=str)
+        self.arrays = {name: np.zeros((0, *shape), dtype=np.int32) for name, shape in self.ARRAYS.items()}
+        self.manifest = {}
+        if os.path.exists(self.index_path) and os.path.exists(self.manifest_path):
+            with np.load(self.index_path) as index:
+                self.image_ids = index["image_id"]
+                self.arrays = {name: index[name] for name in self.ARRAYS}
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
 
-    for f in files:
-        img_id = os.path.basename(f).replace(".txt", "")
+    def update(self, ann_path, workers=8):
+        """
+        Brings the index in line with the .txt files in ann_path.
+
+        Returns:
+            dict: Counts of parsed, reused and removed files.
+        """
+        names = sorted(f for f in os.listdir(ann_path) if f.endswith(".txt"))
+        stats = {}
+        for name in names:
+            st = os.stat(os.path.join(ann_path, name))
+            stats[name] = [st.st_mtime_ns, st.st_size]
+
+        changed = [name for name in names if self.manifest.get(name) != stats[name]]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(self._parse, [os.path.join(ann_path, name) for name in changed]))
+
+        # Keep indexed rows whose file is unchanged, then add the new parses
+        row_of = {image_id: row for row, image_id in enumerate(self.image_ids.tolist())}
+        keep = [row_of[name[:-4]] for name in names
+                if self.manifest.get(name) == stats[name] and name[:-4] in row_of]
+        ok = [(name, result) for name, result in zip(changed, parsed) if result is not None]
+
+        image_ids = np.concatenate([self.image_ids[keep], np.array([name[:-4] for name, _ in ok], dtype=str)])
+        arrays = {}
+        for key, shape in self.ARRAYS.items():
+            fresh = np.array([result[key] for _, result in ok], dtype=np.int32).reshape(-1, *shape)
+            arrays[key] = np.concatenate([self.arrays[key][keep], fresh])
+
+        order = np.argsort(image_ids, kind="stable")
+        self.image_ids = image_ids[order]
+        self.arrays = {key: values[order] for key, values in arrays.items()}
+        # Files that failed to parse stay out of the manifest and are retried next run
+        parsed_names = {name for name, _ in ok}
+        self.manifest = {name: stats[name] for name in names if name not in changed or name in parsed_names}
+        removed = len(set(row_of) - {name[:-4] for name in names})
+        return {"parsed": len(ok), "reused": len(keep), "removed": removed}
+
+    @staticmethod
+    def _parse(path):
         try:
-            with open(f, "r") as file:
-                lines = file.readlines()
-                obj_count = len(lines)
-                data.append({"image_id": img_id, "object_count": obj_count})
+            return parse_annotation_file(path)
         except Exception as e:
-            print(f"Error reading {f}: {e}")
-    return pd.DataFrame(data)
+            print(f"Error reading {path}: {e}")
+            return None
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        tmp_index = f"{self.index_path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_index, image_id=self.image_ids, **self.arrays)
+        os.replace(tmp_index, self.index_path)
+
+        tmp_manifest = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_manifest, "w") as file:
+            json.dump(self.manifest, file)
+        os.replace(tmp_manifest, self.manifest_path)
+
+    def to_frame(self, per_class=False):
+        """
+        Per-image table: image_id and object_count, plus one count column per
+        class when per_class is True.
+        """
+        df = pd.DataFrame({"image_id": self.image_ids, "object_count": self.arrays["object_count"]})
+        if per_class:
+            for i, name in enumerate(VISDRONE_CLASSES):
+                df[f"count_{name}"] = self.arrays["class_counts"][:, i]
+        return df
+
+    def class_totals(self):
+        return dict(zip(VISDRONE_CLASSES, self.arrays["class_counts"].sum(axis=0).tolist()))
+
+    def area_histogram(self):
+        """
+        Dataset-wide bbox area histogram as {lower bin edge: count}.
+        """
+        return dict(zip(AREA_BINS.tolist(), self.arrays["area_hist"].sum(axis=0).tolist()))
+
+
+def parse_annotations(ann_path, index_dir=INDEX_DIR, workers=8):
+    """
+    Per-image object counts for every annotation file in ann_path, served
+    from the incremental AnnotationIndex.
+    """
+    start = time.perf_counter()
+    index = AnnotationIndex(index_dir)
+    report = index.update(ann_path, workers)
+    index.save()
+    print(f"🗂️ Annotation index: {report['parsed']} parsed, {report['reused']} reused, "
+          f"{report['removed']} removed in {time.perf_counter() - start:.2f}s")
+    return index.to_frame()
+
 
 def split_and_save(df):
     os.makedirs(PROCESSED_DIR, exist_ok=True)
@@ -36,14 +209,14 @@ def split_and_save(df):
         os.makedirs(client_path, exist_ok=True)
         client_df.to_csv(os.path.join(client_path, "data.csv"), index=False)
 
-def main():
+def main(workers=8):
     print("📥 Parsing VisDrone annotations...")
     ann_path = os.path.join(RAW_DIR, "annotations")
     if not os.path.exists(ann_path):
         print("❌ Annotation folder not found.")
         return
 
-    df = parse_annotations(ann_path)
+    df = parse_annotations(ann_path, workers=workers)
     if df.empty:
         print("⚠ No annotation data parsed.")
         return
@@ -52,4 +225,7 @@ def main():
     print("✅ VisDrone preprocessing complete.")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Index VisDrone annotations and split them into clients.")
+    parser.add_argument('--workers', type=int, default=8, help="Threads parsing annotation files")
+    args = parser.parse_args()
+    main(args.workers)
@@ -2,8 +2,6 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 import numpy as np
-import os
-import csv
 
 class Actor(nn.Module):
     def __init__(self, state_dim, action_dim):
@@ -33,73 +31,135 @@ class Critic(nn.Module):
         return self.out(x)
 
 
-def log_loss(round_id, client_id, step, loss):
-    path = os.path.join("logs", "loss_log.csv")
-    if not os.path.exists(path):
-        with open(path, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["round", "client", "step", "loss"])
-    with open(path, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([round_id, client_id, step, loss])
+def _compile(module, compile_mode):
+    """
+    Returns a compiled forward for module. Compiled wrappers share the
+    module's parameters, so load_state_dict() on the module stays in effect.
+    """
+    if compile_mode is None:
+        return module
+    if compile_mode == "script":
+        return torch.jit.script(module)
+    if compile_mode == "compile":
+        return torch.compile(module)
+    raise ValueError(f"Unknown compile_mode: {compile_mode}")
 
 
 class DDPGAgent:
-    def __init__(self, state_dim, action_dim, gamma=0.99, tau=0.005, actor_lr=1e-4, critic_lr=1e-3):
+    def __init__(self, state_dim, action_dim, gamma=0.99, tau=0.005, actor_lr=1e-4, critic_lr=1e-3,
+                 compile_mode=None):
+        """
+        Args:
+            compile_mode (str): Optional 'script' (TorchScript) or 'compile'
+                (torch.compile) for the actor/critic forwards. None runs eager.
+                For these 128-wide MLPs on CPU, benchmarks.bench_ddpg_update
+                measures 'compile' 15-20% slower than eager at batch 64 (its
+                guard and launch overhead outweighs the fused kernels), and
+                'script' within run-to-run noise of eager (0-10% faster), so
+                eager remains the default.
+        """
         self.actor = Actor(state_dim, action_dim)
         self.actor_target = Actor(state_dim, action_dim)
         self.critic = Critic(state_dim, action_dim)
         self.critic_target = Critic(state_dim, action_dim)
 
-        self.actor_optimizer = torch.optim.Adam(self.actor.parameters(), lr=actor_lr)
-        self.critic_optimizer = torch.optim.Adam(self.critic.parameters(), lr=critic_lr)
+        self.actor_optimizer = torch.optim.Adam(self.actor.parameters(), lr=actor_lr, foreach=True)
+        self.critic_optimizer = torch.optim.Adam(self.critic.parameters(), lr=critic_lr, foreach=True)
 
         self.gamma = gamma
         self.tau = tau
 
+        # Reused sample() output block, see ReplayBuffer.empty_batch()
+        self._batch_out = None
+
         self.actor_target.load_state_dict(self.actor.state_dict())
         self.critic_target.load_state_dict(self.critic.state_dict())
 
-    def select_action(self, state):
-        state = torch.FloatTensor(state.reshape(1, -1))
-        action = self.actor(state).detach().cpu().numpy().flatten()
-        return action
-
-    def train(self, replay_buffer, batch_size=64, round_id=None, client_id=None, global_step=None):
-        state, action, next_state, reward, done = replay_buffer.sample(batch_size)
+        # Parameter lists for the multi-tensor (foreach) soft update
+        self._actor_params = list(self.actor.parameters())
+        self._critic_params = list(self.critic.parameters())
+        self._actor_target_params = list(self.actor_target.parameters())
+        self._critic_target_params = list(self.critic_target.parameters())
 
-        state = torch.FloatTensor(state)
-        action = torch.FloatTensor(action)
-        next_state = torch.FloatTensor(next_state)
-        reward = torch.FloatTensor(reward).unsqueeze(1)
-        done = torch.FloatTensor(done).unsqueeze(1)
+        self.compile_mode = compile_mode
+        self._actor_fwd = _compile(self.actor, compile_mode)
+        self._critic_fwd = _compile(self.critic, compile_mode)
+        self._actor_target_fwd = _compile(self.actor_target, compile_mode)
+        self._critic_target_fwd = _compile(self.critic_target, compile_mode)
 
+    def select_action(self, state):
+        state = torch.as_tensor(state, dtype=torch.float32).reshape(1, -1)
         with torch.no_grad():
-            target_Q = self.critic_target(next_state, self.actor_target(next_state))
-            target_Q = reward + (1 - done) * self.gamma * target_Q
-
-        current_Q = self.critic(state, action)
-        critic_loss = F.mse_loss(current_Q, target_Q)
-
-        self.critic_optimizer.zero_grad()
-        critic_loss.backward()
-        self.critic_optimizer.step()
-
-        actor_loss = -self.critic(state, self.actor(state)).mean()
-
-        self.actor_optimizer.zero_grad()
-        actor_loss.backward()
-        self.actor_optimizer.step()
-
-        for param, target_param in zip(self.critic.parameters(), self.critic_target.parameters()):
-            target_param.data.copy_(self.tau * param.data + (1 - self.tau) * target_param.data)
-
-        for param, target_param in zip(self.actor.parameters(), self.actor_target.parameters()):
-            target_param.data.copy_(self.tau * param.data + (1 - self.tau) * target_param.data)
-
-        # Log critic loss if info is provided
-        if round_id is not None and client_id is not None and global_step is not None:
-            log_loss(round_id, client_id, global_step, critic_loss.item())
+            action = self._actor_fwd(state)
+        return action.numpy().flatten()
+
+    @torch.no_grad()
+    def soft_update(self):
+        """
+        Polyak-averages both target networks in two fused multi-tensor ops:
+        target <- target + tau * (online - target).
+        """
+        torch._foreach_lerp_(self._critic_target_params, self._critic_params, self.tau)
+        torch._foreach_lerp_(self._actor_target_params, self._actor_params, self.tau)
+
+    def train(self, replay_buffer, batch_size=64, updates=1):
+        """
+        Runs critic/actor updates from sampled batches. With a prioritized
+        buffer the critic loss is importance-sampling weighted and the batch's
+        TD errors are written back as priorities.
+
+        Args:
+            replay_buffer (ReplayBuffer): Buffer to sample from.
+            batch_size (int): Transitions per update.
+            updates (int): Gradient updates to run in this call (e.g. several
+                per environment step).
+
+        Returns:
+            float: Mean critic loss over the updates.
+        """
+        if self._batch_out is None or self._batch_out.shape[0] != batch_size:
+            self._batch_out = replay_buffer.empty_batch(batch_size)
+        prioritized = getattr(replay_buffer, "prioritized", False)
+
+        total_loss = torch.zeros(())
+        for _ in range(updates):
+            if prioritized:
+                state, action, next_state, reward, done, weights, indices = replay_buffer.sample(
+                    batch_size, out=self._batch_out)
+            else:
+                state, action, next_state, reward, done = replay_buffer.sample(batch_size, out=self._batch_out)
+
+            reward = reward.unsqueeze(1)
+            done = done.unsqueeze(1)
+
+            with torch.no_grad():
+                target_Q = self._critic_target_fwd(next_state, self._actor_target_fwd(next_state))
+                target_Q = reward + (1 - done) * self.gamma * target_Q
+
+            current_Q = self._critic_fwd(state, action)
+            if prioritized:
+                # Importance-sampling weighted loss; TD errors become the new priorities
+                td_error = target_Q - current_Q
+                critic_loss = (weights.unsqueeze(1) * td_error.pow(2)).mean()
+                replay_buffer.update_priorities(indices, td_error.detach().squeeze(1).numpy())
+            else:
+                critic_loss = F.mse_loss(current_Q, target_Q)
+
+            self.critic_optimizer.zero_grad()
+            critic_loss.backward()
+            self.critic_optimizer.step()
+
+            actor_loss = -self._critic_fwd(state, self._actor_fwd(state)).mean()
+
+            # Only accumulate actor gradients; the critic's weight grads are never used here
+            self.actor_optimizer.zero_grad()
+            actor_loss.backward(inputs=self._actor_params)
+            self.actor_optimizer.step()
+
+            self.soft_update()
+            total_loss += critic_loss.detach()
+
+        return total_loss.item() / updates
 
     def save(self, filename):
         torch.save(self.actor.state_dict(), filename + "_actor.pth")
@@ -0,0 +1,175 @@
+import numpy as np
+import torch
+
+from modules.ddpg.replay_buffer import ReplayBuffer
+
+
+class SegmentTree:
+    """
+    Array-backed binary segment tree over a power-of-two number of leaves.
+
+    Node 1 is the root and leaf i lives at tree[capacity + i]. update() takes
+    a whole batch of leaves and recomputes only their ancestors, level by
+    level, so a batch of B updates costs O(B log n) NumPy work; update_one()
+    walks a single leaf's ancestors with scalar arithmetic instead, which is
+    far cheaper than the batched path for B = 1.
+    """
+
+    def __init__(self, capacity, operation, neutral):
+        self.capacity = 1 << max(capacity - 1, 0).bit_length()
+        self.operation = operation
+        self.tree = np.full(2 * self.capacity, neutral, dtype=np.float64)
+
+    def update(self, indices, values):
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if len(indices) == 1:
+            self.update_one(int(indices[0]), float(np.asarray(values).reshape(-1)[0]))
+            return
+        nodes = indices + self.capacity
+        self.tree[nodes] = values
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.operation(self.tree[2 * nodes], self.tree[2 * nodes + 1])
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def update_one(self, index, value):
+        tree, operation = self.tree, self.operation
+        node = index + self.capacity
+        tree[node] = value
+        node //= 2
+        while node >= 1:
+            tree[node] = operation(tree.item(2 * node), tree.item(2 * node + 1))
+            node //= 2
+
+    def __getitem__(self, indices):
+        return self.tree[np.asarray(indices) + self.capacity]
+
+
+class SumSegmentTree(SegmentTree):
+    def __init__(self, capacity):
+        super().__init__(capacity, np.add, 0.0)
+
+    def total(self):
+        return self.tree[1]
+
+    def find_prefixsum_idx(self, prefixsums):
+        """
+        Batched descent: for each prefix sum, returns the leaf i such that
+        sum(leaves[:i]) <= prefix < sum(leaves[:i + 1]).
+        """
+        prefix = np.array(prefixsums, dtype=np.float64)
+        nodes = np.ones(len(prefix), dtype=np.int64)
+        while nodes[0] < self.capacity:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = prefix >= left_sum
+            prefix -= left_sum * go_right
+            nodes = left + go_right
+        return nodes - self.capacity
+
+
+class MinSegmentTree(SegmentTree):
+    def __init__(self, capacity):
+        super().__init__(capacity, np.minimum, np.inf)
+
+    def min(self):
+        return self.tree[1]
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized experience replay (Schaul et al., 2016).
+
+    Transitions are drawn with probability p_i^alpha / sum_k p_k^alpha via
+    stratified sampling over a sum-tree, and sample() additionally returns
+    importance-sampling weights and the sampled indices so the learner can
+    feed TD errors back through update_priorities().
+    """
+
+    prioritized = True
+
+    def __init__(self, max_size, state_dim, action_dim, alpha=0.6, beta=0.4, beta_increment=1e-3, eps=1e-6):
+        super().__init__(max_size, state_dim, action_dim)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.eps = eps
+        self.max_priority = 1.0
+
+        self.sum_tree = SumSegmentTree(max_size)
+        self.min_tree = MinSegmentTree(max_size)
+
+    def add(self, state, action, next_state, reward, done):
+        idx = self.ptr
+        super().add(state, action, next_state, reward, done)
+
+        # New transitions get the highest priority seen so far
+        self._set_priority(idx, self.max_priority ** self.alpha)
+
+    def _set_priority(self, idx, priority):
+        """
+        Single-leaf update of both trees in one walk up the ancestors, with
+        plain float arithmetic (the per-add() hot path).
+        """
+        sum_tree, min_tree = self.sum_tree.tree, self.min_tree.tree
+        sum_item, min_item = sum_tree.item, min_tree.item
+        node = idx + self.sum_tree.capacity
+        total = low = float(priority)
+        while node > 1:
+            sum_tree[node] = total
+            min_tree[node] = low
+            sibling = node ^ 1
+            total += sum_item(sibling)
+            other = min_item(sibling)
+            if other < low:
+                low = other
+            node //= 2
+        sum_tree[1] = total
+        min_tree[1] = low
+
+    def sample_indices(self, batch_size, replace=True):
+        """
+        Stratified proportional sampling: one draw from each of batch_size
+        equal slices of the total priority mass. With replace=False the batch
+        is drawn proportionally without replacement instead (Gumbel top-k over
+        the stored priorities, O(size)).
+        """
+        if not replace:
+            if batch_size > self.size:
+                raise ValueError(f"Cannot sample {batch_size} transitions without replacement from {self.size}.")
+            keys = np.log(self.sum_tree[np.arange(self.size)]) + np.random.gumbel(size=self.size)
+            return np.argpartition(-keys, batch_size - 1)[:batch_size]
+
+        total = self.sum_tree.total()
+        bounds = (np.arange(batch_size) + np.random.rand(batch_size)) * (total / batch_size)
+        ind = self.sum_tree.find_prefixsum_idx(bounds)
+        return np.minimum(ind, self.size - 1)
+
+    def sample(self, batch_size, replace=True, out=None):
+        """
+        Returns:
+            tuple: (state, action, next_state, reward, done, weights, indices);
+            weights is a float32 tensor of importance-sampling weights
+            normalized by their maximum, indices a NumPy array for
+            update_priorities().
+        """
+        ind = self.sample_indices(batch_size, replace=replace)
+        batch = self.gather(torch.from_numpy(ind), out=out)
+
+        total = self.sum_tree.total()
+        probs = self.sum_tree[ind] / total
+        min_prob = self.min_tree.min() / total
+        weights = (probs / min_prob) ** -self.beta
+        self.beta = min(1.0, self.beta + self.beta_increment)
+
+        return batch + (torch.from_numpy(weights.astype(np.float32)), ind)
+
+    def update_priorities(self, indices, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+
+        scaled = priorities ** self.alpha
+        self.sum_tree.update(indices, scaled)
+        self.min_tree.update(indices, scaled)
@@ -1,16 +1,42 @@
-import numpy as np
+import torch
 
 class ReplayBuffer:
+    """
+    FIFO replay buffer stored as one contiguous float32 block.
+
+    Each row packs [state | action | next_state | reward | done]. The block is
+    a torch tensor and self.state, self.action, ... are NumPy views onto it, so
+    add() writes in place and sample() gathers rows with index_select and
+    returns tensor views with no dtype conversion or per-field copies.
+    """
+
     def __init__(self, max_size, state_dim, action_dim):
         self.max_size = max_size
         self.ptr = 0
         self.size = 0
 
-        self.state = np.zeros((max_size, state_dim))
-        self.action = np.zeros((max_size, action_dim))
-        self.next_state = np.zeros((max_size, state_dim))
-        self.reward = np.zeros((max_size,))
-        self.done = np.zeros((max_size,))
+        self.state_dim = state_dim
+        self.action_dim = action_dim
+        self.width = 2 * state_dim + action_dim + 2
+
+        self.storage = torch.zeros((max_size, self.width), dtype=torch.float32)
+        self._bind_views()
+
+    def _bind_views(self):
+        s, a = self.state_dim, self.action_dim
+        self.fields = (slice(0, s), slice(s, s + a), slice(s + a, 2 * s + a), 2 * s + a, 2 * s + a + 1)
+
+        rows = self.storage.numpy()  # shares memory with self.storage
+        self.state, self.action, self.next_state, self.reward, self.done = (rows[:, f] for f in self.fields)
+
+    def share_memory(self):
+        """
+        Moves the storage into shared memory so it can be handed to other
+        processes without copying.
+        """
+        self.storage.share_memory_()
+        self._bind_views()
+        return self
 
     def add(self, state, action, next_state, reward, done):
         self.state[self.ptr] = state
@@ -22,12 +48,45 @@ class ReplayBuffer:
         self.ptr = (self.ptr + 1) % self.max_size
         self.size = min(self.size + 1, self.max_size)
 
-    def sample(self, batch_size):
-        ind = np.random.randint(0, self.size, size=batch_size)
-        return (
-            self.state[ind],
-            self.action[ind],
-            self.next_state[ind],
-            self.reward[ind],
-            self.done[ind]
-        )
+    def empty_batch(self, batch_size):
+        """
+        Allocates an output block to pass as sample(..., out=...).
+        """
+        return torch.empty((batch_size, self.width), dtype=torch.float32)
+
+    def sample_indices(self, batch_size, replace=True):
+        if replace:
+            return torch.randint(0, self.size, (batch_size,))
+        if batch_size > self.size:
+            raise ValueError(f"Cannot sample {batch_size} transitions without replacement from {self.size}.")
+        return torch.randperm(self.size)[:batch_size]
+
+    def gather(self, ind, out=None):
+        """
+        Gathers rows ind into a batch and splits it into field views.
+
+        Returns:
+            tuple of torch.Tensor: (state, action, next_state, reward, done);
+            reward and done have shape (batch_size,).
+        """
+        if out is None:
+            batch = self.storage.index_select(0, ind)
+        else:
+            batch = torch.index_select(self.storage, 0, ind, out=out)
+        return tuple(batch[:, f] for f in self.fields)
+
+    def sample(self, batch_size, replace=True, out=None):
+        """
+        Samples a batch of transitions as float32 tensors.
+
+        Args:
+            batch_size (int): Number of transitions.
+            replace (bool): Sample with replacement (uniform) or without.
+            out (torch.Tensor): Optional pre-allocated (batch_size, width)
+                block from empty_batch(); the returned tensors are views into
+                it and are overwritten by the next sample() using it.
+
+        Returns:
+            tuple of torch.Tensor: (state, action, next_state, reward, done)
+        """
+        return self.gather(self.sample_indices(batch_size, replace), out=out)
@@ -0,0 +1,64 @@
+import numpy as np
+
+from modules.semantic_communication.semantic_fidelity import compute_semantic_fidelity_batch, encode_object_types
+from modules.service_migration.migration_decision import should_migrate_batch
+
+PERSON = encode_object_types(["person"])[0]
+
+
+class ClientEnvironment:
+    """
+    Array-backed environment for one federated client.
+
+    The client's observations (DT predictions, or the raw delay/energy/queue
+    columns when the DT is disabled) are turned into one contiguous (N, 3)
+    array once. Episodes are then drawn as whole blocks of steps: sample
+    indices, states, reward costs and migration flags are all computed with
+    array operations, leaving only the agent's action inside the step loop.
+    Rows with a non-finite observation (e.g. the NaN predictions precompute()
+    caches for rows with missing features) are never sampled.
+    """
+
+    def __init__(self, df, dt=None, use_digital_twin=True):
+        if use_digital_twin:
+            preds = dt.cached_predictions if dt.cached_predictions is not None else dt.precompute(df)
+            columns = [preds['predicted_delay'], preds['predicted_energy'], preds['predicted_queue']]
+        else:
+            columns = [df['delay'], df['energy'], df['queue_length']]
+
+        # Columns: delay, energy, queue
+        self.observations = np.ascontiguousarray(np.column_stack(columns), dtype=np.float64)
+        self.n_rows = len(self.observations)
+        self.valid_rows = np.flatnonzero(np.isfinite(self.observations).all(axis=1))
+
+    def sample_episode(self, n_steps):
+        """
+        Pre-draws n_steps observations (with replacement, like df.sample())
+        from the rows with finite observations.
+
+        Returns:
+            dict:
+                'rows' (n,): sampled row indices (positions in the client data)
+                'states' (n, 5): [delay, energy, queue, semantic_score, urgency]
+                'costs' (n,): reward per unit action, -(2 * delay + energy)
+                'done' (n,): should_migrate flags
+        """
+        if len(self.valid_rows) == 0:
+            raise ValueError("Client has no rows with finite observations to sample from.")
+        rows = self.valid_rows[np.random.randint(len(self.valid_rows), size=n_steps)]
+        delay, energy, queue = self.observations[rows].T
+
+        semantic = compute_semantic_fidelity_batch(
+            feature_norms=np.linalg.norm(np.random.rand(n_steps, 1280), axis=1),
+            predicted_delay=delay,
+            predicted_energy=energy,
+            object_types=PERSON
+        )
+        urgency = np.random.uniform(0.2, 1.0, size=n_steps)
+
+        return {
+            'rows': rows,
+            'states': np.column_stack([delay, energy, queue, semantic, urgency]),
+            'costs': -(delay * 2 + energy),
+            'done': should_migrate_batch(queue, energy)
+        }
@@ -0,0 +1,154 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.neural_network import MLPRegressor
+
+
+class ForestBackend:
+    """
+    The original energy model: a RandomForestRegressor, used as-is. It is also
+    the teacher the surrogate backends are distilled from.
+
+    fit() records heldout_mse, the squared error of the out-of-bag
+    predictions: a held-out error estimate that needs no second fit.
+    """
+
+    name = "forest"
+
+    def __init__(self, n_estimators=50, n_jobs=None, random_state=None):
+        self.model = RandomForestRegressor(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state,
+                                           oob_score=True)
+        self.heldout_mse = None
+
+    def fit(self, X, y):
+        self.model.fit(X, y)
+        self.heldout_mse = float(np.mean((y - self.model.oob_prediction_) ** 2))
+        # Only the summary is kept, so persisted twins do not grow with the data
+        del self.model.oob_prediction_
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+    def set_n_jobs(self, n_jobs):
+        self.model.n_jobs = n_jobs
+
+
+class GridBackend:
+    """
+    Lookup table of the teacher's predictions on a regular grid spanning the
+    training data's bounding box, read back with multilinear interpolation
+    (2^4 corner lookups per row for the four DT inputs). Inputs outside the
+    box are clamped to it.
+    """
+
+    name = "grid"
+
+    def __init__(self, bins=12):
+        self.bins = bins
+        self.lower = None
+        self.upper = None
+        self.values = None
+
+    def distill(self, teacher, X):
+        self.lower = X.min(axis=0)
+        self.upper = X.max(axis=0)
+        axes = [np.linspace(lo, hi, self.bins) for lo, hi in zip(self.lower, self.upper)]
+        nodes = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, X.shape[1])
+        self.values = teacher.predict(nodes).reshape((self.bins,) * X.shape[1])
+        return self
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        span = np.where(self.upper > self.lower, self.upper - self.lower, 1.0)
+        pos = np.clip((X - self.lower) / span, 0.0, 1.0) * (self.bins - 1)
+        base = np.minimum(pos.astype(np.int64), self.bins - 2)
+        frac = pos - base
+
+        out = np.zeros(len(X))
+        dims = X.shape[1]
+        for corner in range(1 << dims):
+            offsets = np.array([(corner >> d) & 1 for d in range(dims)])
+            weight = np.prod(np.where(offsets, frac, 1.0 - frac), axis=1)
+            out += weight * self.values[tuple((base + offsets).T)]
+        return out
+
+    def set_n_jobs(self, n_jobs):
+        pass
+
+
+class MLPBackend:
+    """
+    Small MLP trained on the teacher's predictions (training rows plus
+    uniform samples over their bounding box). sklearn does the fitting;
+    inference is a few NumPy matmuls on the extracted weights, without
+    sklearn's per-call input validation.
+    """
+
+    name = "mlp"
+
+    def __init__(self, hidden=(32, 32), samples=20000, max_iter=300, random_state=0):
+        self.hidden = hidden
+        self.samples = samples
+        self.max_iter = max_iter
+        self.random_state = random_state
+        self.mean = None
+        self.scale = None
+        self.weights = None
+        self.biases = None
+
+    def distill(self, teacher, X):
+        rng = np.random.default_rng(self.random_state)
+        lower, upper = X.min(axis=0), X.max(axis=0)
+        X_fit = np.vstack([X, rng.uniform(lower, upper, size=(self.samples, X.shape[1]))])
+        y_fit = teacher.predict(X_fit)
+
+        self.mean = X_fit.mean(axis=0)
+        self.scale = np.where(X_fit.std(axis=0) > 0, X_fit.std(axis=0), 1.0)
+        mlp = MLPRegressor(hidden_layer_sizes=self.hidden, max_iter=self.max_iter, early_stopping=True,
+                           random_state=self.random_state)
+        mlp.fit((X_fit - self.mean) / self.scale, y_fit)
+
+        self.weights = [w.astype(np.float64) for w in mlp.coefs_]
+        self.biases = [b.astype(np.float64) for b in mlp.intercepts_]
+        return self
+
+    def predict(self, X):
+        h = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        for w, b in zip(self.weights[:-1], self.biases[:-1]):
+            h = np.maximum(h @ w + b, 0.0)  # MLPRegressor's default ReLU
+        return (h @ self.weights[-1] + self.biases[-1]).ravel()
+
+    def set_n_jobs(self, n_jobs):
+        pass
+
+
+ENERGY_BACKENDS = {
+    "forest": ForestBackend,
+    "grid": GridBackend,
+    "mlp": MLPBackend
+}
+
+
+def fit_energy_backend(name, X, y, n_estimators=50, n_jobs=None, random_state=None):
+    """
+    Fits the forest on (X, y) and, for a surrogate backend, distills it into
+    that backend. The forest itself is dropped so it is not persisted.
+
+    The returned backend carries heldout_mse: the forest's out-of-bag error,
+    plus for a surrogate its mean squared deviation from the forest on X.
+
+    Args:
+        name (str): 'forest', 'grid' or 'mlp'.
+
+    Returns:
+        Backend exposing predict(X) and set_n_jobs(n).
+    """
+    if name not in ENERGY_BACKENDS:
+        raise ValueError(f"Unknown energy backend: {name}")
+
+    forest = ForestBackend(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state).fit(X, y)
+    if name == "forest":
+        return forest
+    surrogate = ENERGY_BACKENDS[name]().distill(forest, X)
+    surrogate.heldout_mse = forest.heldout_mse + float(np.mean((surrogate.predict(X) - forest.predict(X)) ** 2))
+    return surrogate
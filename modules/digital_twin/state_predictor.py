@@ -1,45 +1,120 @@
+import hashlib
+import json
+
+import joblib
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
+
+from modules.digital_twin.energy_backends import ForestBackend, fit_energy_backend
+from utils.profiling import timed
+
+FEATURE_COLUMNS = ['rssi', 'cpu_load', 'task_size', 'queue_length']
+TARGET_COLUMNS = ['delay', 'energy']
+
+# Bump whenever train() changes so persisted twins are refitted
+DT_MODEL_VERSION = 4
+
+
+def _feature_matrix(rssi, cpu_load=None, task_size=None, queue_length=None):
+    """
+    Builds an (N, 4) float matrix from a DataFrame or from four column arrays.
+    """
+    if isinstance(rssi, pd.DataFrame):
+        return rssi[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    columns = [np.asarray(c, dtype=np.float64).ravel() for c in (rssi, cpu_load, task_size, queue_length)]
+    return np.column_stack(columns)
+
+
+def _design(X):
+    """
+    Features plus a constant column, for the intercept of the streaming fits.
+    """
+    return np.column_stack([X, np.ones(len(X))])
+
 
 class DigitalTwinPredictor:
-    def __init__(self):
-        self.energy_model = RandomForestRegressor(n_estimators=50)
+    def __init__(self, n_estimators=50, n_jobs=None, random_state=None, energy_backend="forest",
+                 forgetting=0.999, window=5000, drift_threshold=2.0, drift_alpha=0.05, warmup_rows=200):
+        """
+        Args:
+            n_estimators (int): Trees in the energy forest.
+            n_jobs (int): Threads for fitting/predicting the forest (None = 1).
+                Does not change the fitted model.
+            random_state (int): Seed of the forest, for reproducible twins.
+            energy_backend (str): 'forest', or a surrogate distilled from the
+                forest after fitting: 'grid' or 'mlp' (see energy_backends).
+            forgetting (float): Per-row decay of past rows in partial_fit().
+            window (int): Most recent rows kept for refit().
+            drift_threshold (float): Error ratio (vs. the fit's own error, see
+                _init_stream) above which needs_refit turns True.
+            drift_alpha (float): Per-row EWMA weight of the drift errors.
+            warmup_rows (int): Streamed rows after a fit before needs_refit
+                can turn True, so a single noisy batch cannot trigger it.
+        """
+        self.n_estimators = n_estimators
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.energy_backend = energy_backend
+        self.energy_model = ForestBackend(n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state)
         self.delay_model = LinearRegression()
         self.queue_model = LinearRegression()
         self.trained = False
+        self.cached_predictions = None
+        self.energy_correction = None
+
+        self.forgetting = forgetting
+        self.window = window
+        self.drift_threshold = drift_threshold
+        self.drift_alpha = drift_alpha
+        self.warmup_rows = warmup_rows
 
-    def train(self, df):
+    def train(self, df, precompute=False, timer=None):
         """
         Trains the DT predictor from environment logs.
         Assumes df contains columns: ['rssi', 'cpu_load', 'task_size', 'queue_length', 'delay', 'energy']
+
+        If precompute is True, predictions for every row of df are cached right
+        after fitting (see precompute()). An optional PhaseTimer records the
+        fit as 'dt_fit' and the precompute pass as 'dt_predict'.
         """
+        full_df = df
+
         # Drop rows with NaNs
         df = df.dropna()
 
-        # Features and targets
-        X = df[['rssi', 'cpu_load', 'task_size', 'queue_length']]
-        y_delay = df['delay']
-        y_energy = df['energy']
-        y_queue = df['queue_length'].shift(-1).fillna(method='ffill')  # predict next queue length
+        with timed(timer, "dt_fit"):
+            # Features and targets
+            X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+            y_delay = df['delay']
+            y_energy = df['energy']
+            y_queue = df['queue_length'].shift(-1).ffill()  # predict next queue length
 
-        # Train models
-        self.delay_model.fit(X, y_delay)
-        self.energy_model.fit(X, y_energy)
-        self.queue_model.fit(X, y_queue)
+            # Train models
+            self.delay_model.fit(X, y_delay)
+            self.energy_model = fit_energy_backend(self.energy_backend, X, y_energy.to_numpy(), self.n_estimators,
+                                                   self.n_jobs, self.random_state)
+            self.queue_model.fit(X, y_queue)
+            self._init_stream(X, df[FEATURE_COLUMNS + TARGET_COLUMNS].to_numpy(dtype=np.float64),
+                              y_delay.to_numpy(), y_queue.to_numpy(), self.energy_model.heldout_mse)
 
         self.trained = True
+        self.cached_predictions = None
         print("✅ Digital Twin models trained.")
 
-    def predict(self, rssi, cpu_load, task_size, queue_length):
+        if precompute:
+            self.precompute(full_df, timer=timer)
+
+    def predict(self, rssi, cpu_load, task_size, queue_length, timer=None):
         if not self.trained:
             raise ValueError("Digital Twin models not trained yet!")
 
-        x = np.array([[rssi, cpu_load, task_size, queue_length]])
-        delay = self.delay_model.predict(x)[0]
-        energy = self.energy_model.predict(x)[0]
-        next_queue = self.queue_model.predict(x)[0]
+        with timed(timer, "dt_predict"):
+            x = np.array([[rssi, cpu_load, task_size, queue_length]])
+            delay = self.delay_model.predict(x)[0]
+            energy = self._predict_energy(x)[0]
+            next_queue = self.queue_model.predict(x)[0]
 
         return {
             "predicted_delay": round(delay, 4),
@@ -47,6 +122,238 @@ class DigitalTwinPredictor:
             "predicted_queue": round(next_queue, 2)
         }
 
+    def predict_batch(self, rssi, cpu_load=None, task_size=None, queue_length=None, timer=None):
+        """
+        Vectorized counterpart of predict().
+
+        Args:
+            rssi (pd.DataFrame or array-like): Either a DataFrame holding the
+                FEATURE_COLUMNS or the rssi column as an array.
+            cpu_load, task_size, queue_length (array-like): Remaining feature
+                columns when rssi is given as an array.
+            timer (PhaseTimer): Optional; records the call as 'dt_predict'.
+
+        Returns:
+            dict: Same keys as predict(), each mapped to an array of length N.
+        """
+        if not self.trained:
+            raise ValueError("Digital Twin models not trained yet!")
+
+        with timed(timer, "dt_predict"):
+            X = _feature_matrix(rssi, cpu_load, task_size, queue_length)
+            return {
+                "predicted_delay": np.round(self.delay_model.predict(X), 4),
+                "predicted_energy": np.round(self._predict_energy(X), 4),
+                "predicted_queue": np.round(self.queue_model.predict(X), 2)
+            }
+
+    def precompute(self, df, timer=None):
+        """
+        Runs predict_batch() once over every row of df and caches the result,
+        so per-step lookups become array indexing (see cached_prediction()).
+        Rows with missing features are cached as NaN.
+
+        Returns:
+            dict: The cached prediction arrays, positionally aligned with df.
+        """
+        X = _feature_matrix(df)
+        valid = ~np.isnan(X).any(axis=1)
+
+        cache = {key: np.full(len(X), np.nan) for key in ("predicted_delay", "predicted_energy", "predicted_queue")}
+        if valid.any():
+            preds = self.predict_batch(*X[valid].T, timer=timer)
+            for key, values in preds.items():
+                cache[key][valid] = values
+
+        self.cached_predictions = cache
+        return cache
+
+    def _predict_energy(self, X):
+        energy = self.energy_model.predict(X)
+        if self.energy_correction is not None:
+            energy = energy + _design(X) @ self.energy_correction
+        return energy
+
+    def _init_stream(self, X, rows, y_delay, y_queue, energy_mse):
+        """
+        Resets the streaming state from a full fit: sufficient statistics
+        equal to the offline least-squares fits, a window of the latest rows,
+        and a drift baseline taken from the fit itself. The baseline is the
+        energy backend's held-out (out-of-bag) error and the in-sample error
+        of the two linear models, whose five coefficients cannot overfit
+        enough for that to differ materially from a held-out estimate.
+        """
+        Xd = _design(X)
+        self._gram = Xd.T @ Xd
+        self._delay_xy = Xd.T @ y_delay
+        # The last row's queue target is only a placeholder (ffill), so it is
+        # left out here and carried until the first streamed batch supplies it
+        self._queue_gram = Xd[:-1].T @ Xd[:-1]
+        self._queue_xy = Xd[:-1].T @ y_queue[:-1]
+        self._energy_xy = np.zeros(Xd.shape[1])
+        self.energy_correction = None
+        self._pending = X[-1]  # last row, waiting for its next-queue target
+
+        rows = rows[-self.window:]
+        self._window_rows = np.zeros((self.window, rows.shape[1]))
+        self._window_rows[:len(rows)] = rows
+        self._window_count = len(rows)
+        self._window_head = len(rows) % self.window
+
+        # Floors keep the drift ratio finite for (near-)noise-free targets
+        self._error_floor = 1e-6 * rows[:, len(FEATURE_COLUMNS):].var(axis=0).mean() + 1e-12
+        self._error_baseline = np.array([
+            np.mean((y_delay - self.delay_model.predict(X)) ** 2),
+            energy_mse,
+            np.mean((y_queue[:-1] - self.queue_model.predict(X[:-1])) ** 2) if len(X) > 1 else 0.0
+        ])
+        self._error_ewma = self._error_baseline.copy()
+        self.rows_since_fit = 0
+        self.drift = 0.0
+
+    def partial_fit(self, df):
+        """
+        Updates the twin with a mini-batch of new telemetry rows (same columns
+        as train()), at O(features^2) per row and bounded memory.
+
+        - Delay and queue models: exponentially forgotten least-squares
+          sufficient statistics, re-solved once per batch into the
+          LinearRegression coef_/intercept_.
+        - Energy: the fitted backend stays fixed; a linear residual correction
+          on top of it is updated the same way.
+        - Queue targets are the next row's queue length, so each batch's last
+          row is carried over until the next batch supplies its target.
+        - The latest `window` rows are kept for refit(), and the drift metric
+          (see needs_refit) is scored on each batch before it is learned.
+
+        Cached per-row predictions are invalidated.
+        """
+        if not self.trained:
+            raise ValueError("Digital Twin models not trained yet!")
+
+        df = df.dropna(subset=FEATURE_COLUMNS + TARGET_COLUMNS)
+        if len(df) == 0:
+            return self
+        rows = df[FEATURE_COLUMNS + TARGET_COLUMNS].to_numpy(dtype=np.float64)
+        X, y_delay, y_energy = rows[:, :4], rows[:, 4], rows[:, 5]
+        queue = X[:, 3]
+
+        # Queue pairs (x_t, queue_{t+1}), starting with the row carried over
+        X_queue = X[:-1] if self._pending is None else np.vstack([self._pending, X[:-1]])
+        y_queue = queue[1:] if self._pending is None else queue
+        self._track_drift(X, y_delay, y_energy, X_queue, y_queue)
+
+        residual = y_energy - self.energy_model.predict(X)
+        self._gram, self._delay_xy, self._energy_xy = self._accumulate(
+            self._gram, (self._delay_xy, self._energy_xy), X, (y_delay, residual))
+        self.delay_model.coef_, self.delay_model.intercept_ = self._solve(self._gram, self._delay_xy)
+        coef, intercept = self._solve(self._gram, self._energy_xy)
+        self.energy_correction = np.append(coef, intercept)
+
+        if len(X_queue):
+            self._queue_gram, self._queue_xy = self._accumulate(self._queue_gram, (self._queue_xy,), X_queue,
+                                                                (y_queue,))
+            self.queue_model.coef_, self.queue_model.intercept_ = self._solve(self._queue_gram, self._queue_xy)
+        self._pending = X[-1]
+
+        # Ring-buffer window of the latest rows
+        rows = rows[-self.window:]
+        slots = (self._window_head + np.arange(len(rows))) % self.window
+        self._window_rows[slots] = rows
+        self._window_head = (self._window_head + len(rows)) % self.window
+        self._window_count = min(self._window_count + len(rows), self.window)
+
+        self.cached_predictions = None
+        return self
+
+    def _accumulate(self, gram, xys, X, targets):
+        # Row i of an n-row batch is (n - 1 - i) rows old when the batch ends
+        n = len(X)
+        weights = self.forgetting ** np.arange(n - 1, -1, -1)
+        decay = self.forgetting ** n
+        Xd = _design(X)
+        weighted = Xd * weights[:, None]
+        gram = decay * gram + weighted.T @ Xd
+        return (gram, *(decay * xy + weighted.T @ y for xy, y in zip(xys, targets)))
+
+    @staticmethod
+    def _solve(gram, xy):
+        theta = np.linalg.solve(gram + 1e-9 * np.eye(len(gram)), xy)
+        return theta[:-1], float(theta[-1])
+
+    def _track_drift(self, X, y_delay, y_energy, X_queue, y_queue):
+        errors = [np.mean((y_delay - self.delay_model.predict(X)) ** 2),
+                  np.mean((y_energy - self._predict_energy(X)) ** 2),
+                  np.mean((y_queue - self.queue_model.predict(X_queue)) ** 2) if len(X_queue) else np.nan]
+        errors = np.array(errors)
+        # A batch without queue pairs leaves that target's average unchanged
+        errors = np.where(np.isnan(errors), self._error_ewma, errors)
+        n = len(X)
+
+        alpha = 1.0 - (1.0 - self.drift_alpha) ** n
+        self._error_ewma = (1.0 - alpha) * self._error_ewma + alpha * errors
+        ratios = (self._error_ewma + self._error_floor) / (self._error_baseline + self._error_floor)
+        self.drift = float(ratios.max())
+        self.rows_since_fit += n
+
+    @property
+    def needs_refit(self):
+        """
+        True once the smoothed prediction error of any target exceeds
+        drift_threshold times the error of the last fit, i.e. the streaming
+        updates no longer keep up and refit() is worth its cost.
+        """
+        return self.rows_since_fit >= self.warmup_rows and self.drift > self.drift_threshold
+
+    def refit(self, precompute=False):
+        """
+        Full train() on the streaming window (the latest `window` rows).
+        """
+        order = (self._window_head - self._window_count + np.arange(self._window_count)) % self.window
+        df = pd.DataFrame(self._window_rows[order], columns=FEATURE_COLUMNS + TARGET_COLUMNS)
+        self.train(df, precompute=precompute)
+        return self
+
+    def params(self):
+        """
+        Hyperparameters that determine the fitted twin (n_jobs excluded).
+        """
+        return {"n_estimators": self.n_estimators, "random_state": self.random_state,
+                "energy_backend": self.energy_backend}
+
+    def fingerprint(self, df):
+        """
+        Hash of the training data, hyperparameters, DT_MODEL_VERSION and the
+        sklearn version: equal fingerprints mean train(df) would produce the
+        same twin, so a persisted one can be reused.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        columns = FEATURE_COLUMNS + TARGET_COLUMNS
+        h.update(np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64)).tobytes())
+        h.update(json.dumps([columns, self.params(), DT_MODEL_VERSION, sklearn.__version__]).encode())
+        return h.hexdigest()
+
+    def set_n_jobs(self, n_jobs):
+        self.n_jobs = n_jobs
+        self.energy_model.set_n_jobs(n_jobs)
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+    def cached_prediction(self, idx):
+        """
+        Returns the cached prediction for positional row idx in the same format
+        as predict(). Requires precompute() (or train(..., precompute=True)).
+        """
+        if self.cached_predictions is None:
+            raise ValueError("No cached predictions. Call precompute() first.")
+
+        return {key: float(values[idx]) for key, values in self.cached_predictions.items()}
+
 if __name__ == "__main__":
     import pandas as pd
 
@@ -70,4 +377,12 @@ if __name__ == "__main__":
 
     # Run one prediction
     result = dt.predict(rssi=0.5, cpu_load=0.3, task_size=0.2, queue_length=0.1)
-    print("🔮 Prediction:", result)
\ No newline at end of file
+    print("🔮 Prediction:", result)
+
+    # Batched prediction over the whole dataset
+    batch = dt.predict_batch(df)
+    print("🔮 Batch prediction shape:", batch["predicted_delay"].shape)
+
+    # Streaming update with the latest telemetry
+    dt.partial_fit(df.tail(500))
+    print(f"📡 Drift ratio after streaming update: {dt.drift:.2f} (refit needed: {dt.needs_refit})")
@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from modules.digital_twin.state_predictor import DigitalTwinPredictor
+from utils.profiling import timed
+
+
+def forest_jobs(workers, cpu_count=None):
+    """
+    Threads per forest so that `workers` concurrent fits share the machine
+    instead of oversubscribing it.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    return max(1, cpu_count // max(1, workers))
+
+
+def _fit_twin(df, params, n_jobs, path, precompute, timer=None):
+    predictor = DigitalTwinPredictor(n_jobs=n_jobs, **params)
+    predictor.train(df, precompute=precompute, timer=timer)
+    if path is not None:
+        # Write to a temp file and rename so concurrent runs never load a partial twin
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        predictor.save(tmp_path)
+        os.replace(tmp_path, path)
+    return predictor
+
+
+def train_twins(client_datasets, params=None, workers=1, cache_dir=None, precompute=True, cpu_count=None,
+                timer=None):
+    """
+    Fits (or reloads) one DigitalTwinPredictor per client.
+
+    Twins are persisted with joblib as <cache_dir>/dt-<fingerprint>.joblib,
+    where the fingerprint covers the client data and the hyperparameters, so
+    repeat runs and other ablations on the same data skip training. Missing
+    twins are fitted in a process pool of `workers`; each forest gets
+    forest_jobs(workers, cpu_count) threads.
+
+    Args:
+        client_datasets (list of pd.DataFrame): Client data (CLIENT_COLUMNS).
+        params (dict): DigitalTwinPredictor hyperparameters (n_estimators,
+            random_state, energy_backend).
+        workers (int): Processes fitting twins concurrently (1 = in-process).
+        cache_dir (str): Directory of persisted twins; None disables it.
+        precompute (bool): Cache every row's prediction after fitting.
+        cpu_count (int): Cores to share between workers (default: all).
+        timer (PhaseTimer): Optional; records twin loading ('dt_load'),
+            fitting ('dt_fit', including the pool's precompute) and in-process
+            precompute passes ('dt_predict').
+
+    Returns:
+        tuple: (list of DigitalTwinPredictor, list of bool loaded_from_cache)
+    """
+    params = params or {}
+    n_jobs = forest_jobs(workers, cpu_count)
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    predictors = [None] * len(client_datasets)
+    from_cache = [False] * len(client_datasets)
+    pending = []
+    for i, df in enumerate(client_datasets):
+        path = None
+        if cache_dir is not None:
+            path = os.path.join(cache_dir, f"dt-{DigitalTwinPredictor(**params).fingerprint(df)}.joblib")
+            if os.path.exists(path):
+                with timed(timer, "dt_load"):
+                    predictor = DigitalTwinPredictor.load(path)
+                predictor.set_n_jobs(n_jobs)
+                if precompute and predictor.cached_predictions is None:
+                    predictor.precompute(df, timer=timer)
+                predictors[i], from_cache[i] = predictor, True
+                continue
+        pending.append((i, path))
+
+    if workers <= 1 or len(pending) <= 1:
+        for i, path in pending:
+            predictors[i] = _fit_twin(client_datasets[i], params, n_jobs, path, precompute, timer)
+    else:
+        # Platform default start method: fork on Linux, spawn on macOS/Windows (_fit_twin and
+        # its arguments are picklable, so either works)
+        ctx = multiprocessing.get_context()
+        with timed(timer, "dt_fit"):
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=ctx) as pool:
+                futures = {
+                    i: pool.submit(_fit_twin, client_datasets[i], params, n_jobs, path, precompute)
+                    for i, path in pending
+                }
+                for i, future in futures.items():
+                    predictors[i] = future.result()
+
+    return predictors, from_cache
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    clients = []
+    for _ in range(8):
+        df = pd.DataFrame(rng.random((5000, 4)), columns=['rssi', 'cpu_load', 'task_size', 'queue_length'])
+        df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1
+        df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1
+        clients.append(df)
+
+    cache_dir = tempfile.mkdtemp()
+    for attempt in ("cold", "warm"):
+        start = time.perf_counter()
+        twins, cached = train_twins(clients, params={"random_state": 0}, workers=4, cache_dir=cache_dir)
+        print(f"🧠 {attempt}: {len(twins)} twins in {time.perf_counter() - start:.2f}s ({sum(cached)} from cache)")
@@ -1,15 +1,18 @@
 import numpy as np
 import random
 
-def select_clients(clients, dt_predictors, max_clients=3, strategy="semantic"):
+def select_clients(clients, dt_predictors, max_clients=3, strategy="semantic", timer=None):
     """
     Select a subset of clients based on semantic importance or randomly.
+    For repeated rounds over many clients use ClientSelector, which keeps the
+    scores in arrays instead of re-walking every client.
 
     Args:
         clients (list of pd.DataFrame): List of client dataframes.
         dt_predictors (list of DigitalTwinPredictor): Corresponding DT predictors.
         max_clients (int): Number of clients to select.
         strategy (str): 'semantic' or 'random'.
+        timer (PhaseTimer): Optional; DT predictions are recorded as 'dt_predict'.
 
     Returns:
         list: Indices of selected clients
@@ -20,13 +23,17 @@ def select_clients(clients, dt_predictors, max_clients=3, strategy="semantic"):
     # Semantic-based score: low delay + low energy = high score
     scores = []
     for i, (df, dt) in enumerate(zip(clients, dt_predictors)):
-        sample = df.sample().iloc[0]
-        pred = dt.predict(
-            rssi=sample['rssi'],
-            cpu_load=sample['cpu_load'],
-            task_size=sample['task_size'],
-            queue_length=sample['queue_length']
-        )
+        if dt.cached_predictions is not None:
+            pred = dt.cached_prediction(np.random.randint(len(df)))
+        else:
+            sample = df.sample().iloc[0]
+            pred = dt.predict(
+                rssi=sample['rssi'],
+                cpu_load=sample['cpu_load'],
+                task_size=sample['task_size'],
+                queue_length=sample['queue_length'],
+                timer=timer
+            )
         score = 1 - (pred['predicted_delay'] + pred['predicted_energy']) / 2  # lower is better
         scores.append((i, score))
 
@@ -35,6 +42,118 @@ def select_clients(clients, dt_predictors, max_clients=3, strategy="semantic"):
     return selected
 
 
+class ClientSelector:
+    """
+    Round-over-round client selection for large federations.
+
+    Every client's cached DT predictions (see DigitalTwinPredictor.precompute())
+    are turned into per-row semantic scores, 1 - (delay + energy) / 2, and
+    concatenated into one flat array with per-client offsets. Scoring a round
+    then draws one random row per client, like select_clients(), as a
+    single gather, and the top-k comes from argpartition instead of a full
+    sort.
+
+    With rescore_fraction < 1 only a rotating block of that fraction of
+    clients is rescored per round; the rest keep their last score, so every
+    client is refreshed once per 1 / rescore_fraction rounds.
+
+    An optional PhaseTimer records the precompute() passes of refresh() as
+    'dt_predict'.
+    """
+
+    def __init__(self, clients, dt_predictors, rescore_fraction=1.0, timer=None):
+        if not 0 < rescore_fraction <= 1:
+            raise ValueError("rescore_fraction must be in (0, 1].")
+
+        self.clients = clients
+        self.dt_predictors = dt_predictors
+        self.timer = timer
+        self.num_clients = len(clients)
+        self.lengths = np.array([len(df) for df in clients], dtype=np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.lengths)])
+        self.row_scores = np.empty(self.offsets[-1])
+        self.refresh()
+
+        self.rescore_size = max(1, int(np.ceil(rescore_fraction * self.num_clients)))
+        self.cursor = 0
+        # Per-client score statistics
+        self.scores = np.full(self.num_clients, -np.inf)
+        self.score_sum = np.zeros(self.num_clients)
+        self.times_scored = np.zeros(self.num_clients, dtype=np.int64)
+        self.scored_once = False
+
+    def refresh(self, client_ids=None):
+        """
+        Recomputes the row scores of the given clients (all by default) from
+        their DT, running one batched precompute() for twins whose cache was
+        invalidated (e.g. by partial_fit()).
+        """
+        ids = range(self.num_clients) if client_ids is None else client_ids
+        for i in ids:
+            df, dt = self.clients[i], self.dt_predictors[i]
+            preds = dt.cached_predictions if dt.cached_predictions is not None else dt.precompute(df, timer=self.timer)
+            score = 1 - (preds['predicted_delay'] + preds['predicted_energy']) / 2
+            # Rows without a prediction can never win
+            self.row_scores[self.offsets[i]:self.offsets[i + 1]] = np.nan_to_num(score, nan=-np.inf)
+
+    def score(self, client_ids):
+        """
+        Draws one random row per listed client and records its score.
+        """
+        client_ids = np.asarray(client_ids, dtype=np.int64)
+        rows = self.offsets[client_ids] + (np.random.random(len(client_ids)) * self.lengths[client_ids]).astype(np.int64)
+        scores = self.row_scores[rows]
+        self.scores[client_ids] = scores
+        finite = np.isfinite(scores)
+        self.score_sum[client_ids[finite]] += scores[finite]
+        self.times_scored[client_ids[finite]] += 1
+        return scores
+
+    def _rescore_block(self):
+        if not self.scored_once or self.rescore_size >= self.num_clients:
+            self.scored_once = True
+            return np.arange(self.num_clients)
+        block = (self.cursor + np.arange(self.rescore_size)) % self.num_clients
+        self.cursor = (self.cursor + self.rescore_size) % self.num_clients
+        return block
+
+    def mean_scores(self):
+        """
+        Average of every score drawn per client so far (NaN if never scored).
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.score_sum / self.times_scored
+
+    def select(self, max_clients=3, strategy="semantic"):
+        """
+        Same contract as select_clients(): indices of the selected clients,
+        best score first.
+        """
+        k = min(max_clients, self.num_clients)
+        if strategy == "random":
+            return random.sample(range(self.num_clients), k)
+
+        self.score(self._rescore_block())
+        top = np.argpartition(-self.scores, k - 1)[:k] if k < self.num_clients else np.arange(self.num_clients)
+        # Best first; ties go to the lower index like the stable sort in select_clients()
+        top = top[np.lexsort((top, -self.scores[top]))]
+        return top.tolist()
+
+
 # Example usage
 if __name__ == "__main__":
-    print("✅ Client selector ready for integration.")
+    import time
+
+    class _CachedTwin:
+        def __init__(self, n_rows):
+            self.cached_predictions = {"predicted_delay": np.random.rand(n_rows),
+                                       "predicted_energy": np.random.rand(n_rows)}
+
+    clients = [np.empty(100)] * 10_000
+    twins = [_CachedTwin(100) for _ in clients]
+    selector = ClientSelector(clients, twins, rescore_fraction=0.1)
+
+    start = time.perf_counter()
+    for _ in range(100):
+        selected = selector.select(max_clients=10)
+    print(f"✅ 100 selection rounds over 10k clients in {time.perf_counter() - start:.3f}s: {selected[:3]}")
@@ -1,6 +1,100 @@
 
-import copy
-import numpy as np
+import torch
+
+from utils.profiling import timed
+
+
+class StreamingFedAvg:
+    """
+    Federated Averaging over one flat, contiguous parameter vector.
+
+    Client updates are folded into a running weighted mean as they arrive,
+    so memory stays at O(1 model) however many clients participate. Each
+    add() also returns the cosine divergence of the update from the cached
+    flat global vector, computed in the same pass. Updates with weight 0
+    (e.g. a client without samples) are reported but not aggregated.
+    """
+
+    def __init__(self, global_weights):
+        """
+        Args:
+            global_weights (dict): Current global state_dict. Defines the
+                parameter layout and is the reference for divergence.
+        """
+        self.keys = list(global_weights.keys())
+        self.shapes = [global_weights[k].shape for k in self.keys]
+        self.dtypes = [global_weights[k].dtype for k in self.keys]
+
+        sizes = [global_weights[k].numel() for k in self.keys]
+        self.slices = []
+        offset = 0
+        for size in sizes:
+            self.slices.append(slice(offset, offset + size))
+            offset += size
+
+        self.global_flat = self._flatten(global_weights)
+        self.global_norm = torch.linalg.vector_norm(self.global_flat).item()
+        self.mean = torch.zeros_like(self.global_flat)
+        self.total_weight = 0.0
+        self.count = 0
+        self.skipped = 0
+
+    def _flatten(self, weights):
+        return torch.cat([weights[k].detach().reshape(-1).to(torch.float64) for k in self.keys])
+
+    def add(self, local_weights, weight=1.0, timer=None):
+        """
+        Folds one client's state_dict into the running mean.
+
+        Args:
+            local_weights (dict): Client model.state_dict().
+            weight (float): Aggregation weight, e.g. the client's sample count.
+            timer (PhaseTimer): Optional; records the call as 'fedavg_add'.
+
+        Returns:
+            float: Cosine divergence between the client and global weights.
+        """
+        if weight < 0:
+            raise ValueError(f"Aggregation weight must be non-negative, got {weight}.")
+        aggregate = weight > 0
+        if aggregate:
+            self.total_weight += weight
+            self.count += 1
+            step = weight / self.total_weight
+        else:
+            self.skipped += 1
+
+        dot = 0.0
+        sq_norm = 0.0
+        with timed(timer, "fedavg_add"):
+            for key, sl in zip(self.keys, self.slices):
+                local = local_weights[key].detach().reshape(-1).to(torch.float64)
+                dot += torch.dot(local, self.global_flat[sl]).item()
+                sq_norm += torch.dot(local, local).item()
+                if aggregate:
+                    self.mean[sl].lerp_(local, step)
+
+        denom = self.global_norm * sq_norm ** 0.5
+        return 1.0 - dot / denom if denom > 0 else 0.0
+
+    def result(self, timer=None):
+        """
+        Args:
+            timer (PhaseTimer): Optional; records the call as 'fedavg_result'.
+
+        Returns:
+            dict: Aggregated global model weights in the original shapes and dtypes.
+        """
+        if self.count == 0:
+            if self.skipped:
+                raise ValueError(f"All {self.skipped} client update(s) had zero weight; nothing to aggregate.")
+            raise ValueError("No client updates were aggregated.")
+        with timed(timer, "fedavg_result"):
+            return {
+                key: self.mean[sl].reshape(shape).to(dtype)
+                for key, sl, shape, dtype in zip(self.keys, self.slices, self.shapes, self.dtypes)
+            }
+
 
 def fed_avg(local_weights):
     """
@@ -12,12 +106,10 @@ def fed_avg(local_weights):
     Returns:
         dict: Aggregated global model weights.
     """
-    global_weights = copy.deepcopy(local_weights[0])
-    for key in global_weights.keys():
-        for i in range(1, len(local_weights)):
-            global_weights[key] += local_weights[i][key]
-        global_weights[key] = global_weights[key] / len(local_weights)
-    return global_weights
+    aggregator = StreamingFedAvg(local_weights[0])
+    for weights in local_weights:
+        aggregator.add(weights)
+    return aggregator.result()
 
 
 def weighted_fed_avg(local_weights, local_sizes):
@@ -31,13 +123,10 @@ def weighted_fed_avg(local_weights, local_sizes):
     Returns:
         dict: Aggregated global weights.
     """
-    total_size = sum(local_sizes)
-    global_weights = copy.deepcopy(local_weights[0])
-    for key in global_weights.keys():
-        global_weights[key] = global_weights[key] * (local_sizes[0] / total_size)
-        for i in range(1, len(local_weights)):
-            global_weights[key] += local_weights[i][key] * (local_sizes[i] / total_size)
-    return global_weights
+    aggregator = StreamingFedAvg(local_weights[0])
+    for weights, size in zip(local_weights, local_sizes):
+        aggregator.add(weights, weight=size)
+    return aggregator.result()
 
 
 # Example usage (requires PyTorch model.state_dicts)
@@ -0,0 +1,166 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+
+from modules.ddpg.ddpg_agent import DDPGAgent
+from modules.ddpg.prioritized_replay_buffer import PrioritizedReplayBuffer
+from modules.ddpg.replay_buffer import ReplayBuffer
+from modules.digital_twin.client_env import ClientEnvironment
+from utils.profiling import PhaseTimer
+
+DEFAULT_SETTINGS = {
+    "state_dim": 5,
+    "action_dim": 1,
+    "local_steps": 50,
+    "batch_size": 64,
+    "buffer_size": 10000,
+    "replay": "uniform",
+    "updates_per_step": 1,
+    "compile_mode": None,
+    "use_digital_twin": True,
+    "profile": False
+}
+
+
+def local_update(env, global_actor_state, round_id, client_id, settings=None, seed=None):
+    """
+    Runs one client's local DDPG training starting from the global actor.
+
+    Args:
+        env (ClientEnvironment): Client environment.
+        global_actor_state (dict): Global actor state_dict.
+        round_id (int): Federated round (1-based), used for log rows.
+        client_id (int): Client index, used for log rows.
+        settings (dict): Overrides for DEFAULT_SETTINGS.
+        seed (int): Optional seed for numpy/torch RNGs (used by pool workers).
+
+    Returns:
+        tuple: (actor state_dict, metrics dict with 'steps', 'semcom' and 'loss'
+        log rows, plus a PhaseTimer snapshot under 'phases' when settings
+        has profile=True)
+    """
+    cfg = dict(DEFAULT_SETTINGS, **(settings or {}))
+    timer = PhaseTimer(enabled=cfg["profile"])
+    if seed is not None:
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+
+    agent = DDPGAgent(state_dim=cfg["state_dim"], action_dim=cfg["action_dim"], compile_mode=cfg["compile_mode"])
+    agent.actor.load_state_dict(global_actor_state)
+    buffer_cls = PrioritizedReplayBuffer if cfg["replay"] == "prioritized" else ReplayBuffer
+    buffer = buffer_cls(max_size=cfg["buffer_size"], state_dim=cfg["state_dim"], action_dim=cfg["action_dim"])
+
+    n_steps = cfg["local_steps"]
+    with timer.phase("sample_episode"):
+        episode = env.sample_episode(n_steps)
+    states, costs, done = episode["states"], episode["costs"], episode["done"]
+    rewards = np.empty(n_steps)
+    losses = []
+
+    for step in range(n_steps):
+        state = states[step]
+        with timer.phase("select_action"):
+            action = agent.select_action(state)
+        rewards[step] = costs[step] * action[0]
+
+        with timer.phase("replay_add"):
+            buffer.add(state, action, state, rewards[step], done[step])
+
+        if buffer.size > cfg["batch_size"]:
+            with timer.phase("agent_train"):
+                loss = agent.train(buffer, cfg["batch_size"], updates=cfg["updates_per_step"])
+            losses.append((round_id, client_id, step, loss))
+    timer.count("steps", n_steps)
+
+    steps = range(n_steps)
+    delay, energy, semantic = states[:, 0].tolist(), states[:, 1].tolist(), states[:, 3].tolist()
+    metrics = {
+        "client": client_id,
+        "steps": list(zip([round_id] * n_steps, [client_id] * n_steps, steps, rewards.tolist(),
+                          delay, energy, done.tolist())),
+        "semcom": list(zip([round_id] * n_steps, [client_id] * n_steps, steps, semantic, energy)),
+        "loss": losses,
+        "phases": timer.snapshot() if timer.enabled else None
+    }
+    return agent.actor.state_dict(), metrics
+
+
+# Per-process state installed by _init_worker
+_WORKER_STATE = None
+
+
+def _init_worker(environments, settings, num_threads):
+    global _WORKER_STATE
+    # Pin intra-op threads so N workers don't oversubscribe the machine
+    torch.set_num_threads(num_threads)
+    _WORKER_STATE = (environments, settings)
+
+
+def _run_client(client_id, global_actor_state, round_id, seed):
+    environments, settings = _WORKER_STATE
+    weights, metrics = local_update(
+        environments[client_id], global_actor_state, round_id, client_id, settings=settings, seed=seed
+    )
+    return client_id, weights, metrics
+
+
+class LocalTrainer:
+    """
+    Trains the selected clients of a round, either in-process one after
+    another (workers <= 1) or concurrently in a process pool.
+
+    Each client's data and DT predictions are turned into a ClientEnvironment
+    once and handed to the workers when the pool starts; each task only ships
+    the global actor weights in and the local state_dict plus metrics out.
+    start_method=None uses the platform's default (fork on Linux, spawn on
+    macOS/Windows); the environments are pickled to spawned workers.
+    """
+
+    def __init__(self, client_datasets, dt_predictors, settings=None, workers=1, threads_per_worker=1,
+                 start_method=None):
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.environments = [
+            ClientEnvironment(df, dt, use_digital_twin=self.settings["use_digital_twin"])
+            for df, dt in zip(client_datasets, dt_predictors)
+        ]
+        self.workers = workers
+        self.pool = None
+
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=_init_worker,
+                initargs=(self.environments, self.settings, threads_per_worker)
+            )
+
+    def train_round(self, selected_idxs, global_actor_state, round_id):
+        """
+        Trains every selected client from the given global actor weights.
+
+        Yields:
+            tuple: (client_id, actor state_dict, metrics), in completion order.
+        """
+        if self.pool is None:
+            for i in selected_idxs:
+                weights, metrics = local_update(
+                    self.environments[i], global_actor_state, round_id, i, settings=self.settings
+                )
+                yield i, weights, metrics
+            return
+
+        # Forked workers share the parent's RNG state, so give each task its own seed
+        seeds = np.random.randint(0, 2**31 - 1, size=len(selected_idxs))
+        futures = [
+            self.pool.submit(_run_client, i, global_actor_state, round_id, int(seed))
+            for i, seed in zip(selected_idxs, seeds)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
@@ -1,33 +1,258 @@
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 import torch
-import torchvision.transforms as transforms
+import torch.nn.functional as F
 from torchvision.models import mobilenet_v2
 
+INPUT_SIZE = 224
+EMBEDDING_DIM = 1280
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def load_image(image_path, size=INPUT_SIZE):
+    """
+    Decodes, resizes and normalizes one image into a (3, size, size) float32
+    array. cv2 releases the GIL, so this runs in parallel across threads.
+    """
+    image = cv2.imread(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Image not found or unreadable: {image_path}")
+
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    image = cv2.resize(image, (size, size), interpolation=cv2.INTER_AREA)
+    image = (image.astype(np.float32) / 255.0 - IMAGENET_MEAN) / IMAGENET_STD
+    return image.transpose(2, 0, 1)
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding store keyed by image path and mtime.
+
+    Layout: <cache_dir>/embeddings.f32 is a raw (capacity, 1280) float32 row
+    store opened as a read/write memmap, and <cache_dir>/index.json holds the
+    number of rows in use plus {path: [row, mtime_ns]}. New images are
+    appended (the file grows GROW_ROWS rows at a time) and changed images are
+    overwritten in place, so save() only flushes the rows that were written.
+    Rows of images that no longer exist (see prune()) are dead; save()
+    compacts the store once they exceed compact_fraction of the rows.
+    """
+
+    GROW_ROWS = 1024
+
+    def __init__(self, cache_dir, dim=EMBEDDING_DIM, compact_fraction=0.25):
+        self.cache_dir = cache_dir
+        self.dim = dim
+        self.compact_fraction = compact_fraction
+        self.matrix_path = os.path.join(cache_dir, "embeddings.f32")
+        self.index_path = os.path.join(cache_dir, "index.json")
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self.index = {}
+        self.n_rows = 0
+        if os.path.exists(self.index_path) or os.path.exists(self.matrix_path):
+            if not self._load():
+                print(f"⚠️ Embedding cache in {cache_dir} is inconsistent; rebuilding it.")
+                for path in (self.index_path, self.matrix_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self.index, self.n_rows = {}, 0
+        self.embeddings = self._open(self.n_rows)
+
+    def _load(self):
+        """
+        Loads index.json, checking it against the row store.
+
+        Returns:
+            bool: False if the index and the matrix disagree (missing file,
+            unreadable index, or rows beyond the stored ones).
+        """
+        if not (os.path.exists(self.index_path) and os.path.exists(self.matrix_path)):
+            return False
+        try:
+            with open(self.index_path) as file:
+                meta = json.load(file)
+            index, n_rows = meta["entries"], int(meta["rows"])
+        except (ValueError, KeyError, TypeError):
+            return False
+
+        stored_rows = os.path.getsize(self.matrix_path) // (self.dim * np.dtype(np.float32).itemsize)
+        if n_rows > stored_rows or any(not 0 <= entry[0] < n_rows for entry in index.values()):
+            return False
+        self.index, self.n_rows = index, n_rows
+        return True
+
+    def _open(self, n_rows):
+        """
+        Memmaps the row store with room for at least n_rows rows.
+        """
+        if n_rows == 0 and not os.path.exists(self.matrix_path):
+            return np.zeros((0, self.dim), dtype=np.float32)
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        size = os.path.getsize(self.matrix_path) if os.path.exists(self.matrix_path) else 0
+        capacity = size // row_bytes
+        if capacity < n_rows:
+            capacity = -(-n_rows // self.GROW_ROWS) * self.GROW_ROWS
+            with open(self.matrix_path, "ab") as file:
+                file.truncate(capacity * row_bytes)
+        if capacity == 0:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.memmap(self.matrix_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def lookup(self, paths, mtimes):
+        """
+        Returns:
+            tuple: (rows, missing) where rows[i] is the cache row of paths[i]
+            or -1, and missing lists the positions that must be encoded.
+        """
+        rows = np.full(len(paths), -1, dtype=np.int64)
+        for i, (path, mtime) in enumerate(zip(paths, mtimes)):
+            entry = self.index.get(path)
+            if entry is not None and entry[1] == mtime:
+                rows[i] = entry[0]
+        return rows, np.flatnonzero(rows < 0)
+
+    def update(self, paths, mtimes, embeddings):
+        new_rows = []
+        for path, mtime in zip(paths, mtimes):
+            entry = self.index.get(path)
+            if entry is not None:
+                row = entry[0]
+            else:
+                row = self.n_rows
+                self.n_rows += 1
+            self.index[path] = [row, mtime]
+            new_rows.append(row)
+
+        if self.n_rows > len(self.embeddings):
+            if isinstance(self.embeddings, np.memmap):
+                self.embeddings.flush()
+            self.embeddings = self._open(self.n_rows)
+        self.embeddings[new_rows] = embeddings
+
+    def prune(self):
+        """
+        Forgets images that no longer exist on disk; their rows become dead.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        removed = [path for path in self.index if not os.path.exists(path)]
+        for path in removed:
+            del self.index[path]
+        return len(removed)
+
+    def dead_rows(self):
+        return self.n_rows - len(self.index)
+
+    def compact(self):
+        """
+        Rewrites the store with only the live rows, in their current order.
+        """
+        live = sorted(self.index.items(), key=lambda item: item[1][0])
+        rows = np.array([entry[0] for _, entry in live], dtype=np.int64)
+        values = np.asarray(self.embeddings[rows])
+
+        # Rebuild into a temp file and rename so a crash never leaves a partial store
+        tmp_path = f"{self.matrix_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+        self.embeddings = None
+        os.replace(tmp_path, self.matrix_path)
+
+        self.index = {path: [row, entry[1]] for row, (path, entry) in enumerate(live)}
+        self.n_rows = len(live)
+        self.embeddings = self._open(self.n_rows)
+
+    def save(self):
+        if self.n_rows and self.dead_rows() > self.compact_fraction * self.n_rows:
+            self.compact()
+        elif isinstance(self.embeddings, np.memmap):
+            self.embeddings.flush()
+
+        tmp_index = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_index, "w") as file:
+            json.dump({"rows": self.n_rows, "entries": self.index}, file)
+        os.replace(tmp_index, self.index_path)
+
+
 class SemanticEncoder:
-    def __init__(self, device="cpu"):
+    def __init__(self, device="cpu", num_workers=4, batch_size=64):
         self.device = torch.device(device)
         self.model = mobilenet_v2(pretrained=True).features.to(self.device).eval()
-        self.transform = transforms.Compose([
-            transforms.ToPILImage(),
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                                 std=[0.229, 0.224, 0.225])
-        ])
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+
+    def _embed(self, batch):
+        input_tensor = torch.from_numpy(batch).to(self.device)
+        with torch.inference_mode():
+            features = self.model(input_tensor)
+            # Global average pool the (1280, 7, 7) feature map to a 1280-d vector
+            pooled = F.adaptive_avg_pool2d(features, 1).flatten(1)
+        return pooled.cpu().numpy()
 
     def encode(self, image_path):
         if not os.path.exists(image_path):
             raise FileNotFoundError(f"Image not found: {image_path}")
 
-        image = cv2.imread(image_path)
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        input_tensor = self.transform(image).unsqueeze(0).to(self.device)
+        return self.encode_batch([image_path])[0]  # Returns 1280-d vector
 
-        with torch.no_grad():
-            features = self.model(input_tensor)
-        return features.squeeze().cpu().numpy()  # Returns 1280-d vector
+    def encode_batch(self, image_paths, batch_size=None):
+        """
+        Encodes many images: worker threads decode and resize the next batch
+        while the backbone runs on the current one.
+
+        Returns:
+            np.ndarray: (len(image_paths), 1280) float32 embeddings.
+        """
+        batch_size = batch_size or self.batch_size
+        chunks = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
+        out = np.empty((len(image_paths), EMBEDDING_DIM), dtype=np.float32)
+        if not chunks:
+            return out
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+            pending = [pool.submit(load_image, path) for path in chunks[0]]
+            offset = 0
+            for i, chunk in enumerate(chunks):
+                batch = np.stack([future.result() for future in pending])
+                if i + 1 < len(chunks):
+                    pending = [pool.submit(load_image, path) for path in chunks[i + 1]]
+                out[offset:offset + len(chunk)] = self._embed(batch)
+                offset += len(chunk)
+        return out
+
+    def encode_dataset(self, image_paths, cache_dir, batch_size=None):
+        """
+        Encodes a dataset incrementally: only images that are new or whose
+        mtime changed since the last run go through the backbone.
+
+        Args:
+            image_paths (list of str): Images to encode.
+            cache_dir (str): Directory of the persistent EmbeddingCache.
+
+        Returns:
+            np.ndarray: (len(image_paths), 1280) float32 embeddings.
+        """
+        paths = [os.path.abspath(p) for p in image_paths]
+        mtimes = [os.stat(p).st_mtime_ns for p in paths]
+
+        cache = EmbeddingCache(cache_dir)
+        pruned = cache.prune()
+        rows, missing = cache.lookup(paths, mtimes)
+        if len(missing):
+            print(f"🧠 Encoding {len(missing)} new/changed images ({len(paths) - len(missing)} cached)")
+            embeddings = self.encode_batch([paths[i] for i in missing], batch_size)
+            cache.update([paths[i] for i in missing], [mtimes[i] for i in missing], embeddings)
+        if len(missing) or pruned:
+            cache.save()
+            rows, _ = cache.lookup(paths, mtimes)
+
+        return cache.embeddings[rows]
 
 if __name__ == "__main__":
     encoder = SemanticEncoder()
@@ -1,5 +1,30 @@
 import numpy as np
 
+# Object priority weight (higher is more important)
+PRIORITY_MAP = {
+    "person": 1.0,
+    "car": 0.9,
+    "bicycle": 0.8,
+    "animal": 0.7,
+    "other": 0.5
+}
+
+# Integer coding for compute_semantic_fidelity_batch(): code i -> OBJECT_TYPES[i]
+OBJECT_TYPES = tuple(PRIORITY_MAP)
+OBJECT_PRIORITY = np.array([PRIORITY_MAP[name] for name in OBJECT_TYPES])
+DEFAULT_PRIORITY = PRIORITY_MAP["other"]
+OTHER_CODE = OBJECT_TYPES.index("other")
+
+
+def encode_object_types(object_types):
+    """
+    Maps object type names to integer codes for compute_semantic_fidelity_batch().
+    Unknown names map to 'other'.
+    """
+    codes = {name: i for i, name in enumerate(OBJECT_TYPES)}
+    return np.array([codes.get(name.lower(), OTHER_CODE) for name in object_types], dtype=np.int64)
+
+
 def compute_semantic_fidelity(features, predicted_delay, predicted_energy, object_type):
     """
     Computes semantic fidelity based on:
@@ -18,21 +43,48 @@ def compute_semantic_fidelity(features, predicted_delay, predicted_energy, objec
     delay_penalty = 1.0 - min(predicted_delay, 1.0)
     energy_penalty = 1.0 - min(predicted_energy, 1.0)
 
-    # Object priority weight (higher is more important)
-    priority_map = {
-        "person": 1.0,
-        "car": 0.9,
-        "bicycle": 0.8,
-        "animal": 0.7,
-        "other": 0.5
-    }
-    object_weight = priority_map.get(object_type.lower(), 0.5)
+    object_weight = PRIORITY_MAP.get(object_type.lower(), DEFAULT_PRIORITY)
 
     # Final score: weighted harmonic mean
     score = (feature_strength * 0.4 + delay_penalty * 0.3 + energy_penalty * 0.2 + object_weight * 0.1)
     return round(score, 3)
 
 
+def compute_semantic_fidelity_batch(features=None, predicted_delay=None, predicted_energy=None, object_types=OTHER_CODE,
+                                    feature_norms=None):
+    """
+    Vectorized compute_semantic_fidelity() over N observations in one pass.
+
+    Args:
+        features (np.ndarray): (N, D) feature matrix. Not needed when
+            feature_norms is given.
+        predicted_delay (array-like): (N,) DT-predicted delays.
+        predicted_energy (array-like): (N,) DT-predicted energies.
+        object_types (array-like or int): (N,) integer codes into OBJECT_TYPES
+            (see encode_object_types()), or one code for all rows. Defaults
+            to 'other', like unknown names in compute_semantic_fidelity();
+            codes out of range also score as 'other'.
+        feature_norms (array-like): Optional precomputed (N,) L2 norms of the
+            feature rows.
+
+    Returns:
+        np.ndarray: (N,) scores in [0, 1], rounded to 3 decimals.
+    """
+    if feature_norms is None:
+        feature_norms = np.linalg.norm(features, axis=1)
+    feature_strength = np.minimum(np.asarray(feature_norms) / 100.0, 1.0)
+
+    delay_penalty = 1.0 - np.minimum(predicted_delay, 1.0)
+    energy_penalty = 1.0 - np.minimum(predicted_energy, 1.0)
+
+    codes = np.asarray(object_types)
+    in_range = (codes >= 0) & (codes < len(OBJECT_PRIORITY))
+    object_weight = np.where(in_range, OBJECT_PRIORITY[np.clip(codes, 0, len(OBJECT_PRIORITY) - 1)], DEFAULT_PRIORITY)
+
+    score = (feature_strength * 0.4 + delay_penalty * 0.3 + energy_penalty * 0.2 + object_weight * 0.1)
+    return np.round(score, 3)
+
+
 # Example usage
 if __name__ == "__main__":
     dummy_vec = np.random.rand(1280)
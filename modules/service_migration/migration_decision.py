@@ -1,3 +1,11 @@
+import numpy as np
+
+DEFAULT_MIGRATION_THRESHOLDS = {
+    "queue": 0.25,     # Lower threshold to trigger more frequently
+    "energy": 0.20
+}
+
+
 def should_migrate(predicted_queue, predicted_energy, migration_thresholds=None, verbose=False):
     """
     Decide whether to trigger service migration based on DT predictions.
@@ -12,10 +20,7 @@ def should_migrate(predicted_queue, predicted_energy, migration_thresholds=None,
         bool: True if migration should be triggered.
     """
     if migration_thresholds is None:
-        migration_thresholds = {
-            "queue": 0.25,     # Lower threshold to trigger more frequently
-            "energy": 0.20
-        }
+        migration_thresholds = DEFAULT_MIGRATION_THRESHOLDS
 
     queue_flag = predicted_queue >= migration_thresholds["queue"]
     energy_flag = predicted_energy >= migration_thresholds["energy"]
@@ -28,6 +33,98 @@ def should_migrate(predicted_queue, predicted_energy, migration_thresholds=None,
     return should_migrate
 
 
+def should_migrate_batch(predicted_queue, predicted_energy, migration_thresholds=None):
+    """
+    Vectorized should_migrate() over arrays of DT predictions.
+
+    Returns:
+        np.ndarray: Boolean migration flag per element.
+    """
+    if migration_thresholds is None:
+        migration_thresholds = DEFAULT_MIGRATION_THRESHOLDS
+
+    queue_flag = np.asarray(predicted_queue) >= migration_thresholds["queue"]
+    energy_flag = np.asarray(predicted_energy) >= migration_thresholds["energy"]
+    return queue_flag | energy_flag
+
+
+class MigrationEngine:
+    """
+    Stateful migration decisions for many hosted services at once.
+
+    Holds each service's latest predicted queue/energy and its current
+    decision. A service switches to "migrate" when either prediction reaches
+    its threshold (as in should_migrate()), but only switches back once both
+    fall below the threshold lowered by `hysteresis` (a fraction of it), so
+    readings hovering around a threshold do not flap. After a migration is
+    triggered, the service cannot trigger another for `cooldown` ticks.
+    Each tick is one vectorized pass that reports only changed decisions.
+    """
+
+    def __init__(self, num_services, migration_thresholds=None, hysteresis=0.1, cooldown=3):
+        if migration_thresholds is None:
+            migration_thresholds = DEFAULT_MIGRATION_THRESHOLDS
+
+        self.enter = np.array([migration_thresholds["queue"], migration_thresholds["energy"]])
+        self.exit = self.enter * (1.0 - hysteresis)
+        self.cooldown = cooldown
+
+        self.queue = np.zeros(num_services)
+        self.energy = np.zeros(num_services)
+        self.migrating = np.zeros(num_services, dtype=bool)
+        self.last_migration = np.full(num_services, -np.iinfo(np.int64).max // 2, dtype=np.int64)
+        self.tick = 0
+        self.migrations = 0
+
+    def update(self, predicted_queue, predicted_energy, service_ids=None):
+        """
+        Stores new DT predictions for the given services (all by default).
+        """
+        ids = slice(None) if service_ids is None else np.asarray(service_ids, dtype=np.int64)
+        self.queue[ids] = predicted_queue
+        self.energy[ids] = predicted_energy
+
+    def step(self, predicted_queue=None, predicted_energy=None, service_ids=None):
+        """
+        Advances one tick and re-evaluates every service.
+
+        Args:
+            predicted_queue, predicted_energy (array-like): Optional new
+                predictions, applied with update() first.
+            service_ids (array-like): Services the predictions belong to.
+
+        Returns:
+            tuple: (changed_ids, decisions) - indices of services whose
+            decision changed this tick and their new decision (True = migrate).
+        """
+        if predicted_queue is not None:
+            self.update(predicted_queue, predicted_energy, service_ids)
+
+        above = (self.queue >= self.enter[0]) | (self.energy >= self.enter[1])
+        below = (self.queue < self.exit[0]) & (self.energy < self.exit[1])
+        ready = self.tick - self.last_migration >= self.cooldown
+
+        start = above & ~self.migrating & ready
+        stop = below & self.migrating
+        changed = np.flatnonzero(start | stop)
+
+        self.migrating[changed] = ~self.migrating[changed]
+        self.last_migration[start] = self.tick
+        self.migrations += int(np.count_nonzero(start))
+        self.tick += 1
+
+        return changed, self.migrating[changed]
+
+
 if __name__ == "__main__":
     migrate = should_migrate(predicted_queue=0.22, predicted_energy=0.23, verbose=True)
     print("Trigger Migration:", migrate)
+
+    engine = MigrationEngine(num_services=10_000)
+    naive = 0
+    for _ in range(20):
+        queue = np.random.uniform(0.0, 0.3, size=10_000)
+        energy = np.random.uniform(0.0, 0.22, size=10_000)
+        naive += int(should_migrate_batch(queue, energy).sum())
+        engine.step(queue, energy)
+    print(f"Migrations over 20 ticks: stateless={naive}, engine={engine.migrations}")
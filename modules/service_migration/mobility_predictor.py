@@ -29,8 +29,134 @@ def predict_next_location(past_locations, steps=1):
     return round(predicted_x, 2), round(predicted_y, 2)
 
 
+class FleetMobilityPredictor:
+    """
+    Vectorized next-location prediction for a whole UAV fleet.
+
+    The last `history` positions of every UAV live in one (N, K, 2) ring
+    buffer, updated in bulk. The default predictor is the same linear trend
+    as predict_next_location(): the mean step over the buffered window,
+    which telescopes to (newest - oldest) / (count - 1). With kalman=True a
+    batched constant-velocity Kalman filter is also updated on every ingest
+    and can be used instead via predict(..., method="kalman").
+
+    Predictions are returned as raw floats (no rounding). UAVs that were
+    never observed predict NaN under both methods; under the trend method so
+    do UAVs with a single position.
+    """
+
+    def __init__(self, num_uavs, history=8, kalman=False, dt=1.0, process_noise=1e-2, measurement_noise=1e-1):
+        if history < 2:
+            raise ValueError("Need a history of at least 2 positions to predict.")
+
+        self.num_uavs = num_uavs
+        self.history = history
+        self.positions = np.zeros((num_uavs, history, 2))
+        self.head = np.zeros(num_uavs, dtype=np.int64)    # next slot to write
+        self.count = np.zeros(num_uavs, dtype=np.int64)   # valid slots
+
+        self.kalman = kalman
+        if kalman:
+            self.F = np.array([[1, 0, dt, 0], [0, 1, 0, dt], [0, 0, 1, 0], [0, 0, 0, 1]], dtype=np.float64)
+            self.H = np.array([[1, 0, 0, 0], [0, 1, 0, 0]], dtype=np.float64)
+            # Discrete white-noise acceleration model
+            G = np.array([[0.5 * dt ** 2, 0], [0, 0.5 * dt ** 2], [dt, 0], [0, dt]])
+            self.Q = process_noise * G @ G.T
+            self.R = measurement_noise * np.eye(2)
+            self.dt = dt
+            self.state = np.zeros((num_uavs, 4))
+            self.cov = np.tile(np.eye(4), (num_uavs, 1, 1))
+
+    def update(self, positions, uav_ids=None):
+        """
+        Ingests one position per listed UAV.
+
+        Args:
+            positions (array-like): (M, 2) observed positions.
+            uav_ids (array-like): (M,) fleet indices, each at most once per
+                call. Defaults to all N UAVs in order.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        ids = np.arange(self.num_uavs) if uav_ids is None else np.asarray(uav_ids, dtype=np.int64)
+
+        self.positions[ids, self.head[ids]] = positions
+        self.head[ids] = (self.head[ids] + 1) % self.history
+        if self.kalman:
+            self._kalman_update(ids, positions)
+        self.count[ids] = np.minimum(self.count[ids] + 1, self.history)
+
+    def _kalman_update(self, ids, z):
+        first = self.count[ids] == 0
+        if first.any():
+            new = ids[first]
+            self.state[new] = np.column_stack([z[first], np.zeros((len(new), 2))])
+            self.cov[new] = np.diag([self.R[0, 0], self.R[1, 1], 1e3, 1e3])
+
+        track = ids[~first]
+        if len(track) == 0:
+            return
+        z = z[~first]
+
+        # Predict
+        x = self.state[track] @ self.F.T
+        P = self.F @ self.cov[track] @ self.F.T + self.Q
+
+        # Update
+        y = z - x[:, :2]
+        S = P[:, :2, :2] + self.R
+        K = P[:, :, :2] @ np.linalg.inv(S)
+        self.state[track] = x + np.einsum('nij,nj->ni', K, y)
+        self.cov[track] = P - K @ P[:, :2, :]
+
+    def predict(self, steps=1, method="trend"):
+        """
+        Predicts every UAV's location `steps` ticks ahead.
+
+        Args:
+            steps (int or array-like): One horizon, or H horizons.
+            method (str): 'trend' (linear trend) or 'kalman'.
+
+        Returns:
+            np.ndarray: (N, 2) for a scalar steps, (N, H, 2) for H horizons.
+        """
+        horizons = np.asarray(steps, dtype=np.float64)
+
+        if method == "kalman":
+            if not self.kalman:
+                raise ValueError("Kalman filter not enabled (kalman=True).")
+            last = self.state[:, :2].copy()
+            velocity = self.state[:, 2:] * self.dt
+            # The filter state of an unobserved UAV is a zero placeholder, not a position
+            last[self.count == 0] = np.nan
+        elif method == "trend":
+            rows = np.arange(self.num_uavs)
+            last = self.positions[rows, (self.head - 1) % self.history]
+            first = self.positions[rows, (self.head - self.count) % self.history]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                velocity = (last - first) / (self.count - 1)[:, None]
+            velocity[self.count < 2] = np.nan
+        else:
+            raise ValueError(f"Unknown prediction method: {method}")
+
+        if horizons.ndim == 0:
+            return last + velocity * horizons
+        return last[:, None, :] + velocity[:, None, :] * horizons[None, :, None]
+
+    def predict_horizon(self, horizon, method="trend"):
+        """
+        Predictions for 1..horizon ticks ahead as an (N, horizon, 2) array.
+        """
+        return self.predict(np.arange(1, horizon + 1), method=method)
+
+
 # Example usage
 if __name__ == "__main__":
     trajectory = [(5, 5), (6, 5.2), (7, 5.4), (8, 5.6)]
     next_pos = predict_next_location(trajectory, steps=1)
     print("Predicted next UAV location:", next_pos)
+
+    fleet = FleetMobilityPredictor(num_uavs=2, history=4, kalman=True)
+    for t in range(4):
+        fleet.update([(5 + t, 5 + 0.2 * t), (0, -t)])
+    print("Fleet next locations (trend):", fleet.predict())
+    print("Fleet 3-step horizon (kalman):", fleet.predict_horizon(3, method="kalman")[0])
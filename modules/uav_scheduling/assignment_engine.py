@@ -0,0 +1,174 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial import cKDTree
+
+
+class AssignmentEngine:
+    """
+    Device-to-UAV assignment at city scale.
+
+    "greedy" reproduces priority_aware_greedy(): devices are served in
+    descending priority (stable for ties) and each takes its nearest UAV with
+    spare capacity. Instead of scanning every UAV per device, the engine asks
+    a KD-tree over the currently open UAVs for each device's k nearest
+    candidates, one block of devices at a time, and tracks capacities in an
+    array. A block is re-queried only when a device finds all k candidates
+    full, and the loop stops as soon as every UAV is full.
+
+    Cost: about 0.2-0.3 s for 100k uniformly spread devices x 300 UAVs here.
+    Tightly clustered devices are the slow case: the UAVs near a cluster
+    fill early, so later devices reach the last of their k candidates and
+    fall back to an exact scan over the open UAVs more often. 100k devices
+    in a single cluster take about 0.3-0.45 s here, and can approach a second
+    on slower machines. A larger k does not help: it makes every query
+    dearer without avoiding the fallback scans.
+
+    "optimal" solves the capacitated assignment exactly (minimum total
+    distance, Hungarian algorithm over capacity-expanded UAV slots) for
+    comparison; it needs O(devices x slots) memory, so keep it to small cases.
+    """
+
+    def __init__(self, uav_locations, max_capacity=5, method="greedy", k=8, block_size=4096):
+        if method not in ("greedy", "optimal"):
+            raise ValueError(f"Unknown assignment method: {method}")
+
+        self.uav_locations = np.asarray(uav_locations, dtype=np.float64).reshape(-1, 2)
+        n_uavs = len(self.uav_locations)
+        self.capacity = np.broadcast_to(np.asarray(max_capacity, dtype=np.int64), (n_uavs,)).copy()
+        self.method = method
+        self.k = k
+        self.block_size = block_size
+
+    def assign(self, device_locations, priorities):
+        """
+        Args:
+            device_locations (array-like): (N, 2) device positions.
+            priorities (array-like): (N,) device priorities (higher first).
+
+        Returns:
+            np.ndarray: (N,) index of the assigned UAV per device, -1 if unassigned.
+        """
+        devices = np.asarray(device_locations, dtype=np.float64).reshape(-1, 2)
+        priorities = np.asarray(priorities, dtype=np.float64)
+        order = np.argsort(-priorities, kind="stable")
+
+        if self.method == "optimal":
+            return self._assign_optimal(devices, order)
+        return self._assign_greedy(devices, order)
+
+    def _candidates(self, points, open_uavs):
+        """
+        k nearest open UAVs per point, ordered by (distance, UAV index) so
+        ties resolve to the earlier UAV like the original greedy loop.
+
+        Returns:
+            tuple: (uavs, dist) as (len(points), k) arrays.
+        """
+        k = min(self.k, len(open_uavs))
+        tree = cKDTree(self.uav_locations[open_uavs])
+        dist, idx = tree.query(points, k=k)
+        dist = dist.reshape(len(points), k)
+        uavs = open_uavs[idx.reshape(len(points), k)]
+        # The tree already sorts by distance; only exact ties need reordering
+        if k > 1 and (np.diff(dist, axis=1) == 0).any():
+            ranked = np.lexsort((uavs, dist), axis=-1)
+            uavs = np.take_along_axis(uavs, ranked, axis=1)
+            dist = np.take_along_axis(dist, ranked, axis=1)
+        return uavs, dist
+
+    def _nearest_open(self, point, open_mask):
+        """
+        Exact scan over all open UAVs; lowest index wins distance ties.
+        """
+        dist = np.linalg.norm(self.uav_locations - point, axis=1)
+        dist[~open_mask] = np.inf
+        return int(np.argmin(dist))
+
+    def _assign_greedy(self, devices, order):
+        assigned = np.full(len(devices), -1, dtype=np.int64)
+        remaining = self.capacity.tolist()
+        open_mask = self.capacity > 0
+        open_count = int(open_mask.sum())
+
+        pos = 0
+        n = len(order)
+        while pos < n and open_count > 0:
+            open_uavs = np.flatnonzero(open_mask)
+            # With fewer than k open UAVs the candidate lists are complete
+            truncated = len(open_uavs) > self.k
+            block = order[pos:pos + self.block_size]
+            uavs, dist = self._candidates(devices[block], open_uavs)
+            # First candidate tied with the k-th: beyond it, an equally close UAV
+            # with a lower index may have been cut off by the query
+            first_tied = np.argmax(dist == dist[:, -1:], axis=1).tolist()
+
+            for device, cands, tied in zip(block.tolist(), uavs.tolist(), first_tied):
+                for j, u in enumerate(cands):
+                    if remaining[u] > 0:
+                        if truncated and j >= tied:
+                            u = self._nearest_open(devices[device], open_mask)
+                        remaining[u] -= 1
+                        if remaining[u] == 0:
+                            open_mask[u] = False
+                            open_count -= 1
+                        assigned[device] = u
+                        break
+                else:
+                    # All k candidates filled up: re-query from this device on
+                    break
+                pos += 1
+                if open_count == 0:
+                    break
+
+        return assigned
+
+    def _assign_optimal(self, devices, order):
+        assigned = np.full(len(devices), -1, dtype=np.int64)
+        slots = np.repeat(np.arange(len(self.uav_locations)), self.capacity)
+        if len(slots) == 0:
+            return assigned
+
+        # With more devices than slots, serve the highest-priority ones
+        served = order[:len(slots)]
+        diff = devices[served, None, :] - self.uav_locations[slots][None, :, :]
+        cost = np.sqrt((diff ** 2).sum(axis=-1))
+        rows, cols = linear_sum_assignment(cost)
+        assigned[served[rows]] = slots[cols]
+        return assigned
+
+
+def assignment_cost(device_locations, uav_locations, assigned):
+    """
+    Total device-to-UAV distance of an assignment (unassigned devices ignored).
+    """
+    devices = np.asarray(device_locations, dtype=np.float64).reshape(-1, 2)
+    uavs = np.asarray(uav_locations, dtype=np.float64).reshape(-1, 2)
+    mask = assigned >= 0
+    return float(np.linalg.norm(devices[mask] - uavs[assigned[mask]], axis=1).sum())
+
+
+def group_assignment(assigned, order, device_ids, uav_ids):
+    """
+    Converts a per-device assignment array into priority_aware_greedy()'s
+    {uav_id: [device_id, ...]} format, listing devices in service order.
+    """
+    result = {uav_id: [] for uav_id in uav_ids}
+    served = order[assigned[order] >= 0]
+    for device, uav in zip(served.tolist(), assigned[served].tolist()):
+        result[uav_ids[uav]].append(device_ids[device])
+    return result
+
+
+# Example usage
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    devices = rng.random((100_000, 2)) * 10_000
+    priorities = rng.random(100_000)
+    uavs = rng.random((300, 2)) * 10_000
+
+    engine = AssignmentEngine(uavs, max_capacity=400)
+    start = time.perf_counter()
+    assigned = engine.assign(devices, priorities)
+    print(f"Assigned {np.count_nonzero(assigned >= 0)} devices in {time.perf_counter() - start:.3f}s")
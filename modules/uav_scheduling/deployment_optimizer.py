@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.spatial import cKDTree
 from sklearn.cluster import KMeans
 
 def optimize_uav_positions(device_locations, num_uavs):
@@ -21,6 +22,134 @@ def optimize_uav_positions(device_locations, num_uavs):
     return [tuple(center) for center in kmeans.cluster_centers_]
 
 
+class DeploymentOptimizer:
+    """
+    Stateful UAV deployment for time-stepped simulations.
+
+    The first tick runs the same KMeans(random_state=42) fit as
+    optimize_uav_positions(). Later ticks warm-start Lloyd iterations from the
+    previous UAV centers, which usually converge in a few iterations because
+    devices barely move between ticks; devices may join or leave freely. With
+    batch_size set, ticks run streaming mini-batch updates instead of full
+    Lloyd passes. A full refit happens only when the per-device inertia has
+    drifted more than drift_threshold above the value recorded at the last
+    refit.
+
+    Each tick's report ({'iterations', 'refit', 'inertia', 'drift'}) is kept
+    in self.last_report and appended to self.history.
+    """
+
+    def __init__(self, num_uavs, max_iter=20, tol=1e-4, drift_threshold=0.25, batch_size=None, decay=0.5,
+                 random_state=42):
+        self.num_uavs = num_uavs
+        self.max_iter = max_iter
+        self.tol = tol
+        self.drift_threshold = drift_threshold
+        self.batch_size = batch_size
+        self.decay = decay
+        self.rng = np.random.default_rng(random_state)
+        self.random_state = random_state
+
+        self.centers = None
+        self.counts = None
+        self.reference_inertia = None
+        self.last_report = None
+        self.history = []
+
+    def _refit(self, coords):
+        kmeans = KMeans(n_clusters=self.num_uavs, random_state=self.random_state).fit(coords)
+        self.centers = kmeans.cluster_centers_.copy()
+        self.counts = np.bincount(kmeans.labels_, minlength=self.num_uavs).astype(np.float64)
+        self.reference_inertia = kmeans.inertia_ / len(coords)
+        return kmeans.n_iter_, self.reference_inertia
+
+    def _lloyd(self, coords, tol):
+        iterations = 0
+        for iterations in range(1, self.max_iter + 1):
+            _, labels = cKDTree(self.centers).query(coords)
+            counts = np.bincount(labels, minlength=self.num_uavs)
+            sums_x = np.bincount(labels, weights=coords[:, 0], minlength=self.num_uavs)
+            sums_y = np.bincount(labels, weights=coords[:, 1], minlength=self.num_uavs)
+
+            # Clusters that lost all devices keep their previous position
+            occupied = counts > 0
+            new_centers = self.centers.copy()
+            new_centers[occupied, 0] = sums_x[occupied] / counts[occupied]
+            new_centers[occupied, 1] = sums_y[occupied] / counts[occupied]
+
+            shift = np.sum((new_centers - self.centers) ** 2)
+            self.centers = new_centers
+            self.counts = counts.astype(np.float64)
+            if shift <= tol:
+                break
+        return iterations
+
+    def _minibatch(self, coords, tol):
+        # Older evidence is down-weighted so centers keep following the devices
+        self.counts *= self.decay
+        iterations = 0
+        for iterations in range(1, self.max_iter + 1):
+            batch = coords[self.rng.integers(len(coords), size=min(self.batch_size, len(coords)))]
+            _, labels = cKDTree(self.centers).query(batch)
+            n = np.bincount(labels, minlength=self.num_uavs)
+            sums = np.stack([np.bincount(labels, weights=batch[:, 0], minlength=self.num_uavs),
+                             np.bincount(labels, weights=batch[:, 1], minlength=self.num_uavs)], axis=1)
+
+            # Per-center learning rate n / total count (Sculley, 2010)
+            hit = n > 0
+            self.counts[hit] += n[hit]
+            rate = (n[hit] / self.counts[hit])[:, None]
+            step = rate * (sums[hit] / n[hit][:, None] - self.centers[hit])
+            self.centers[hit] += step
+            if np.sum(step ** 2) <= tol:
+                break
+        return iterations
+
+    def step(self, device_locations):
+        """
+        Updates the UAV deployment for the current device positions.
+
+        Args:
+            device_locations (array-like): (N, 2) device positions this tick.
+
+        Returns:
+            list of tuple: (x, y) UAV deployment locations.
+        """
+        coords = np.asarray(device_locations, dtype=np.float64).reshape(-1, 2)
+        if len(coords) < self.num_uavs:
+            raise ValueError("Not enough devices to place that many UAVs.")
+
+        refit = self.centers is None
+        if refit:
+            iterations, inertia = self._refit(coords)
+            drift = 0.0
+        else:
+            # Same tolerance convention as sklearn's KMeans: relative to data variance
+            tol = self.tol * np.mean(np.var(coords, axis=0))
+            if self.batch_size:
+                iterations = self._minibatch(coords, tol)
+            else:
+                iterations = self._lloyd(coords, tol)
+
+            dist, _ = cKDTree(self.centers).query(coords)
+            inertia = np.sum(dist ** 2) / len(coords)
+            drift = inertia / self.reference_inertia - 1.0 if self.reference_inertia > 0 else 0.0
+
+            if drift > self.drift_threshold:
+                refit_iterations, inertia = self._refit(coords)
+                iterations += refit_iterations
+                refit = True
+
+        self.last_report = {
+            "iterations": int(iterations),
+            "refit": refit,
+            "inertia": float(inertia),
+            "drift": float(drift)
+        }
+        self.history.append(self.last_report)
+        return [tuple(center) for center in self.centers]
+
+
 # Example usage
 if __name__ == "__main__":
     devices = [(2, 3), (3, 3), (8, 9), (7, 8), (10, 10), (1, 2), (3, 4)]
@@ -28,3 +157,12 @@ if __name__ == "__main__":
     positions = optimize_uav_positions(devices, num_uavs)
     print("Optimized UAV Positions:", positions)
 
+    # Time-stepped deployment over slowly moving devices
+    rng = np.random.default_rng(0)
+    moving = rng.random((5000, 2)) * 100
+    optimizer = DeploymentOptimizer(num_uavs=10)
+    for tick in range(5):
+        optimizer.step(moving)
+        print(f"Tick {tick}: {optimizer.last_report}")
+        moving += rng.normal(scale=0.5, size=moving.shape)
+
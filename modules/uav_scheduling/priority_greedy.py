@@ -1,9 +1,13 @@
 
 import numpy as np
 
+from modules.uav_scheduling.assignment_engine import AssignmentEngine, group_assignment
+
 def priority_aware_greedy(devices, uavs, max_capacity=5):
     """
-    Assigns devices to UAVs using priority-aware greedy logic.
+    Assigns devices to UAVs using priority-aware greedy logic: devices are
+    served in descending priority and each takes its nearest UAV with spare
+    capacity. Runs on AssignmentEngine, which scales to 100k+ devices.
 
     Args:
         devices (list of dict): [{'id': int, 'priority': float, 'location': (x, y)}]
@@ -13,28 +17,15 @@ def priority_aware_greedy(devices, uavs, max_capacity=5):
     Returns:
         dict: UAV ID → List of assigned device IDs
     """
-    assignment = {uav['id']: [] for uav in uavs}
-
-    # Sort devices by priority (high to low)
-    sorted_devices = sorted(devices, key=lambda x: -x['priority'])
-
-    for device in sorted_devices:
-        best_uav = None
-        best_distance = float('inf')
-
-        for uav in uavs:
-            if len(assignment[uav['id']]) >= max_capacity:
-                continue
-
-            dist = np.linalg.norm(np.array(device['location']) - np.array(uav['location']))
-            if dist < best_distance:
-                best_distance = dist
-                best_uav = uav
+    device_ids = [device['id'] for device in devices]
+    uav_ids = [uav['id'] for uav in uavs]
+    priorities = np.array([device['priority'] for device in devices], dtype=np.float64)
 
-        if best_uav:
-            assignment[best_uav['id']].append(device['id'])
+    engine = AssignmentEngine([uav['location'] for uav in uavs], max_capacity=max_capacity)
+    assigned = engine.assign([device['location'] for device in devices], priorities)
 
-    return assignment
+    order = np.argsort(-priorities, kind="stable")
+    return group_assignment(assigned, order, device_ids, uav_ids)
 
 
 # Example usage
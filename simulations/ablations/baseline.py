@@ -1,3 +1,3 @@
-# simulations/ablation/baseline.py
+# simulations/ablations/baseline.py
 USE_DIGITAL_TWIN = False
 USE_SEMANTIC_SELECTION = False
@@ -1,3 +1,3 @@
-# simulations/ablation/config.py
+# simulations/ablations/config.py
 USE_DIGITAL_TWIN = True
 USE_SEMANTIC_SELECTION = True
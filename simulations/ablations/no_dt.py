@@ -1,3 +1,3 @@
-# simulations/ablation/no_dt.py
+# simulations/ablations/no_dt.py
 USE_DIGITAL_TWIN = False
 USE_SEMANTIC_SELECTION = True
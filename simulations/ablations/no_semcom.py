@@ -1,3 +1,3 @@
-# simulations/ablation/no_semcom.py
+# simulations/ablations/no_semcom.py
 USE_DIGITAL_TWIN = True
 USE_SEMANTIC_SELECTION = False
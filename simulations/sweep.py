@@ -0,0 +1,132 @@
+"""
+Runs an ablation x dataset x seed grid across a process pool.
+
+Every job runs main.run_experiment() in its own process with its ablation
+config passed in memory, and writes into its own run directory
+(<sweep_dir>/runs/<ablation>-<dataset>-s<seed>/, including summary.json and
+the job's console output). The machine's cores are split between the
+concurrent jobs (--cpus per run, sequential local training) so nested DT
+pools and forests don't oversubscribe it. When all jobs are done the per-run summaries are
+merged into <sweep_dir>/results.csv (one row per run) and
+<sweep_dir>/results_summary.csv (mean/std over seeds).
+
+Usage:
+    python -m simulations.sweep --ablations default no_dt --datasets env_sensors casas --seeds 0 1 2 --jobs 4
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import torch
+
+from main import ABLATIONS, build_parser, load_ablation_config, run_experiment
+
+RESULT_COLUMNS = ["avg_reward", "avg_delay", "avg_energy", "migration_rate", "avg_loss", "avg_divergence"]
+
+
+def _init_job(num_threads):
+    torch.set_num_threads(num_threads)
+
+
+def run_job(sweep_dir, ablation, dataset, seed, extra_args=(), cpus_per_job=1):
+    """
+    Runs one grid cell; console output goes to the run's output.log.
+
+    Returns:
+        dict: The run summary, or None if the dataset had no usable clients.
+    """
+    run_name = f"{ablation}-{dataset}-s{seed}"
+    run_dir = os.path.join(sweep_dir, "runs", run_name)
+    os.makedirs(run_dir, exist_ok=True)
+
+    args = build_parser().parse_args([
+        "--dataset", dataset, "--ablation", ablation, "--seed", str(seed),
+        # Concurrent jobs share sweep_dir, so none of them claims its latest_run.txt
+        "--log-dir", sweep_dir, "--run-name", run_name, "--no-latest",
+        # Defaults first so explicit extra_args (e.g. --workers) still win
+        "--cpus", str(cpus_per_job), "--workers", "1", *extra_args
+    ])
+    with open(os.path.join(run_dir, "output.log"), "w") as log_file, contextlib.redirect_stdout(log_file):
+        return run_experiment(args, ablation_config=load_ablation_config(ablation))
+
+
+def collect_results(sweep_dir):
+    """
+    Merges every <sweep_dir>/runs/*/summary.json into one table.
+
+    Returns:
+        pd.DataFrame: One row per run with its final-round metrics.
+    """
+    rows = []
+    runs_dir = os.path.join(sweep_dir, "runs")
+    for name in sorted(os.listdir(runs_dir)):
+        path = os.path.join(runs_dir, name, "summary.json")
+        if not os.path.exists(path):
+            continue
+        with open(path) as file:
+            summary = json.load(file)
+        final = summary["final"] or {}
+        row = {key: summary[key] for key in ("ablation", "dataset", "seed", "clients", "rounds", "wall_time_s")}
+        row.update({column: final.get(column) for column in RESULT_COLUMNS})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def run_sweep(ablations, datasets, seeds, jobs=1, threads_per_job=1, sweep_dir=None, extra_args=()):
+    sweep_dir = sweep_dir or os.path.join("logs", "sweeps", time.strftime("%Y%m%d-%H%M%S"))
+    os.makedirs(sweep_dir, exist_ok=True)
+    grid = list(itertools.product(ablations, datasets, seeds))
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(grid)))
+    cpus_per_job = max(1, (os.cpu_count() or 1) // jobs)
+    print(f"🧪 Sweep of {len(grid)} runs on {jobs} process(es) × {cpus_per_job} core(s) → {sweep_dir}")
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, initializer=_init_job,
+                             initargs=(threads_per_job,)) as pool:
+        futures = {
+            pool.submit(run_job, sweep_dir, ablation, dataset, seed, tuple(extra_args), cpus_per_job):
+                (ablation, dataset, seed)
+            for ablation, dataset, seed in grid
+        }
+        for future in as_completed(futures):
+            ablation, dataset, seed = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"❌ {ablation}/{dataset}/seed={seed} failed: {e}")
+                continue
+            if summary is None:
+                print(f"⚠️ {ablation}/{dataset}/seed={seed}: no usable clients")
+            else:
+                print(f"✅ {ablation}/{dataset}/seed={seed}: final avg reward {summary['final']['avg_reward']}")
+
+    results = collect_results(sweep_dir)
+    results.to_csv(os.path.join(sweep_dir, "results.csv"), index=False)
+    if not results.empty:
+        aggregated = results.groupby(["ablation", "dataset"])[RESULT_COLUMNS].agg(["mean", "std"])
+        aggregated.columns = [f"{metric}_{stat}" for metric, stat in aggregated.columns]
+        aggregated.reset_index().to_csv(os.path.join(sweep_dir, "results_summary.csv"), index=False)
+    print(f"📊 Results table written to {os.path.join(sweep_dir, 'results.csv')}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an ablation x dataset x seed sweep in parallel.")
+    parser.add_argument('--ablations', nargs='+', choices=ABLATIONS, default=ABLATIONS)
+    parser.add_argument('--datasets', nargs='+', choices=['env_sensors', 'casas', 'visdrone'], default=['env_sensors'])
+    parser.add_argument('--seeds', nargs='+', type=int, default=[0, 1, 2])
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Concurrent runs")
+    parser.add_argument('--threads-per-job', type=int, default=1, help="Torch intra-op threads per run")
+    parser.add_argument('--sweep-dir', type=str, default=None, help="Output directory (default logs/sweeps/<timestamp>)")
+    args, extra = parser.parse_known_args()
+
+    results = run_sweep(args.ablations, args.datasets, args.seeds, jobs=args.jobs,
+                        threads_per_job=args.threads_per_job, sweep_dir=args.sweep_dir, extra_args=extra)
+    if not results.empty:
+        print(results.to_string(index=False))
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from modules.uav_scheduling.assignment_engine import AssignmentEngine
+from modules.uav_scheduling.priority_greedy import priority_aware_greedy
+
+
+def baseline_priority_greedy(devices, uavs, max_capacity=5):
+    """
+    The original per-device scan that AssignmentEngine replaced, kept
+    verbatim as the reference.
+    """
+    assignment = {uav['id']: [] for uav in uavs}
+    sorted_devices = sorted(devices, key=lambda x: -x['priority'])
+
+    for device in sorted_devices:
+        best_uav = None
+        best_distance = float('inf')
+
+        for uav in uavs:
+            if len(assignment[uav['id']]) >= max_capacity:
+                continue
+
+            dist = np.linalg.norm(np.array(device['location']) - np.array(uav['location']))
+            if dist < best_distance:
+                best_distance = dist
+                best_uav = uav
+
+        if best_uav:
+            assignment[best_uav['id']].append(device['id'])
+
+    return assignment
+
+
+def _case(rng, n_devices, n_uavs, grid=None, priority_levels=None, far_fraction=0.0):
+    if grid:
+        # Integer grids produce many exact distance ties
+        device_xy = rng.integers(0, grid, size=(n_devices, 2)).astype(float)
+        uav_xy = rng.integers(0, grid, size=(n_uavs, 2)).astype(float)
+    else:
+        device_xy = rng.random((n_devices, 2)) * 100
+        uav_xy = rng.random((n_uavs, 2)) * 100
+    # Devices far outside the UAVs' area
+    n_far = int(n_devices * far_fraction)
+    device_xy[:n_far] += 1e4
+
+    if priority_levels:
+        priorities = rng.integers(0, priority_levels, size=n_devices) / priority_levels
+    else:
+        priorities = rng.random(n_devices)
+
+    devices = [{'id': i, 'priority': float(p), 'location': tuple(xy)}
+               for i, (p, xy) in enumerate(zip(priorities, device_xy))]
+    uavs = [{'id': f"UAV{j}", 'location': tuple(xy)} for j, xy in enumerate(uav_xy)]
+    return devices, uavs
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_baseline_greedy_on_random_cases(seed):
+    rng = np.random.default_rng(seed)
+    devices, uavs = _case(rng, n_devices=int(rng.integers(1, 400)), n_uavs=int(rng.integers(1, 40)),
+                          far_fraction=0.1)
+    capacity = int(rng.integers(1, 12))
+    assert priority_aware_greedy(devices, uavs, capacity) == baseline_priority_greedy(devices, uavs, capacity)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_baseline_greedy_with_ties(seed):
+    rng = np.random.default_rng(1000 + seed)
+    # Equal priorities and integer positions: ties in both service order and distance
+    devices, uavs = _case(rng, n_devices=int(rng.integers(1, 300)), n_uavs=int(rng.integers(1, 30)),
+                          grid=6, priority_levels=3, far_fraction=0.05)
+    capacity = int(rng.integers(1, 8))
+    assert priority_aware_greedy(devices, uavs, capacity) == baseline_priority_greedy(devices, uavs, capacity)
+
+
+def test_small_k_and_blocks_force_requeries():
+    rng = np.random.default_rng(7)
+    devices, uavs = _case(rng, n_devices=500, n_uavs=25, grid=10, priority_levels=4)
+    expected = baseline_priority_greedy(devices, uavs, 6)
+
+    engine = AssignmentEngine([u['location'] for u in uavs], max_capacity=6, k=2, block_size=16)
+    priorities = np.array([d['priority'] for d in devices])
+    assigned = engine.assign([d['location'] for d in devices], priorities)
+
+    result = {u['id']: [] for u in uavs}
+    for device in sorted(devices, key=lambda x: -x['priority']):
+        if assigned[device['id']] >= 0:
+            result[uavs[assigned[device['id']]]['id']].append(device['id'])
+    assert result == expected
+
+
+def test_more_devices_than_capacity_leaves_lowest_priority_unassigned():
+    engine = AssignmentEngine([(0.0, 0.0)], max_capacity=2)
+    assigned = engine.assign([(1, 0), (2, 0), (3, 0)], [0.1, 0.9, 0.5])
+    assert assigned.tolist() == [-1, 0, 0]
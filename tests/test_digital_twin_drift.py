@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.digital_twin.state_predictor import DigitalTwinPredictor
+
+
+def _telemetry(n, seed, energy_shift=0.0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n, 4)), columns=['rssi', 'cpu_load', 'task_size', 'queue_length'])
+    df['delay'] = 0.05 + df['rssi'] * 0.1 + df['cpu_load'] * 0.1 + rng.normal(0, 0.01, n)
+    df['energy'] = 0.02 + df['task_size'] * 0.2 + df['queue_length'] * 0.1 + energy_shift + rng.normal(0, 0.01, n)
+    return df
+
+
+def _stream(dt, df, batch=50):
+    for start in range(0, len(df), batch):
+        dt.partial_fit(df.iloc[start:start + batch])
+
+
+@pytest.mark.parametrize("backend", ["forest", "grid"])
+def test_stationary_stream_does_not_need_refit(backend):
+    dt = DigitalTwinPredictor(n_estimators=30, random_state=0, energy_backend=backend)
+    dt.train(_telemetry(3000, seed=0))
+    _stream(dt, _telemetry(1000, seed=1))
+    assert dt.rows_since_fit == 1000
+    assert not dt.needs_refit
+    assert dt.drift < dt.drift_threshold
+
+
+def test_drift_starting_right_after_fit_is_detected():
+    dt = DigitalTwinPredictor(n_estimators=30, random_state=0)
+    dt.train(_telemetry(3000, seed=0))
+    # The shift is present from the very first streamed row
+    _stream(dt, _telemetry(1000, seed=1, energy_shift=0.05))
+    assert dt.needs_refit
+
+    dt.refit()
+    assert dt.rows_since_fit == 0 and not dt.needs_refit
+    _stream(dt, _telemetry(500, seed=2, energy_shift=0.05))
+    assert not dt.needs_refit
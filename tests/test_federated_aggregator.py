@@ -0,0 +1,80 @@
+import copy
+
+import pytest
+import torch
+
+from modules.ddpg.ddpg_agent import Actor
+from modules.fdr.federated_aggregator import StreamingFedAvg, fed_avg, weighted_fed_avg
+
+
+def baseline_fed_avg(local_weights):
+    """
+    The original per-key FedAvg that StreamingFedAvg replaced.
+    """
+    global_weights = copy.deepcopy(local_weights[0])
+    for key in global_weights.keys():
+        for i in range(1, len(local_weights)):
+            global_weights[key] += local_weights[i][key]
+        global_weights[key] = global_weights[key] / len(local_weights)
+    return global_weights
+
+
+def baseline_weighted_fed_avg(local_weights, local_sizes):
+    """
+    The original weighted FedAvg that StreamingFedAvg replaced.
+    """
+    total_size = sum(local_sizes)
+    global_weights = copy.deepcopy(local_weights[0])
+    for key in global_weights.keys():
+        global_weights[key] = global_weights[key] * (local_sizes[0] / total_size)
+        for i in range(1, len(local_weights)):
+            global_weights[key] += local_weights[i][key] * (local_sizes[i] / total_size)
+    return global_weights
+
+
+def _client_states(n, seed=0):
+    torch.manual_seed(seed)
+    return [Actor(5, 1).state_dict() for _ in range(n)]
+
+
+def _assert_close(result, expected):
+    assert result.keys() == expected.keys()
+    for key in expected:
+        assert result[key].dtype == expected[key].dtype
+        torch.testing.assert_close(result[key], expected[key], rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("n_clients", [1, 2, 7])
+def test_fed_avg_matches_baseline(n_clients):
+    states = _client_states(n_clients)
+    _assert_close(fed_avg(states), baseline_fed_avg(states))
+
+
+def test_weighted_fed_avg_matches_baseline():
+    states = _client_states(5, seed=1)
+    sizes = [10, 250, 3, 77, 1000]
+    _assert_close(weighted_fed_avg(states, sizes), baseline_weighted_fed_avg(states, sizes))
+
+
+def test_zero_weight_clients_are_skipped():
+    states = _client_states(5, seed=2)
+    sizes = [0, 40, 0, 15, 5]
+    kept = [(s, w) for s, w in zip(states, sizes) if w > 0]
+    expected = baseline_weighted_fed_avg([s for s, _ in kept], [w for _, w in kept])
+
+    aggregator = StreamingFedAvg(states[0])
+    for state, size in zip(states, sizes):
+        aggregator.add(state, weight=size)
+    assert (aggregator.count, aggregator.skipped) == (3, 2)
+    _assert_close(aggregator.result(), expected)
+
+
+def test_all_zero_weights_and_negative_weights_raise():
+    states = _client_states(2, seed=3)
+    aggregator = StreamingFedAvg(states[0])
+    aggregator.add(states[0], weight=0)
+    aggregator.add(states[1], weight=0)
+    with pytest.raises(ValueError, match="zero weight"):
+        aggregator.result()
+    with pytest.raises(ValueError):
+        aggregator.add(states[1], weight=-1)
@@ -0,0 +1,42 @@
+import pytest
+
+from utils.logger import RunLogger, latest_run_dir, read_log
+
+
+def _log_round(log_dir, run_name, fmt, reward):
+    with RunLogger(log_dir=log_dir, run_name=run_name, fmt=fmt) as logger:
+        logger.log_step(round_id=1, client_id=0, step=0, reward=reward, delay=0.1, energy=0.05, migration_flag=False)
+        logger.flush()
+        logger.log_step(round_id=2, client_id=0, step=1, reward=reward, delay=0.1, energy=0.05, migration_flag=True)
+    return logger.run_dir
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_reopening_run_name_replaces_previous_run(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+
+    _log_round(str(tmp_path), "sweep-job", fmt, reward=-1.0)
+    run_dir = _log_round(str(tmp_path), "sweep-job", fmt, reward=-2.0)
+
+    df = read_log("training_log", run_dir)
+    assert df["round"].tolist() == [1, 2]
+    assert (df["reward"] == -2.0).all()
+
+
+def test_switching_format_removes_stale_table(tmp_path):
+    pytest.importorskip("pyarrow")
+
+    _log_round(str(tmp_path), "run", "parquet", reward=-1.0)
+    run_dir = _log_round(str(tmp_path), "run", "csv", reward=-2.0)
+
+    # read_log prefers Parquet, so an old .parquet must not survive a CSV rerun
+    assert (read_log("training_log", run_dir)["reward"] == -2.0).all()
+
+
+def test_update_latest_false_leaves_pointer_alone(tmp_path):
+    first = _log_round(str(tmp_path), "first", "csv", reward=-1.0)
+    with RunLogger(log_dir=str(tmp_path), run_name="sweep-job", update_latest=False):
+        pass
+
+    assert latest_run_dir(str(tmp_path)) == first
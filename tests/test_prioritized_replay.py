@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from modules.ddpg.prioritized_replay_buffer import MinSegmentTree, PrioritizedReplayBuffer, SumSegmentTree
+
+CAPACITY = 100  # not a power of two, so padding leaves are exercised
+
+
+def _random_updates(rng, sum_tree, min_tree, priorities, rounds=50):
+    for _ in range(rounds):
+        if rng.random() < 0.5:
+            idx = int(rng.integers(CAPACITY))
+            value = float(rng.uniform(0.01, 10.0))
+            sum_tree.update([idx], value)
+            min_tree.update_one(idx, value)
+            priorities[idx] = value
+        else:
+            idx = rng.integers(CAPACITY, size=rng.integers(2, 20))
+            idx = np.unique(idx)
+            values = rng.uniform(0.01, 10.0, size=len(idx))
+            sum_tree.update(idx, values)
+            min_tree.update(idx, values)
+            priorities[idx] = values
+        yield
+
+
+def test_trees_match_oracles_after_batched_and_single_updates():
+    rng = np.random.default_rng(0)
+    sum_tree, min_tree = SumSegmentTree(CAPACITY), MinSegmentTree(CAPACITY)
+    priorities = np.zeros(CAPACITY)
+    initial = rng.uniform(0.01, 10.0, size=CAPACITY)
+    sum_tree.update(np.arange(CAPACITY), initial)
+    min_tree.update(np.arange(CAPACITY), initial)
+    priorities[:] = initial
+
+    for _ in _random_updates(rng, sum_tree, min_tree, priorities):
+        assert sum_tree.total() == pytest.approx(priorities.sum())
+        assert min_tree.min() == pytest.approx(priorities.min())
+
+        prefix = rng.uniform(0, priorities.sum(), size=64)
+        expected = np.searchsorted(np.cumsum(priorities), prefix, side="right")
+        np.testing.assert_array_equal(sum_tree.find_prefixsum_idx(prefix), expected)
+
+
+def test_fused_add_path_matches_batched_updates():
+    buffer = PrioritizedReplayBuffer(CAPACITY, state_dim=3, action_dim=1)
+    rng = np.random.default_rng(1)
+    for _ in range(CAPACITY + 30):  # wraps around the ring buffer
+        buffer.add(np.zeros(3), np.zeros(1), np.zeros(3), 0.0, 0.0)
+        buffer.update_priorities([buffer.ptr - 1 if buffer.ptr else CAPACITY - 1], [rng.uniform(0.1, 5.0)])
+
+    reference_sum, reference_min = SumSegmentTree(CAPACITY), MinSegmentTree(CAPACITY)
+    leaves = buffer.sum_tree[np.arange(CAPACITY)]
+    reference_sum.update(np.arange(CAPACITY), leaves)
+    reference_min.update(np.arange(CAPACITY), leaves)
+    np.testing.assert_allclose(buffer.sum_tree.tree, reference_sum.tree)
+    np.testing.assert_allclose(buffer.min_tree.tree, reference_min.tree)
+
+
+def test_sample_without_replacement_has_no_duplicates():
+    np.random.seed(0)
+    buffer = PrioritizedReplayBuffer(CAPACITY, state_dim=3, action_dim=1)
+    for _ in range(60):
+        buffer.add(np.zeros(3), np.zeros(1), np.zeros(3), 0.0, 0.0)
+    # A few dominant priorities make duplicates likely under replacement
+    buffer.update_priorities(np.arange(60), np.r_[np.full(3, 1e3), np.full(57, 1e-3)])
+
+    for batch_size in (1, 10, 60):
+        indices = buffer.sample_indices(batch_size, replace=False)
+        assert len(indices) == batch_size
+        assert len(np.unique(indices)) == batch_size
+        assert indices.max() < buffer.size
+
+    with pytest.raises(ValueError):
+        buffer.sample_indices(61, replace=False)
@@ -1,42 +1,194 @@
-import csv
 import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.profiling import timed
+
+# Column layout of every table a run writes
+LOG_SCHEMAS = {
+    "training_log": [("round", np.int32), ("client", np.int32), ("step", np.int32), ("reward", np.float64),
+                     ("delay", np.float64), ("energy", np.float64), ("migration", np.int8)],
+    "semantic_log": [("round", np.int32), ("client", np.int32), ("step", np.int32),
+                     ("semantic_score", np.float64), ("energy", np.float64)],
+    "loss_log": [("round", np.int32), ("client", np.int32), ("step", np.int32), ("loss", np.float64)],
+    "fl_divergence": [("round", np.int32), ("client", np.int32), ("divergence", np.float64)],
+    "phase_log": [("round", np.int32), ("phase", object), ("seconds", np.float64), ("calls", np.int64)],
+    "round_metrics": [("round", np.int32), ("wall_time_s", np.float64), ("steps", np.int64),
+                      ("steps_per_s", np.float64), ("peak_rss_mb", np.float64)],
+}
+
+LATEST_RUN_FILE = "latest_run.txt"
+
+
+class RunLogger:
+    """
+    Buffers log rows in memory and writes them in bulk into a per-run
+    directory (logs/runs/<run_name>/), one file per table.
+
+    Rows are flushed when flush() is called (main.py does so at every round
+    boundary) or when a table holds flush_every rows. fmt="parquet" writes
+    one row group per flush through pyarrow instead of appending to CSV.
+
+    Reusing an existing run_name replaces that run: its log tables (in
+    either format) are deleted when the logger is created.
+
+    The run is recorded as <log_dir>/latest_run.txt for the plotters unless
+    update_latest is False (sweep jobs share a log_dir and skip it).
+    """
+
+    def __init__(self, log_dir="logs", run_name=None, fmt="csv", flush_every=10000, update_latest=True):
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unsupported log format: {fmt}")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError("Parquet logging requires pyarrow (pip install pyarrow).") from e
+
+        run_name = run_name or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.run_dir = os.path.join(log_dir, "runs", run_name)
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._clear_tables()
+        if update_latest:
+            with open(os.path.join(log_dir, LATEST_RUN_FILE), "w") as file:
+                file.write(self.run_dir)
+
+        self.fmt = fmt
+        self.flush_every = flush_every
+        self.buffers = {name: [] for name in LOG_SCHEMAS}
+        self.writers = {}
+
+    def _clear_tables(self):
+        cleared = 0
+        for table in LOG_SCHEMAS:
+            for fmt in ("csv", "parquet"):
+                stale = os.path.join(self.run_dir, f"{table}.{fmt}")
+                if os.path.exists(stale):
+                    os.remove(stale)
+                    cleared += 1
+        if cleared:
+            print(f"♻️ Replacing {cleared} log file(s) of existing run {self.run_dir}")
+
+    def path(self, table):
+        return os.path.join(self.run_dir, f"{table}.{self.fmt}")
+
+    def log_rows(self, table, rows):
+        buffer = self.buffers[table]
+        buffer.extend(rows)
+        if len(buffer) >= self.flush_every:
+            self._flush_table(table)
+
+    def log_step(self, round_id, client_id, step, reward, delay, energy, migration_flag):
+        self.log_rows("training_log", [(round_id, client_id, step, reward, delay, energy, int(migration_flag))])
+
+    def log_semcom(self, round_id, client_id, step, semantic_score, energy):
+        self.log_rows("semantic_log", [(round_id, client_id, step, semantic_score, energy)])
+
+    def log_loss(self, round_id, client_id, step, loss):
+        self.log_rows("loss_log", [(round_id, client_id, step, loss)])
+
+    def log_divergence(self, round_id, client_id, divergence_value):
+        self.log_rows("fl_divergence", [(round_id, client_id, divergence_value)])
+
+    def log_phases(self, round_id, snapshot):
+        """
+        Logs a PhaseTimer snapshot (see utils.profiling) for one round.
+        """
+        self.log_rows("phase_log", [(round_id, name, seconds, calls)
+                                    for name, (seconds, calls) in snapshot["phases"].items()])
+
+    def log_round_metrics(self, round_id, wall_time, steps, peak_rss_mb):
+        self.log_rows("round_metrics", [(round_id, wall_time, steps, steps / wall_time if wall_time > 0 else 0.0,
+                                         peak_rss_mb)])
+
+    def _flush_table(self, table):
+        rows = self.buffers[table]
+        if not rows:
+            return
+        schema = LOG_SCHEMAS[table]
+        columns = zip(*rows)
+        frame = pd.DataFrame({name: np.asarray(values, dtype=dtype)
+                              for (name, dtype), values in zip(schema, columns)})
+        self.buffers[table] = []
+
+        if self.fmt == "csv":
+            path = self.path(table)
+            write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+            frame.to_csv(path, mode="a", header=write_header, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            arrow_table = pa.Table.from_pandas(frame, preserve_index=False)
+            if table not in self.writers:
+                self.writers[table] = pq.ParquetWriter(self.path(table), arrow_table.schema)
+            self.writers[table].write_table(arrow_table)
+
+    def flush(self, timer=None):
+        """
+        Writes every buffered row; an optional PhaseTimer records it as 'log_flush'.
+        """
+        with timed(timer, "log_flush"):
+            for table in self.buffers:
+                self._flush_table(table)
+
+    def close(self):
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def latest_run_dir(log_dir="logs"):
+    """
+    Returns the directory of the most recent RunLogger run, falling back to
+    log_dir itself for logs written before runs were scoped.
+    """
+    pointer = os.path.join(log_dir, LATEST_RUN_FILE)
+    if os.path.exists(pointer):
+        with open(pointer) as file:
+            run_dir = file.read().strip()
+        if os.path.isdir(run_dir):
+            return run_dir
+    return log_dir
+
+
+def read_log(table, run_dir=None, columns=None):
+    """
+    Loads one log table of a run, preferring the Parquet file over CSV.
+
+    Args:
+        table (str): Table name, e.g. 'training_log' or 'fl_divergence'.
+        run_dir (str): Run directory. Defaults to the latest run.
+        columns (list): Optional subset of columns to load.
+
+    Returns:
+        pd.DataFrame: The table, or None if the run has no such log.
+    """
+    run_dir = run_dir or latest_run_dir()
+    parquet_path = os.path.join(run_dir, f"{table}.parquet")
+    csv_path = os.path.join(run_dir, f"{table}.csv")
+
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path, columns=columns)
+    if os.path.exists(csv_path):
+        dtypes = {name: dtype for name, dtype in LOG_SCHEMAS.get(table, [])}
+        if columns is not None:
+            dtypes = {name: dtypes[name] for name in columns if name in dtypes}
+        return pd.read_csv(csv_path, usecols=columns, dtype=dtypes)
+    return None
+
 
-def init_logger(log_dir="logs", filename="training_log.csv"):
-    os.makedirs(log_dir, exist_ok=True)
-    filepath = os.path.join(log_dir, filename)
-    with open(filepath, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(["round", "client", "step", "reward", "delay", "energy", "migration"])
-    return filepath
-
-def log_step(filepath, round_id, client_id, step, reward, delay, energy, migration_flag):
-    with open(filepath, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([round_id, client_id, step, reward, delay, energy, int(migration_flag)])
-
-def log_semcom(round_id, client_id, step, semantic_score, energy):
-    path = os.path.join("logs", "semantic_log.csv")
-    if not os.path.exists(path):
-        with open(path, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["round", "client", "step", "semantic_score", "energy"])
-    with open(path, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([round_id, client_id, step, semantic_score, energy])
-
-
-def log_divergence(round_id, client_id, divergence_value):
-    path = os.path.join("logs", "fl_divergence.csv")
-    if not os.path.exists(path):
-        with open(path, mode='w', newline='') as file:
-            writer = csv.writer(file)
-            writer.writerow(["round", "client", "divergence"])
-    with open(path, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow([round_id, client_id, divergence_value])
 # Example usage
 if __name__ == "__main__":
-    path = init_logger()
-    log_step(path, round_id=1, client_id=0, step=10, reward=-0.4, delay=0.12, energy=0.08, migration_flag=True)
+    with RunLogger(run_name="example") as logger:
+        logger.log_step(round_id=1, client_id=0, step=10, reward=-0.4, delay=0.12, energy=0.08, migration_flag=True)
+    print(read_log("training_log", logger.run_dir))
     print("✅ Logging complete.")
-
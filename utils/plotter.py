@@ -1,12 +1,17 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
+
+from utils.logger import latest_run_dir, read_log
 
 sns.set(style="whitegrid")
 
-def plot_metrics(log_file="logs/training_log.csv"):
-    df = pd.read_csv(log_file)
+def plot_metrics(run_dir=None):
+    run_dir = run_dir or latest_run_dir()
+    df = read_log("training_log", run_dir, columns=["round", "reward", "delay", "energy", "migration"])
+    if df is None:
+        raise FileNotFoundError("Training log not found. Run main.py first to generate logs.")
 
     # Compute average per round
     grouped = df.groupby("round").agg({
@@ -23,7 +28,7 @@ def plot_metrics(log_file="logs/training_log.csv"):
     plt.xlabel("Round")
     plt.ylabel("Reward")
     plt.tight_layout()
-    plt.savefig("logs/reward_plot.png")
+    plt.savefig(os.path.join(run_dir, "reward_plot.png"))
     plt.close()
 
     # Plot Delay
@@ -33,7 +38,7 @@ def plot_metrics(log_file="logs/training_log.csv"):
     plt.xlabel("Round")
     plt.ylabel("Delay")
     plt.tight_layout()
-    plt.savefig("logs/delay_plot.png")
+    plt.savefig(os.path.join(run_dir, "delay_plot.png"))
     plt.close()
 
     # Plot Energy
@@ -43,7 +48,7 @@ def plot_metrics(log_file="logs/training_log.csv"):
     plt.xlabel("Round")
     plt.ylabel("Energy")
     plt.tight_layout()
-    plt.savefig("logs/energy_plot.png")
+    plt.savefig(os.path.join(run_dir, "energy_plot.png"))
     plt.close()
 
     # Plot Migrations
@@ -53,11 +58,11 @@ def plot_metrics(log_file="logs/training_log.csv"):
     plt.xlabel("Round")
     plt.ylabel("Migrations")
     plt.tight_layout()
-    plt.savefig("logs/migration_plot.png")
+    plt.savefig(os.path.join(run_dir, "migration_plot.png"))
     plt.close()
 
-    print("\n✅ Plots saved to /logs directory")
+    print(f"\n✅ Plots saved to {run_dir}")
 
 if __name__ == "__main__":
-    plot_metrics()
+    plot_metrics(sys.argv[1] if len(sys.argv) > 1 else None)
 
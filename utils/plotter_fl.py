@@ -1,17 +1,18 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
+
+from utils.logger import latest_run_dir, read_log
 
 sns.set(style="whitegrid")
 
-# Load divergence log
-div_file = "logs/fl_divergence.csv"
-if not os.path.exists(div_file):
+# Load divergence log (run directory from argv, latest run by default)
+run_dir = sys.argv[1] if len(sys.argv) > 1 else latest_run_dir()
+df_div = read_log("fl_divergence", run_dir)
+if df_div is None:
     raise FileNotFoundError("FL divergence log not found. Run main.py first to generate logs.")
 
-df_div = pd.read_csv(div_file)
-
 # --- Plot 1: Model Divergence per Round ---
 plt.figure(figsize=(10, 5))
 sns.boxplot(data=df_div, x="round", y="divergence", palette="Blues")
@@ -19,7 +20,7 @@ plt.title("Model Divergence Across Rounds")
 plt.xlabel("Federated Round")
 plt.ylabel("Cosine Divergence")
 plt.tight_layout()
-plt.savefig("logs/fl_divergence_trend.png")
+plt.savefig(os.path.join(run_dir, "fl_divergence_trend.png"))
 plt.close()
 
 # --- Plot 2: Client Participation Heatmap ---
@@ -30,7 +31,7 @@ plt.title("Client Participation Across Rounds")
 plt.xlabel("Client ID")
 plt.ylabel("Federated Round")
 plt.tight_layout()
-plt.savefig("logs/client_participation_heatmap.png")
+plt.savefig(os.path.join(run_dir, "client_participation_heatmap.png"))
 plt.close()
 
-print("✅ FL plots saved to logs/:\n - fl_divergence_trend.png\n - client_participation_heatmap.png")
+print(f"✅ FL plots saved to {run_dir}:\n - fl_divergence_trend.png\n - client_participation_heatmap.png")
@@ -1,16 +1,17 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
+
+from utils.logger import latest_run_dir, read_log
 
 sns.set(style="whitegrid")
 
-log_file = "logs/training_log.csv"
-if not os.path.exists(log_file):
+run_dir = sys.argv[1] if len(sys.argv) > 1 else latest_run_dir()
+df = read_log("training_log", run_dir, columns=["round", "client", "reward", "delay", "energy"])
+if df is None:
     raise FileNotFoundError("Training log not found. Please run main.py first.")
 
-df = pd.read_csv(log_file)
-
 # --- Plot 1: Average Reward per Round ---
 reward_summary = df.groupby("round")["reward"].mean().reset_index()
 plt.figure(figsize=(10, 5))
@@ -19,7 +20,7 @@ plt.title("Average Reward per Federated Round")
 plt.xlabel("Federated Round")
 plt.ylabel("Mean Reward")
 plt.tight_layout()
-plt.savefig("logs/reward_trend.png")
+plt.savefig(os.path.join(run_dir, "reward_trend.png"))
 plt.close()
 
 # --- Plot 2: Energy Consumption per Client ---
@@ -29,7 +30,7 @@ plt.title("Energy Consumption Distribution per Client")
 plt.xlabel("Client ID")
 plt.ylabel("Energy")
 plt.tight_layout()
-plt.savefig("logs/energy_per_client.png")
+plt.savefig(os.path.join(run_dir, "energy_per_client.png"))
 plt.close()
 
 # --- Plot 3: Delay Distribution per Client ---
@@ -39,13 +40,12 @@ plt.title("Delay Distribution per Client")
 plt.xlabel("Client ID")
 plt.ylabel("Delay")
 plt.tight_layout()
-plt.savefig("logs/delay_per_client.png")
+plt.savefig(os.path.join(run_dir, "delay_per_client.png"))
 plt.close()
 
 # --- Plot 4: Learning Loss per Round (if available) ---
-loss_file = "logs/loss_log.csv"
-if os.path.exists(loss_file):
-    df_loss = pd.read_csv(loss_file)
+df_loss = read_log("loss_log", run_dir, columns=["round", "loss"])
+if df_loss is not None and not df_loss.empty:
     loss_summary = df_loss.groupby("round")["loss"].mean().reset_index()
     plt.figure(figsize=(10, 5))
     sns.lineplot(data=loss_summary, x="round", y="loss", marker="o", color="red")
@@ -53,10 +53,10 @@ if os.path.exists(loss_file):
     plt.xlabel("Federated Round")
     plt.ylabel("Loss")
     plt.tight_layout()
-    plt.savefig("logs/loss_trend.png")
+    plt.savefig(os.path.join(run_dir, "loss_trend.png"))
     plt.close()
-    print("✅ Loss plot saved: logs/loss_trend.png")
+    print(f"✅ Loss plot saved: {os.path.join(run_dir, 'loss_trend.png')}")
 else:
-    print("ℹ️ Skipped loss plot: logs/loss_log.csv not found.")
+    print(f"ℹ️ Skipped loss plot: no loss_log in {run_dir}.")
 
-print("✅ Reward, Energy, and Delay plots saved to logs/:\n - reward_trend.png\n - energy_per_client.png\n - delay_per_client.png")
+print(f"✅ Reward, Energy, and Delay plots saved to {run_dir}:\n - reward_trend.png\n - energy_per_client.png\n - delay_per_client.png")
@@ -1,15 +1,15 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import sys
 
-# Load Semantic Communication Log
-log_file = "logs/semantic_log.csv"
-if not os.path.exists(log_file):
-    raise FileNotFoundError("Semantic log file not found. Run main.py first to generate logs.")
+from utils.logger import latest_run_dir, read_log
 
-# Read the semantic fidelity log
-df = pd.read_csv(log_file)
+# Load Semantic Communication Log (run directory from argv, latest run by default)
+run_dir = sys.argv[1] if len(sys.argv) > 1 else latest_run_dir()
+df = read_log("semantic_log", run_dir)
+if df is None:
+    raise FileNotFoundError("Semantic log file not found. Run main.py first to generate logs.")
 
 # --- Plot 1: Semantic Fidelity Score vs. Round ---
 sns.set(style="whitegrid")
@@ -19,7 +19,7 @@ plt.title("Semantic Fidelity Trend Across Rounds")
 plt.xlabel("Federated Round")
 plt.ylabel("Semantic Fidelity Score")
 plt.tight_layout()
-plt.savefig("logs/semantic_fidelity_trend.png")
+plt.savefig(os.path.join(run_dir, "semantic_fidelity_trend.png"))
 plt.close()
 
 # --- Plot 2: Energy vs. Semantic Fidelity Tradeoff ---
@@ -30,7 +30,7 @@ plt.xlabel("Semantic Fidelity Score")
 plt.ylabel("Energy Consumption")
 plt.legend(title="Client", bbox_to_anchor=(1.05, 1), loc='upper left')
 plt.tight_layout()
-plt.savefig("logs/semantic_vs_energy.png")
+plt.savefig(os.path.join(run_dir, "semantic_vs_energy.png"))
 plt.close()
 
-print("✅ Semantic Communication plots saved to logs/:\n - semantic_fidelity_trend.png\n - semantic_vs_energy.png")
+print(f"✅ Semantic Communication plots saved to {run_dir}:\n - semantic_fidelity_trend.png\n - semantic_vs_energy.png")
@@ -0,0 +1,161 @@
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import resource
+import time
+from collections import defaultdict
+
+_DISABLED = contextlib.nullcontext()
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+
+
+class PhaseTimer:
+    """
+    Accumulates wall time per named phase plus free-form counters.
+
+    Usage:
+        timer = PhaseTimer()
+        with timer.phase("dt_train"):
+            ...
+        timer.count("steps", 50)
+
+    A disabled timer hands out one shared no-op context and ignores counts,
+    so instrumented hot paths cost a method call when profiling is off.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def phase(self, name):
+        if not self.enabled:
+            return _DISABLED
+        return _Phase(self, name)
+
+    def add(self, name, seconds, calls=1):
+        self.seconds[name] += seconds
+        self.calls[name] += calls
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def merge(self, snapshot):
+        """
+        Folds in another timer's snapshot(), e.g. one returned by a worker.
+        """
+        if not self.enabled or not snapshot:
+            return
+        for name, (seconds, calls) in snapshot["phases"].items():
+            self.add(name, seconds, calls)
+        for name, n in snapshot["counters"].items():
+            self.counters[name] += n
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {'phases': {name: (seconds, calls)}, 'counters': {name: n}},
+            picklable for returning from worker processes.
+        """
+        return {
+            "phases": {name: (self.seconds[name], self.calls[name]) for name in self.seconds},
+            "counters": dict(self.counters)
+        }
+
+    def reset(self):
+        self.seconds.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+
+def timed(timer, name):
+    """
+    timer.phase(name), or a no-op context when timer is None. Components
+    that take an optional timer argument time their work through this.
+    """
+    return _DISABLED if timer is None else timer.phase(name)
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of this process and its (reaped) children, in MiB.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024.0  # ru_maxrss is in KiB on Linux
+
+
+class RoundProfiler:
+    """
+    Opt-in cProfile or torch.profiler capture for selected federated rounds.
+
+    Output lands in the run directory: profile_round<N>.prof plus a text
+    summary (cProfile), or trace_round<N>.json plus an operator table
+    (torch). Only the calling process is profiled, so run with --workers 1
+    to see inside local training.
+    """
+
+    def __init__(self, mode=None, rounds=(), out_dir="."):
+        if mode not in (None, "cprofile", "torch"):
+            raise ValueError(f"Unknown profiler: {mode}")
+        self.mode = mode
+        self.rounds = set(rounds or ())
+        self.out_dir = out_dir
+
+    @contextlib.contextmanager
+    def profile(self, round_id):
+        if self.mode is None or round_id not in self.rounds:
+            yield
+            return
+
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = os.path.join(self.out_dir, f"profile_round{round_id}.prof")
+                profiler.dump_stats(path)
+                summary = io.StringIO()
+                pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+                with open(os.path.join(self.out_dir, f"profile_round{round_id}.txt"), "w") as file:
+                    file.write(summary.getvalue())
+        else:
+            import torch.profiler
+            with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU],
+                                        record_shapes=True) as profiler:
+                yield
+            profiler.export_chrome_trace(os.path.join(self.out_dir, f"trace_round{round_id}.json"))
+            with open(os.path.join(self.out_dir, f"trace_round{round_id}.txt"), "w") as file:
+                file.write(profiler.key_averages().table(sort_by="cpu_time_total", row_limit=30))
+            path = os.path.join(self.out_dir, f"trace_round{round_id}.json")
+        print(f"🔬 Round {round_id} profile written to {path}")
+
+
+# Example usage
+if __name__ == "__main__":
+    timer = PhaseTimer()
+    for _ in range(3):
+        with timer.phase("sleep"):
+            time.sleep(0.01)
+        timer.count("steps", 10)
+    print(timer.snapshot(), f"peak RSS {peak_rss_mb():.1f} MiB")